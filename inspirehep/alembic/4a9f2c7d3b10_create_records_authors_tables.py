@@ -0,0 +1,82 @@
+#
+# This file is part of Invenio.
+# Copyright (C) 2016-2018 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Create the records_authors and records_authors_statistics tables"""
+
+from __future__ import absolute_import, division, print_function
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy_utils.types import UUIDType
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9f2c7d3b10'
+down_revision = 'c1c1e9cbd3e6'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        'records_authors',
+        sa.Column('author_recid', sa.Integer, nullable=False),
+        sa.Column(
+            'literature_id',
+            UUIDType,
+            sa.ForeignKey('records_metadata.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('literature_recid', sa.Integer, nullable=False),
+        sa.Column('full_name', sa.Text, nullable=False),
+        sa.PrimaryKeyConstraint('author_recid', 'literature_id'),
+    )
+    op.create_index(
+        'ix_records_authors_literature_id',
+        'records_authors',
+        ['literature_id'],
+    )
+
+    op.create_table(
+        'records_authors_statistics',
+        sa.Column('author_recid', sa.Integer, nullable=False),
+        sa.Column('statistics', JSONB, nullable=True),
+        sa.Column('coauthors', JSONB, nullable=True),
+        sa.Column('updated', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('author_recid'),
+    )
+
+    # Same conditions as ``update_authors`` and same parsing of the
+    # references as the ``get_authors_recids_and_names`` function.
+    op.execute('''
+        INSERT INTO records_authors
+            (author_recid, literature_id, literature_recid, full_name)
+        SELECT DISTINCT ON (author_recid, literature_id)
+            substring(author.value->'record'->>'$ref' from '/aut[^/]*/([0-9]+)/*$')::integer AS author_recid,
+            id AS literature_id,
+            (json->>'control_number')::integer,
+            author.value->>'full_name'
+        FROM
+            records_metadata,
+            jsonb_array_elements(json->'authors') WITH ORDINALITY AS author(value, position)
+        WHERE
+            substring(author.value->'record'->>'$ref' from '/aut[^/]*/([0-9]+)/*$') IS NOT NULL
+            AND json ? 'control_number'
+            AND json->>'$schema' LIKE '%hep.json'
+            AND json->'_collections' @> '["Literature"]'
+            AND NOT coalesce((json->>'deleted')::boolean, false)
+        ORDER BY author_recid, literature_id, author.position
+    ''')
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table('records_authors_statistics')
+    op.drop_index('ix_records_authors_literature_id', table_name='records_authors')
+    op.drop_table('records_authors')
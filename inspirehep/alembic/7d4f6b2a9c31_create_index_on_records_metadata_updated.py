@@ -0,0 +1,33 @@
+#
+# This file is part of Invenio.
+# Copyright (C) 2016-2018 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Create an index on the updated column of records_metadata"""
+
+from __future__ import absolute_import, division, print_function
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4f6b2a9c31'
+down_revision = '4a9f2c7d3b10'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_index(
+        'ix_records_metadata_updated',
+        'records_metadata',
+        ['updated'],
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index('ix_records_metadata_updated', table_name='records_metadata')
@@ -0,0 +1,44 @@
+#
+# This file is part of Invenio.
+# Copyright (C) 2016-2018 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Create the records_reindex_checkpoint table"""
+
+from __future__ import absolute_import, division, print_function
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy_utils.types import UUIDType
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1c1e9cbd3e6'
+down_revision = '0ab3d105df13'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        'records_reindex_checkpoint',
+        sa.Column('job_id', sa.String(255), nullable=False),
+        sa.Column('pid_type', sa.String(6), nullable=False),
+        sa.Column('last_object_uuid', UUIDType, nullable=True),
+        sa.Column('processed', sa.Integer, default=0, nullable=False),
+        sa.Column('succeeded', sa.Integer, default=0, nullable=False),
+        sa.Column('failed', sa.Integer, default=0, nullable=False),
+        sa.Column('target_index', sa.String(255), nullable=True),
+        sa.Column('finished', sa.Boolean, default=False, nullable=False),
+        sa.Column('created', sa.DateTime, nullable=False),
+        sa.Column('updated', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('job_id', 'pid_type'),
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table('records_reindex_checkpoint')
@@ -97,7 +97,12 @@ CELERY_BEAT_SCHEDULE = {
     'journal_kb_builder': {
         'task': 'inspirehep.modules.refextract.tasks.create_journal_kb_file',
         'schedule': crontab(minute='0', hour='*/1'),
-    }
+        'kwargs': {'incremental': True},
+    },
+    'journal_kb_full_builder': {
+        'task': 'inspirehep.modules.refextract.tasks.create_journal_kb_file',
+        'schedule': crontab(minute='30', hour='3'),
+    },
 }
 
 # Cache
@@ -223,6 +228,17 @@ RECORD_EDITOR_FILE_UPLOAD_FOLDER = 'inspirehep/modules/editor/temp'
 # On production, if you enable celery beat change this path to point to a shared space.
 REFEXTRACT_JOURNAL_KB_PATH = pkg_resources.resource_filename(
     'refextract', 'references/kbs/journal-titles.kb')
+REFEXTRACT_JOURNAL_KB_UPDATE_ON_COMMIT = False
+"""Whether the journal KB is updated incrementally after each commit of a
+journal record, on top of the builds scheduled in ``CELERY_BEAT_SCHEDULE``."""
+REFEXTRACT_JOURNAL_KB_CHECK_INTERVAL = 60
+"""Seconds between two checks of whether the journal KB changed, see
+:class:`inspirehep.utils.references.JournalKB`."""
+REFEXTRACT_CACHE_SIZE = 10000
+"""Number of refextract extractions kept in Redis, keyed by the hash of the
+document and of the journal KB. Set to 0 to always run refextract."""
+REFEXTRACT_CACHE_TTL = 30 * 24 * 60 * 60
+"""Seconds after which a cached refextract extraction is run again."""
 
 # Search
 # ======
@@ -241,6 +257,36 @@ SEARCH_TYPEAHEAD_HINT_URL = '/search/suggest?field=%TYPE&query=%QUERY'
 SEARCH_TYPEAHEAD_DEFAULT_SET = 'invenio'
 
 SEARCH_ELASTIC_HOSTS = ['localhost']
+SEARCH_RESPONSE_CACHE_TTL = 60
+"""Seconds during which the responses to Literature search and facets requests are cached.
+
+Note:
+
+  ``0`` disables the cache. Records updated in the meantime are only seen
+  after this time.
+"""
+SEARCH_QUERY_PARSER_CACHE_SIZE = 10000
+"""Number of parsed queries kept in memory by each process."""
+SEARCH_QUERY_PARSER_CACHE_WARMUP_FILE = None
+"""Log of the queries sent by the users, one per line, whose most frequent
+queries are parsed in advance by each process."""
+SEARCH_QUERY_PARSER_CACHE_WARMUP_SIZE = 200
+"""Number of the most frequent queries of ``SEARCH_QUERY_PARSER_CACHE_WARMUP_FILE``
+parsed in advance, during the first search request of each process."""
+SEARCH_QUERY_PARSER_CACHE_METRIC_INTERVAL = 1000
+"""Number of queries parsed by each process between two metrics of the hit rate
+of its parsed queries cache."""
+SEARCH_SUGGEST_CACHE_FIELDS = [
+    'affiliation_suggest',
+    'authors.name_suggest',
+    'experiment_suggest',
+    'title_suggest',
+]
+"""Completion fields whose suggestions are cached in memory by each process."""
+SEARCH_SUGGEST_CACHE_SIZE = 50000
+"""Number of suggestions, keyed by field and query, kept in memory by each process."""
+SEARCH_SUGGEST_CACHE_TTL = 3600
+"""Seconds after which the cached suggestions are fetched again from Elasticsearch."""
 SEARCH_UI_BASE_TEMPLATE = BASE_TEMPLATE
 SEARCH_UI_SEARCH_TEMPLATE = 'search/search.html'
 SEARCH_UI_SEARCH_API = '/api/literature/'
@@ -1157,15 +1203,69 @@ Note:
   This variable takes precedence over ``RECORDS_SKIP_FILES``, but can be
   overriden by the tasks in the ``inspirehep.modules.migrator.tasks`` module.
 """
+RECORDS_MIGRATION_CONTINUOUS_BATCH_SIZE = 100
+"""Number of records pushed by legacy which are migrated together."""
 
 JSONSCHEMAS_HOST = "localhost:5000"
 JSONSCHEMAS_REPLACE_REFS = True
 JSONSCHEMAS_LOADER_CLS = 'inspirehep.modules.records.json_ref_loader.SCHEMA_LOADER_CLS'
 
+RECORDS_EXPORT_FORMATS = {
+    'bibtex': (INSPIRE_SERIALIZERS + ':bibtex_v1', 'application/x-bibtex', 'bib'),
+    'latex-eu': (INSPIRE_SERIALIZERS + ':latex_v1_EU', 'application/vnd+inspire.latex.eu+x-latex', 'tex'),
+    'latex-us': (INSPIRE_SERIALIZERS + ':latex_v1_US', 'application/vnd+inspire.latex.us+x-latex', 'tex'),
+    'marcxml': (INSPIRE_SERIALIZERS + ':marcxml_v1', 'application/marcxml+xml', 'xml'),
+}
+"""Formats of ``/api/literature/export``: serializer, MIME type and file extension."""
+RECORDS_PRECOMPUTED_EXPORT_FORMATS = []
+"""Formats of ``RECORDS_EXPORT_FORMATS`` in which Literature records are serialized when indexed.
+
+The serializations are stored in ``_export_formats`` and concatenated as
+they are by ``/api/literature/export``, while the formats that failed are
+stored in ``_export_formats_errors``.
+"""
+RECORDS_EXPORT_CHUNK_SIZE = 500
+"""Number of records scrolled and serialized at a time by ``/api/literature/export``."""
+RECORDS_EXPORT_MAX_RESULTS = 1000
+"""Maximum number of records exported by ``/api/literature/export`` for users without the ``export-records`` action."""
+RECORDS_EXPORT_CURATOR_MAX_RESULTS = 100000
+"""Maximum number of records exported by ``/api/literature/export`` for users with the ``export-records`` action."""
+RECORDS_SERIALIZERS_CACHE_SIZE = 1000
+"""Number of revisions of records kept serialized in memory by the BibTeX and LaTeX serializers."""
+RECORDS_SERIALIZERS_CACHE_TTL = 3600
+"""Seconds after which a serialized record expires, to pick up changes in its linked records and the date."""
+RECORDS_REFERENCES_CACHE_SIZE = 10000
+"""Number of records linked from references kept resolved in memory, keyed by pid and revision."""
+RECORDS_IDENTIFIERS_INDEX_ENABLED = True
+"""Whether references are matched by their unique identifiers in Redis before ES.
+
+The index has to be loaded once with ``inspirehep identifiers load``, until
+then all the references are matched with ES.
+"""
+RECORDS_JSON_REF_CACHE_SIZE = 1000
+"""Number of records kept in memory by each JSON reference loader."""
+RECORDS_JSON_REF_CACHE_TTL = 300
+"""Seconds after which a record cached by a JSON reference loader is loaded again.
+
+Note:
+
+  Records updated by another process are only seen after this time.
+"""
+RECORDS_PID_CACHE_SIZE = 10000
+"""Number of uuids of records kept in memory, keyed by pid, by the record getters."""
+RECORDS_PID_CACHE_TTL = 600
+"""Seconds after which the uuid of a record is resolved again by the record getters."""
+
 INDEXER_DEFAULT_INDEX = "records-hep"
 INDEXER_DEFAULT_DOC_TYPE = "hep"
 INDEXER_REPLACE_REFS = False
 INDEXER_BULK_REQUEST_TIMEOUT = float(900)
+INDEXER_BULK_ENHANCE_CHUNK_SIZE = 100
+"""Number of records loaded and enhanced together when bulk reindexing."""
+RECORDS_CITATIONS_REINDEX_WINDOW = 10
+"""Seconds during which the records whose citations changed are collected
+before being reindexed together, each of them only once. If ``0``, they
+are reindexed right away by every ``index_modified_citations_from_record``."""
 
 # OAuthclient
 # ===========
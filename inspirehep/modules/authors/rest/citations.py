@@ -23,14 +23,37 @@
 from __future__ import absolute_import, division, print_function
 
 import json
+from itertools import islice
 
 from elasticsearch_dsl import Q
+from flask import request, stream_with_context
 
 from inspirehep.modules.search import LiteratureSearch
 
 
+def get_authors_recids(source):
+    """Return the recids of the authors of a record, as a set.
+
+    Not every signature has a recid (at least for demo records).
+    """
+    return set(
+        author['recid'] for author in source.get('authors', [])
+        if 'recid' in author
+    )
+
+
 class AuthorAPICitations(object):
-    """API endpoint for author collection returning citations."""
+    """API endpoint for author collection returning citations.
+
+    The papers of the author are processed in chunks of ``chunk_size``. The
+    citers of all the papers of a chunk are fetched with a single ``terms``
+    query and the chunk is sent to the client before the next one is processed.
+
+    A page of the papers of the author, sorted by recid, can be requested with
+    the ``page`` and ``size`` arguments.
+    """
+
+    chunk_size = 1000
 
     def serialize(self, pid, record, links_factory=None):
         """Return a list of citations for a given author recid.
@@ -45,9 +68,19 @@ class AuthorAPICitations(object):
             Factory function for the link generation, which are added to
             the response.
         """
-        author_pid = pid.pid_value
-        citations = {}
+        page = request.args.get('page', 1, type=int)
+        size = request.args.get('size', type=int)
+
+        citees = self.get_citees(pid.pid_value, page=page, size=size)
+
+        return stream_with_context(self.dump(citees))
 
+    def get_citees(self, author_pid, page=1, size=None):
+        """Get the publications co-authored by a given author.
+
+        Returns all of them if ``size`` is not passed, otherwise only the
+        given page.
+        """
         query = Q('match', authors__recid=author_pid)
         search = LiteratureSearch().query('nested', path='authors', query=query)\
                                    .params(_source=[
@@ -56,72 +89,95 @@ class AuthorAPICitations(object):
                                        'self',
                                    ])
 
-        # For each publication co-authored by a given author...
-        for result in search.scan():
-            result_source = result.to_dict()
-
-            recid = result_source['control_number']
-            authors = set([i['recid'] for i in result_source['authors']])
-            citations[recid] = {}
-
-            nested_search = LiteratureSearch().query({
-                "match": {
-                    "references.recid": recid
-                }
-            }).params(
-                _source=[
-                    "authors.recid",
-                    "collections",
-                    "control_number",
-                    "earliest_date",
-                    "self",
-                ]
-            )
+        if size is None:
+            results = search.scan()
+        else:
+            start = (max(page, 1) - 1) * size
+            results = search.sort('control_number')[start:start + size].execute()
 
-            # The source record that is being cited.
-            citations[recid]['citee'] = dict(
-                id=recid,
-                record=result_source['self'],
-            )
-            citations[recid]['citers'] = []
+        for result in results:
+            yield result.to_dict()
 
-            # Check all publications, which cite the parent record.
-            for nested_result in nested_search.scan():
-                nested_result_source = nested_result.to_dict()
+    def get_citers(self, citees):
+        """Get the citations of many publications with a single query.
 
-                # Not every signature has a recid (at least for demo records).
-                try:
-                    nested_authors = set(
-                        [i['recid'] for i in nested_result_source['authors']]
-                    )
-                except KeyError:
-                    nested_authors = set()
+        Returns:
+            dict: the citations of each publication, keyed by its recid.
+        """
+        citees_authors = {
+            citee['control_number']: get_authors_recids(citee)
+            for citee in citees
+        }
+        citations = {recid: [] for recid in citees_authors}
+
+        search = LiteratureSearch().query(
+            'terms', references__recid=[citee['control_number'] for citee in citees]
+        ).params(
+            _source=[
+                "authors.recid",
+                "collections",
+                "control_number",
+                "earliest_date",
+                "references.recid",
+                "self",
+            ]
+        )
 
+        for result in search.scan():
+            source = result.to_dict()
+            authors = get_authors_recids(source)
+            cited_recids = set(
+                reference['recid'] for reference in source.get('references', [])
+                if reference.get('recid') in citees_authors
+            )
+
+            for recid in cited_recids:
                 citation = dict(
                     citer=dict(
-                        id=int(nested_result_source['control_number']),
-                        record=nested_result_source['self']
+                        id=int(source['control_number']),
+                        record=source['self']
                     ),
                     # If at least one author is shared, it's a self-citation.
-                    self_citation=len(authors & nested_authors) > 0,
+                    self_citation=len(citees_authors[recid] & authors) > 0,
                 )
 
                 # Get the earliest date of a citer.
-                try:
-                    citation['date'] = nested_result_source['earliest_date']
-                except KeyError:
-                    pass
+                if 'earliest_date' in source:
+                    citation['date'] = source['earliest_date']
 
                 # Get status if a citer is published.
                 # FIXME: As discussed with Sam, we should have a boolean flag
                 #        for this type of information.
-                try:
-                    citation['published_paper'] = "Published" in [
-                        i['primary'] for i in nested_result_source[
-                            'collections']]
-                except KeyError:
-                    citation['published_paper'] = False
-
-                citations[recid]['citers'].append(citation)
-
-        return json.dumps(citations.values())
+                citation['published_paper'] = "Published" in [
+                    i['primary'] for i in source.get('collections', [])]
+
+                citations[recid].append(citation)
+
+        return citations
+
+    def dump(self, citees):
+        """Yield the JSON list of the citations of ``citees`` in chunks."""
+        yield '['
+
+        separator = ''
+        citees = iter(citees)
+        chunk = list(islice(citees, self.chunk_size))
+        while chunk:
+            for item in self.dump_chunk(chunk):
+                yield separator + item
+                separator = ', '
+            chunk = list(islice(citees, self.chunk_size))
+
+        yield ']'
+
+    def dump_chunk(self, citees):
+        citations = self.get_citers(citees)
+        for citee in citees:
+            recid = citee['control_number']
+            yield json.dumps({
+                'citee': dict(
+                    id=recid,
+                    record=citee['self'],
+                ),
+                'citers': citations[recid],
+            })
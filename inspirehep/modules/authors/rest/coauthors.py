@@ -24,13 +24,53 @@ from __future__ import absolute_import, division, print_function
 
 import json
 
-from elasticsearch_dsl import Q
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
 
-from inspirehep.modules.search import LiteratureSearch
+from invenio_db import db
+
+from inspire_dojson.utils import get_record_ref
+from inspirehep.modules.records.models import AuthorStatistics, RecordAuthors
+
+
+def compute_author_coauthors(author_recid):
+    """Compute the co-authors of an author from the DB.
+
+    :param author_recid: recid of the author.
+    :returns: list of co-authors, with the number of Literature records
+        they signed together with the author.
+    """
+    author = aliased(RecordAuthors)
+    coauthor = aliased(RecordAuthors)
+
+    count = func.count(coauthor.literature_id)
+    query = db.session.query(
+        coauthor.author_recid,
+        count,
+        func.min(coauthor.full_name),
+    ).join(
+        author, author.literature_id == coauthor.literature_id
+    ).filter(
+        author.author_recid == author_recid,
+        coauthor.author_recid != author_recid,
+    ).group_by(coauthor.author_recid).order_by(count.desc(), coauthor.author_recid)
+
+    return [
+        dict(
+            count=coauthor_count,
+            full_name=full_name,
+            id=coauthor_recid,
+            record=get_record_ref(coauthor_recid, 'authors'),
+        ) for coauthor_recid, coauthor_count, full_name in query
+    ]
 
 
 class AuthorAPICoauthors(object):
-    """API endpoint for author collection returning co-authors."""
+    """API endpoint for author collection returning co-authors.
+
+    The co-authors are cached in ``AuthorStatistics`` and only computed
+    again after a change to the Literature records of the author.
+    """
 
     def serialize(self, pid, record, links_factory=None):
         """Return a list of co-authors for a given author recid.
@@ -45,34 +85,7 @@ class AuthorAPICoauthors(object):
             Factory function for the link generation, which are added to
             the response.
         """
-        author_pid = pid.pid_value
-        coauthors = {}
-
-        query = Q('match', authors__recid=author_pid)
-        search = LiteratureSearch().query('nested', path='authors', query=query)\
-                                   .params(_source=[
-                                       'authors.full_name',
-                                       'authors.recid',
-                                       'authors.record',
-                                   ])
-
-        for result in search.scan():
-            result_source = result.to_dict()['authors']
-
-            for author in result_source:
-                try:
-                    # Don't add the reference author.
-                    if author['recid'] != author_pid:
-                        if author['recid'] in coauthors:
-                            coauthors[author['recid']]['count'] += 1
-                        else:
-                            coauthors[author['recid']] = dict(
-                                count=1,
-                                full_name=author['full_name'],
-                                id=author['recid'],
-                                record=author['record'],
-                            )
-                except KeyError:
-                    pass
-
-        return json.dumps(coauthors.values())
+        coauthors = AuthorStatistics.get(
+            int(pid.pid_value), 'coauthors', compute_author_coauthors)
+
+        return json.dumps(coauthors)
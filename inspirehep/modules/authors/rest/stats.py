@@ -25,16 +25,111 @@ from __future__ import absolute_import, division, print_function
 import json
 from collections import Counter
 
-from elasticsearch_dsl import Q
+from sqlalchemy import String, and_, cast
 
-from inspire_utils.helpers import force_list
-from inspire_utils.record import get_value
-from inspirehep.modules.search import LiteratureSearch
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+
+from inspirehep.modules.records.models import (
+    AuthorStatistics,
+    RecordAuthors,
+    RecordCitationsCount,
+)
 from inspirehep.utils.stats import calculate_h_index, calculate_i10_index
 
 
+def compute_author_statistics(author_recid):
+    """Compute the statistics of an author from the DB.
+
+    All the Literature records of the author are read with a single query,
+    together with their citation counts.
+
+    :param author_recid: recid of the author.
+    :returns: dict
+    """
+    fields = set()
+    keywords = []
+
+    statistics = {}
+    statistics['citations'] = 0
+    statistics['publications'] = 0
+    statistics['types'] = {}
+
+    statistics_citations = {}
+
+    query = db.session.query(
+        RecordAuthors.literature_recid,
+        RecordMetadata.json['document_type'],
+        RecordMetadata.json['publication_type'],
+        RecordMetadata.json['refereed'],
+        RecordMetadata.json['inspire_categories'],
+        RecordMetadata.json['keywords'],
+        RecordCitationsCount.citation_count,
+    ).join(
+        RecordMetadata, RecordMetadata.id == RecordAuthors.literature_id
+    ).outerjoin(
+        RecordCitationsCount, and_(
+            RecordCitationsCount.pid_type == 'lit',
+            RecordCitationsCount.pid_value == cast(RecordAuthors.literature_recid, String),
+        )
+    ).filter(RecordAuthors.author_recid == author_recid)
+
+    for (recid, document_type, publication_type, refereed,
+         inspire_categories, record_keywords, citation_count) in query:
+        # Increment the count of the total number of publications.
+        statistics['publications'] += 1
+
+        # Increment the count of citations.
+        citation_count = citation_count or 0
+
+        statistics['citations'] += citation_count
+        statistics_citations[recid] = citation_count
+
+        # Count how many times certain type of publication was published,
+        # the type being the first of ``facet_inspire_doc_type``.
+        publication_types = (document_type or []) + (publication_type or [])
+        if refereed:
+            publication_types.append('peer reviewed')
+
+        if publication_types:
+            publication_type = publication_types[0]
+            statistics['types'][publication_type] = \
+                statistics['types'].get(publication_type, 0) + 1
+
+        # Get fields.
+        for category in inspire_categories or []:
+            if 'term' in category:
+                fields.add(category['term'])
+
+        # Get keywords.
+        keywords.extend([
+            k['value'] for k in record_keywords or []
+            if k.get('value') and k['value'] != '* Automatic Keywords *'])
+
+    # Calculate h-index together with i10-index.
+    statistics['hindex'] = calculate_h_index(statistics_citations)
+    statistics['i10index'] = calculate_i10_index(statistics_citations)
+
+    if fields:
+        statistics['fields'] = list(fields)
+
+    # Return the top 25 keywords.
+    if keywords:
+        counter = Counter(keywords)
+        statistics['keywords'] = [{
+            'count': i[1],
+            'keyword': i[0]
+        } for i in counter.most_common(25)]
+
+    return statistics
+
+
 class AuthorAPIStats(object):
-    """API endpoint for author collection returning statistics."""
+    """API endpoint for author collection returning statistics.
+
+    The statistics are cached in ``AuthorStatistics`` and only computed
+    again after a change to the Literature records of the author.
+    """
 
     def serialize(self, pid, record, links_factory=None):
         """Return a different metrics for a given author recid.
@@ -49,77 +144,7 @@ class AuthorAPIStats(object):
             Factory function for the link generation, which are added to
             the response.
         """
-        author_pid = pid.pid_value
-
-        fields = set()
-        keywords = []
-
-        statistics = {}
-        statistics['citations'] = 0
-        statistics['publications'] = 0
-        statistics['types'] = {}
-
-        statistics_citations = {}
-
-        query = Q('match', authors__recid=author_pid)
-        search = LiteratureSearch().query('nested', path='authors', query=query)\
-                                   .params(_source=[
-                                       'citation_count',
-                                       'control_number',
-                                       'facet_inspire_doc_type',
-                                       'facet_inspire_categories',
-                                       'keywords',
-                                   ])
-
-        for result in search.scan():
-            result_source = result.to_dict()
-
-            # Increment the count of the total number of publications.
-            statistics['publications'] += 1
-
-            # Increment the count of citations.
-            citation_count = result_source.get('citation_count', 0)
-
-            statistics['citations'] += citation_count
-            statistics_citations[result_source['control_number']] = \
-                citation_count
-
-            # Count how many times certain type of publication was published.
-            try:
-                publication_type = result_source.get(
-                    'facet_inspire_doc_type', [])[0]
-            except IndexError:
-                pass
-
-            if publication_type:
-                if publication_type in statistics['types']:
-                    statistics['types'][publication_type] += 1
-                else:
-                    statistics['types'][publication_type] = 1
-
-            # Get fields.
-            for field in result_source.get('facet_inspire_categories', []):
-                fields.add(field)
-
-            # Get keywords.
-            keywords.extend([
-                k for k in force_list(
-                    get_value(result_source, 'keywords.value'))
-                if k != '* Automatic Keywords *'])
-
-        # Calculate h-index together with i10-index.
-        statistics['hindex'] = calculate_h_index(statistics_citations)
-        statistics['i10index'] = calculate_i10_index(statistics_citations)
-
-        if fields:
-            statistics['fields'] = list(fields)
-
-        # Return the top 25 keywords.
-        if keywords:
-            counter = Counter(keywords)
-            statistics['keywords'] = [{
-                'count': i[1],
-                'keyword': i[0]
-            } for i in counter.most_common(25)]
+        statistics = AuthorStatistics.get(
+            int(pid.pid_value), 'statistics', compute_author_statistics)
 
         return json.dumps(statistics)
@@ -32,16 +32,16 @@ from werkzeug.utils import secure_filename
 
 from invenio_db import db
 from invenio_records.models import RecordMetadata
-from refextract import (
-    extract_references_from_string,
-    extract_references_from_url,
-)
 
 from inspirehep.modules.editor.permissions import (
     editor_permission,
     editor_use_api_permission,
 )
 from inspirehep.modules.pidstore.utils import get_pid_type_from_endpoint
+from inspirehep.modules.refextract.cache import (
+    extract_references_from_string,
+    extract_references_from_url,
+)
 from inspirehep.modules.refextract.matcher import match_references
 from inspirehep.modules.tools import authorlist
 from inspirehep.utils import tickets
@@ -135,6 +135,10 @@ def init_cataloger_permissions():
         action='migrator-use-api',
         role=cataloger,
     ))
+    db.session.add(ActionRoles(
+        action='export-records',
+        role=cataloger,
+    ))
 
 
 def init_hermes_permissions():
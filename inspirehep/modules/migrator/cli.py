@@ -81,11 +81,15 @@ def migrate():
               help='Wait for migration to complete. This only has an effect if the -w flag is not set.')
 @click.option('-f', '--force', is_flag=True, default=False,
               help='Force the task to run even in debug mode.')
+@click.option('--processes', '-p', type=int, default=1,
+              help='Number of processes among which the files of a prodsync tarball are split, '
+                   'and the records are converted when migrating them in the current process.')
 @with_appcontext
 def migrate_file(file_name,
                  mirror_only=False,
                  wait=False,
-                 force=False):
+                 force=False,
+                 processes=1):
     """Migrate the records in the provided file.
 
     The file can be an (optionally-gzipped) XML file containing MARCXML, or a
@@ -94,9 +98,9 @@ def migrate_file(file_name,
     halt_if_debug_mode(force=force)
     click.echo("Migrating records from file: {0}".format(file_name))
 
-    populate_mirror_from_file(file_name)
+    populate_mirror_from_file(file_name, processes=processes)
     if not mirror_only:
-        migrate_from_mirror(wait_for_results=wait)
+        migrate_from_mirror(wait_for_results=wait, processes=processes)
 
 
 @migrate.command()
@@ -108,16 +112,20 @@ def migrate_file(file_name,
               help='Wait for migration to complete. This only has an effect if the -w flag is not set.')
 @click.option('-f', '--force', is_flag=True, default=False,
               help='Force the task to run even in debug mode.')
+@click.option('--processes', '-p', type=int, default=1,
+              help='If more than 1, migrate the records in the current process, '
+                   'converting them in this many processes.')
 @with_appcontext
 def mirror(also_migrate=None,
            wait=False,
-           force=False):
+           force=False,
+           processes=1):
     """Migrate records from the mirror.
 
     By default, only records that have not been migrated yet are migrated.
     """
     halt_if_debug_mode(force=force)
-    migrate_from_mirror(also_migrate=also_migrate, wait_for_results=wait)
+    migrate_from_mirror(also_migrate=also_migrate, wait_for_results=wait, processes=processes)
 
 
 @migrate.command()
@@ -27,8 +27,14 @@ from __future__ import absolute_import, division, print_function
 import gzip
 import re
 import tarfile
+import uuid
 import zlib
+from collections import OrderedDict, deque
 from contextlib import closing
+from datetime import datetime
+from functools import partial
+from itertools import chain
+from multiprocessing import Pool
 
 import click
 import requests
@@ -41,20 +47,30 @@ from functools import wraps
 from jsonschema import ValidationError
 from redis import StrictRedis
 from redis_lock import Lock
+from sqlalchemy import create_engine, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from time_execution import write_metric
 
 from invenio_db import db
-from invenio_pidstore.models import PersistentIdentifier
+from invenio_indexer.api import current_record_to_index
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus, RecordIdentifier
+from invenio_records.models import RecordMetadata
+from invenio_records.signals import before_record_insert
 from invenio_search import current_search_client as es
 
 from inspire_dojson import marcxml2record
+from inspire_dojson.utils import strip_empty_values
+from inspire_schemas.api import validate
 from inspire_utils.logging import getStackTraceLogger
 from inspirehep.modules.records.api import InspireRecord
 from inspirehep.modules.pidstore.utils import (
+    get_pid_type_from_schema,
     get_pid_types_from_endpoints,
 )
 from inspirehep.modules.records.receivers import index_after_commit
+from inspirehep.modules.records.tasks import index_modified_citations_from_record
 from inspirehep.utils.schema import ensure_valid_schema
-from inspirehep.utils.record import create_index_op
+from inspirehep.utils.record import create_index_op, create_index_ops
 
 from .models import LegacyRecordsMirror
 
@@ -64,6 +80,8 @@ CHUNK_SIZE = 100
 LARGE_CHUNK_SIZE = 2000
 
 split_marc = re.compile('<record.*?>.*?</record>', re.DOTALL)
+re_last_modification = re.compile(
+    '<controlfield.*?tag=.005.*?>(?P<date>\\d{14})(\\.\\d+)?</controlfield>')
 
 
 def disable_orcid_push(task_function):
@@ -105,22 +123,41 @@ def split_blob(blob):
 
 
 def split_stream(stream):
-    """Split the stream using <record.*?>.*?</record> as pattern.
+    """Split the stream in MARCXML records, from ``<record`` to ``</record>``.
 
-    This operates line by line in order not to load the entire file in memory.
+    This operates on the chunks of bytes of the stream in order not to load
+    the entire file in memory, and does not decode, join or match them with
+    a regex, as it only looks for the opening and closing tags.
     """
-    len_closing_tag = len('</record>')
-    buf = []
-    for row in stream:
-        row = row.decode('utf8')
-        index = row.rfind('</record>')
-        if index >= 0:
-            buf.append(row[:index + len_closing_tag])
-            for blob in split_blob(''.join(buf)):
-                yield blob.encode('utf8')
-            buf = [row[index + len_closing_tag:]]
-        else:
-            buf.append(row)
+    opening_tag = b'<record'
+    closing_tag = b'</record>'
+    buf = b''
+    # Position of the data of ``buf`` not yet consumed, which is only dropped
+    # once per chunk, not to copy the rest of the buffer for every record.
+    pos = 0
+    # Position from which to look for the closing tag of the current record.
+    search_from = 0
+    for chunk in stream:
+        buf = buf[pos:] + chunk
+        search_from = max(search_from - pos, 0)
+        pos = 0
+        while True:
+            start = buf.find(opening_tag, pos)
+            if start < 0:
+                pos = max(len(buf) - len(opening_tag), pos)
+                search_from = 0
+                break
+
+            end = buf.find(closing_tag, max(start, search_from))
+            if end < 0:
+                pos = start
+                search_from = max(len(buf) - len(closing_tag), start)
+                break
+
+            end += len(closing_tag)
+            yield buf[start:end]
+            pos = end
+            search_from = 0
 
 
 def read_file(source):
@@ -141,6 +178,15 @@ def read_file(source):
                 yield line
 
 
+def read_tar_member(source, member_name, chunk_size=1024 * 1024):
+    """Read in chunks a gzipped member of a prodsync tarball."""
+    with closing(tarfile.open(source)) as tar:
+        member = tar.extractfile(tar.getmember(member_name))
+        unzipped = gzip.GzipFile(fileobj=member, mode='rb')
+        for chunk in iter(partial(unzipped.read, chunk_size), b''):
+            yield chunk
+
+
 def migrate_record_from_legacy(recid):
     response = requests.get('http://inspirehep.net/record/{recid}/export/xme'.format(recid=recid))
     response.raise_for_status()
@@ -148,7 +194,7 @@ def migrate_record_from_legacy(recid):
     db.session.commit()
 
 
-def migrate_from_mirror(also_migrate=None, wait_for_results=False, skip_files=None):
+def migrate_from_mirror(also_migrate=None, wait_for_results=False, skip_files=None, processes=1):
     """Migrate legacy records from the local mirror.
 
     By default, only the records that have not been migrated yet are migrated.
@@ -164,6 +210,10 @@ def migrate_from_mirror(also_migrate=None, wait_for_results=False, skip_files=No
         wait_for_results(bool): flag indicating whether the task should wait
             for the migration to finish (if True) or fire and forget the migration
             tasks (if False).
+        processes(int): if greater than 1, the records are not migrated by
+            celery tasks, but by ``migrate_recids_from_mirror_in_pipeline``
+            in the current process, which converts them in a pool of this
+            many processes. It always waits for the migration to finish.
     """
     if skip_files is None:
         skip_files = current_app.config.get(
@@ -179,6 +229,12 @@ def migrate_from_mirror(also_migrate=None, wait_for_results=False, skip_files=No
     elif also_migrate != 'all':
         raise ValueError('"also_migrate" should be either None, "all" or "broken"')
 
+    if processes > 1:
+        prod_recids = [res.recid for res in query.yield_per(LARGE_CHUNK_SIZE)]
+        migrate_recids_from_mirror_in_pipeline(prod_recids, processes, skip_files=skip_files)
+        print('All records have been migrated.')
+        return
+
     if wait_for_results:
         # if the wait_for_results is true we enable returning results from the
         # migrate_recids_from_mirror task so that we could use them to
@@ -208,40 +264,181 @@ def migrate_from_file(source, wait_for_results=False):
     migrate_from_mirror(wait_for_results=wait_for_results)
 
 
-def populate_mirror_from_file(source):
-    for i, chunk in enumerate(chunker(split_stream(read_file(source)), CHUNK_SIZE)):
+def populate_mirror_from_file(source, processes=1):
+    """Insert or update in the mirror all the records of a file.
+
+    Args:
+        source(str): path of an (optionally-gzipped) XML file containing
+            MARCXML, or of a prodsync tarball.
+        processes(int): number of processes among which the members of a
+            prodsync tarball are split. Other files are always read by a
+            single process.
+    """
+    if processes > 1 and source.endswith('.tar'):
+        _populate_mirror_from_tarball_in_parallel(source, processes)
+        return
+
+    for i, chunk in enumerate(chunker(split_stream(read_file(source)), LARGE_CHUNK_SIZE)):
         insert_into_mirror(chunk)
-        print("Inserted {} records into mirror".format(i * CHUNK_SIZE + len(chunk)))
+        print("Inserted {} records into mirror".format(i * LARGE_CHUNK_SIZE + len(chunk)))
+
+
+def _populate_mirror_from_tarball_in_parallel(source, processes):
+    with closing(tarfile.open(source)) as tar:
+        member_names = [member.name for member in tar if member.isfile()]
+
+    database_uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+    pool = Pool(processes)
+    try:
+        inserted = 0
+        results = pool.imap_unordered(
+            _populate_mirror_from_tar_member,
+            [(database_uri, source, member_name) for member_name in member_names],
+        )
+        for member_name, count in results:
+            inserted += count
+            print("Inserted {} records into mirror from {} ({} in total)".format(count, member_name, inserted))
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+_worker_engine = None
+
+
+def _populate_mirror_from_tar_member(args):
+    """Insert in the mirror all the records of a tarball member.
+
+    Runs in a worker process, outside of the application context, with its
+    own engine for the database.
+    """
+    global _worker_engine
+    database_uri, source, member_name = args
+    if _worker_engine is None:
+        _worker_engine = create_engine(database_uri)
+
+    count = 0
+    for chunk in chunker(split_stream(read_tar_member(source, member_name)), LARGE_CHUNK_SIZE):
+        with _worker_engine.begin() as connection:
+            connection.execute(_upsert_into_mirror_statement(chunk))
+        count += len(chunk)
+
+    return member_name, count
 
 
 @shared_task(ignore_result=True)
 def continuous_migration(skip_files=None):
-    """Task to continuously migrate what is pushed up by Legacy."""
+    """Task to continuously migrate what is pushed up by Legacy.
+
+    The records are taken from the ``legacy_records`` list in batches of
+    ``RECORDS_MIGRATION_CONTINUOUS_BATCH_SIZE``, and removed from it only
+    once the batch is committed. After every batch, the number of records
+    left in the list and the lag of the migration are written as metrics.
+    """
     if skip_files is None:
         skip_files = current_app.config.get(
             'RECORDS_MIGRATION_SKIP_FILES',
             False,
         )
+    batch_size = current_app.config['RECORDS_MIGRATION_CONTINUOUS_BATCH_SIZE']
     redis_url = current_app.config.get('CACHE_REDIS_URL')
     r = StrictRedis.from_url(redis_url)
     lock = Lock(r, 'continuous_migration', expire=120, auto_renewal=True)
     if lock.acquire(blocking=False):
         try:
-            while r.llen('legacy_records'):
-                raw_record = r.lrange('legacy_records', 0, 0)
-                if raw_record:
-                    migrate_and_insert_record(
-                        zlib.decompress(raw_record[0]),
-                        skip_files=skip_files,
-                    )
-                    db.session.commit()
-                r.lpop('legacy_records')
+            while True:
+                pipeline = r.pipeline()
+                pipeline.lrange('legacy_records', 0, batch_size - 1)
+                pipeline.llen('legacy_records')
+                raw_records, queue_length = pipeline.execute()
+                if not raw_records:
+                    break
+
+                raw_records = [zlib.decompress(raw_record) for raw_record in raw_records]
+                migrate_and_insert_records(raw_records, skip_files=skip_files)
+                r.ltrim('legacy_records', len(raw_records), -1)
+
+                write_metric(
+                    name='inspirehep.modules.migrator.tasks.continuous_migration',
+                    value=queue_length - len(raw_records),
+                    lag=get_lag_from_marcxml(raw_records[-1]),
+                    migrated=len(raw_records),
+                )
         finally:
             lock.release()
     else:
         LOGGER.info("Continuous_migration already executed. Skipping.")
 
 
+def get_lag_from_marcxml(raw_record):
+    """Return the seconds elapsed since the last modification of a record on legacy.
+
+    The date of the last modification is taken from the ``005`` tag, which is
+    in the local time of legacy, hence the lag is only accurate when it is
+    the same as the local time.
+    """
+    match = re_last_modification.search(raw_record)
+    if not match:
+        return None
+
+    last_modification = datetime.strptime(match.group('date'), '%Y%m%d%H%M%S')
+    return (datetime.now() - last_modification).total_seconds()
+
+
+def migrate_and_insert_records(raw_records, skip_files=False):
+    """Migrate many records with a single commit and a single bulk index request.
+
+    The records with modified references get their cited records reindexed
+    as if they were indexed by ``index_after_commit``.
+    """
+    models_committed.disconnect(index_after_commit)
+    try:
+        records = []
+        for raw_record in raw_records:
+            with db.session.begin_nested():
+                record = migrate_and_insert_record(raw_record, skip_files=skip_files)
+            if record:
+                records.append(record)
+        db.session.commit()
+    finally:
+        models_committed.connect(index_after_commit)
+
+    # The same record may be migrated more than once in a batch.
+    records = list(OrderedDict((migrated.id, migrated) for migrated in records).values())
+    records_to_index = [migrated for migrated in records if not migrated.get('deleted')]
+    records_to_delete = [migrated for migrated in records if migrated.get('deleted')]
+
+    req_timeout = current_app.config['INDEXER_BULK_REQUEST_TIMEOUT']
+    es_bulk(
+        es,
+        chain(create_index_ops(records_to_index), map(_build_delete_op, records_to_delete)),
+        stats_only=True,
+        raise_on_error=False,
+        request_timeout=req_timeout,
+    )
+
+    for record in records:
+        index_modified_citations_from_record.delay(
+            get_pid_type_from_schema(record['$schema']),
+            record['control_number'],
+            record.model.version_id,
+        )
+
+
+def _build_delete_op(record):
+    index, doc_type = current_record_to_index(record)
+
+    return {
+        '_op_type': 'delete',
+        '_index': index,
+        '_type': doc_type,
+        '_id': str(record.id),
+    }
+
+
 @shared_task(ignore_result=False, queue='migrator')
 @disable_orcid_push
 def migrate_recids_from_mirror(prod_recids, skip_files=False):
@@ -270,6 +467,209 @@ def migrate_recids_from_mirror(prod_recids, skip_files=False):
     models_committed.connect(index_after_commit)
 
 
+@disable_orcid_push
+def migrate_recids_from_mirror_in_pipeline(prod_recids, processes, skip_files=False):
+    """Migrate records from the mirror in three stages.
+
+    #. Chunks of mirror records are decompressed, converted to JSON and
+       validated in a pool of ``processes`` worker processes.
+
+    #. The new records of every converted chunk are inserted together in
+       ``records_metadata`` and in the pidstore, without validating them
+       again, and their mirror records are marked as valid together.
+
+    #. The records of the chunk are indexed with a single bulk request.
+
+    The records which can't be converted or validated, which already exist,
+    which are deleted or which have files to download go through
+    ``migrate_record_from_mirror`` instead, so that they are handled and
+    their errors are logged in the same way as by ``migrate_recids_from_mirror``.
+
+    Args:
+        prod_recids(List[int]): the recids of the records to migrate.
+        processes(int): the number of worker processes.
+        skip_files(bool): flag indicating whether the files in the record
+            metadata should be copied over from legacy and attach to the
+            record.
+    """
+    models_committed.disconnect(index_after_commit)
+    pool = Pool(processes)
+
+    try:
+        pending = deque()
+        migrated = 0
+        for chunk in chunker(prod_recids, CHUNK_SIZE):
+            raw_records = [
+                (recid, marcxml) for recid, marcxml in LegacyRecordsMirror.query.with_entities(
+                    LegacyRecordsMirror.recid,
+                    LegacyRecordsMirror._marcxml,
+                ).filter(LegacyRecordsMirror.recid.in_(chunk))
+            ]
+            pending.append(pool.apply_async(convert_mirror_records, (raw_records,)))
+
+            # Keep the workers busy while the converted chunks are written.
+            while len(pending) > 2 * processes:
+                migrated += _insert_converted_records(pending.popleft().get(), skip_files)
+                print("Migrated {} records".format(migrated))
+
+        while pending:
+            migrated += _insert_converted_records(pending.popleft().get(), skip_files)
+            print("Migrated {} records".format(migrated))
+
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        models_committed.connect(index_after_commit)
+
+
+def convert_mirror_records(raw_records):
+    """Convert and validate mirror records.
+
+    Runs in a worker process, outside of the application context.
+
+    Args:
+        raw_records(List[Tuple[int, bytes]]): the recid and the compressed
+            MARCXML of every record.
+
+    Returns:
+        List[Tuple[int, dict]]: the recid and the converted record, which is
+        ``None`` if the conversion or the validation failed.
+    """
+    converted = []
+    for recid, marcxml in raw_records:
+        try:
+            marcxml = zlib.decompress(marcxml)
+        except zlib.error:
+            # Legacy uncompressed data
+            pass
+
+        try:
+            json_record = strip_empty_values(marcxml2record(marcxml))
+            validate(json_record)
+        except Exception:
+            json_record = None
+
+        converted.append((recid, json_record))
+
+    return converted
+
+
+def _insert_converted_records(converted_records, skip_files):
+    to_insert = []
+    to_migrate_one_by_one = []
+    for recid, json_record in converted_records:
+        if (
+            json_record is None or
+            json_record.get('deleted') or
+            (not skip_files and (json_record.get('documents') or json_record.get('figures')))
+        ):
+            to_migrate_one_by_one.append(recid)
+        else:
+            ensure_valid_schema(json_record)
+            to_insert.append((recid, json_record))
+
+    existing_pids = set()
+    if to_insert:
+        existing_pids = set(
+            db.session.query(
+                PersistentIdentifier.pid_type,
+                PersistentIdentifier.pid_value,
+            ).filter(tuple_(
+                PersistentIdentifier.pid_type,
+                PersistentIdentifier.pid_value,
+            ).in_([_get_pid(json_record) for _, json_record in to_insert]))
+        )
+
+    new_records = []
+    for recid, json_record in to_insert:
+        if _get_pid(json_record) in existing_pids:
+            to_migrate_one_by_one.append(recid)
+        else:
+            new_records.append((recid, json_record))
+
+    records = []
+    if new_records:
+        try:
+            with db.session.begin_nested():
+                records = _create_records([json_record for _, json_record in new_records])
+                LegacyRecordsMirror.query.filter(
+                    LegacyRecordsMirror.recid.in_([recid for recid, _ in new_records])
+                ).update({
+                    LegacyRecordsMirror.valid: True,
+                    LegacyRecordsMirror.last_updated: datetime.utcnow(),
+                }, synchronize_session=False)
+        except Exception:
+            LOGGER.exception('Migrator Bulk Insert Error')
+            records = []
+            to_migrate_one_by_one.extend(recid for recid, _ in new_records)
+
+    for recid in to_migrate_one_by_one:
+        with db.session.begin_nested():
+            record = migrate_record_from_mirror(
+                LegacyRecordsMirror.query.get(recid),
+                skip_files=skip_files,
+            )
+            if record and not record.get('deleted'):
+                records.append(record)
+    db.session.commit()
+
+    req_timeout = current_app.config['INDEXER_BULK_REQUEST_TIMEOUT']
+    es_bulk(
+        es,
+        create_index_ops(records),
+        stats_only=True,
+        request_timeout=req_timeout,
+    )
+
+    return len(converted_records)
+
+
+def _get_pid(json_record):
+    return get_pid_type_from_schema(json_record['$schema']), str(json_record['control_number'])
+
+
+def _create_records(json_records):
+    """Insert new already validated records with their pids in one flush.
+
+    Like ``InspireRecord.create``, the ``before_record_insert`` signal is
+    sent for every record and its recid is added to the ``RecordIdentifier``
+    sequence.
+    """
+    records = []
+    for json_record in json_records:
+        record = InspireRecord(json_record)
+        before_record_insert.send(current_app._get_current_object(), record=record)
+
+        pid_type, pid_value = _get_pid(record)
+        record.model = RecordMetadata(id=uuid.uuid4(), json=record)
+        if record.get('legacy_creation_date'):
+            record.model.created = datetime.strptime(record['legacy_creation_date'], '%Y-%m-%d')
+
+        db.session.add(record.model)
+        db.session.add(PersistentIdentifier(
+            pid_type=pid_type,
+            pid_value=pid_value,
+            object_type='rec',
+            object_uuid=record.model.id,
+            status=PIDStatus.REGISTERED,
+        ))
+        records.append(record)
+
+    if records:
+        recid_sequence = RecordIdentifier.__table__
+        db.session.execute(
+            insert(recid_sequence).values([
+                {'recid': int(created['control_number'])} for created in records
+            ]).on_conflict_do_nothing(index_elements=[recid_sequence.c.recid])
+        )
+    db.session.flush()
+
+    return records
+
+
 def _build_recid_to_uuid_map(citations_lookup):
     numeric_pid_types = get_pid_types_from_endpoints()
     pids = PersistentIdentifier.query.filter(
@@ -284,10 +684,39 @@ def _build_recid_to_uuid_map(citations_lookup):
 
 
 def insert_into_mirror(raw_records):
+    db.session.execute(_upsert_into_mirror_statement(raw_records))
+    db.session.commit()
+
+
+def _upsert_into_mirror_statement(raw_records):
+    """Build a single statement inserting or updating records in the mirror.
+
+    Like merging ``LegacyRecordsMirror.from_marcxml`` instances, an existing
+    record gets the new MARCXML and is marked as not migrated yet.
+    """
+    now = datetime.utcnow()
+    rows = {}
     for raw_record in raw_records:
         prod_record = LegacyRecordsMirror.from_marcxml(raw_record)
-        db.session.merge(prod_record)
-    db.session.commit()
+        # A statement can't update twice the same row, so the last one wins.
+        rows[prod_record.recid] = {
+            'recid': prod_record.recid,
+            'marcxml': prod_record._marcxml,
+            'valid': None,
+            'last_updated': now,
+            'collection': '',
+        }
+
+    mirror = LegacyRecordsMirror.__table__
+    statement = insert(mirror).values(list(rows.values()))
+    return statement.on_conflict_do_update(
+        index_elements=[mirror.c.recid],
+        set_={
+            'marcxml': statement.excluded.marcxml,
+            'valid': None,
+            'last_updated': statement.excluded.last_updated,
+        },
+    )
 
 
 def migrate_and_insert_record(raw_record, skip_files=False):
@@ -48,7 +48,8 @@ from sqlalchemy.sql.functions import GenericFunction
 
 from inspirehep.modules.pidstore.minters import inspire_recid_minter
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema, get_endpoint_from_pid_type
-from inspirehep.modules.records.utils import get_pid_from_record_uri, populate_earliest_date
+from inspirehep.modules.records.models import RecordCitations, RecordCitationsCount
+from inspirehep.modules.records.utils import get_pids_from_references, populate_earliest_date
 from inspirehep.utils.record_getter import (
     RecordGetterError,
     get_es_record_by_uuid
@@ -640,10 +641,19 @@ class InspireRecord(Record):
         return self._query_citing_records()
 
     def get_citations_count(self, show_duplicates=False):
-        """Returns citations count for this record."""
+        """Returns citations count for this record.
 
-        count = self._query_citing_records(show_duplicates).count()
-        return count
+        The count is read from the ``records_citations_count`` table, which is
+        kept up to date whenever a citing record is written to the DB, so it
+        doesn't need to scan the references of all records.
+        """
+        pid_type = get_pid_type_from_schema(self.get('$schema'))
+        pid_value = self.get('control_number')
+
+        if show_duplicates:
+            return RecordCitations.count(pid_type, pid_value)
+
+        return RecordCitationsCount.get(pid_type, pid_value)
 
     def dumps(self):
         """Returns a dict 'representation' of the record.
@@ -681,13 +691,6 @@ class InspireRecord(Record):
             Set[Tuple[str, int]]: pids of references changed from the previous
             version.
         """
-        def _get_ids_from_refs(references):
-            return set([
-                get_pid_from_record_uri(ref['record']['$ref'])
-                for ref in references
-                if 'record' in ref
-            ])
-
         try:
             prev_version = self.model.versions.filter_by(
                 version_id=self.model.version_id).one().previous.json
@@ -697,10 +700,10 @@ class InspireRecord(Record):
         changed_deleted_status = self.get('deleted', False) ^ prev_version.get('deleted', False)
 
         if changed_deleted_status:
-            return _get_ids_from_refs(self.get('references', []))
+            return get_pids_from_references(self.get('references', []))
 
-        ids_latest = _get_ids_from_refs(self.get('references', []))
-        ids_oldest = _get_ids_from_refs(prev_version.get('references', []))
+        ids_latest = get_pids_from_references(self.get('references', []))
+        ids_oldest = get_pids_from_references(prev_version.get('references', []))
 
         return set.symmetric_difference(ids_latest, ids_oldest)
 
@@ -22,8 +22,6 @@
 
 from __future__ import absolute_import, division, print_function
 
-from time import sleep
-
 import click
 import click_spinner
 import csv
@@ -31,13 +29,13 @@ import json
 import pprint
 
 from os import path, makedirs
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from multiprocessing.pool import mapstar, RUN, ThreadPool, IMapUnorderedIterator, Pool
 
 from invenio_db import db
 from invenio_files_rest.models import ObjectVersion
-from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_pidstore.models import PersistentIdentifier
 from flask import current_app
 from flask.cli import with_appcontext
 from invenio_records_files.models import RecordsBuckets
@@ -51,7 +49,12 @@ from inspirehep.utils.record_getter import (
     RecordGetterError,
 )
 from inspirehep.modules.records.checkers import check_unlinked_references
-from inspirehep.modules.records.tasks import batch_reindex
+from inspirehep.modules.records.identifiers import IdentifiersIndex
+from inspirehep.modules.records.indexing_queue import CitationsReindexQueue
+from inspirehep.modules.records.reindex import (  # noqa: F401
+    Reindexer,
+    get_query_records_to_index,
+)
 
 from invenio_records.models import RecordMetadata
 from inspirehep.modules.search.api import LiteratureSearch
@@ -95,42 +98,47 @@ def unlinked_references(doi_file_name, arxiv_file_name):
         arxiv_file_name.write(u'{i[0]}: {i[1]}\n'.format(i=item))
 
 
-def next_batch(iterator, batch_size):
-    """Get first batch_size elements from the iterable, or remaining if less.
+@click.group()
+def citations_reindex_queue():
+    """Commands to inspect the queue of records with modified citations."""
 
-    :param iterator: the iterator for the iterable
-    :param batch_size: size of the requested batch
-    :return: batch (list)
-    """
-    batch = []
 
-    try:
-        for idx in range(batch_size):
-            batch.append(next(iterator))
-    except StopIteration:
-        pass
+@citations_reindex_queue.command()
+@click.option('--reset', is_flag=True, default=False,
+              help='Reset the counters after printing them.')
+@with_appcontext
+def stats(reset):
+    """Print the counters of the queue."""
+    queue = CitationsReindexQueue()
+    stats = queue.stats()
+    click.echo(
+        'requested: {requested}\ncollapsed: {collapsed}\nflushed: {flushed}\n'
+        'requeued: {requeued}\nflushes: {flushes}\npending: {pending}'.format(**stats)
+    )
 
-    return batch
+    if reset:
+        queue.reset_stats()
 
 
-def get_query_records_to_index(pid_types):
-    """Return a query for retrieving all records by pid_type.
+@click.group()
+def identifiers():
+    """Commands to manage the index of the records by their identifiers"""
 
-    Args:
-        pid_types(List[str]): a list of pid types
 
-    Return:
-        SQLAlchemy query for non deleted record with pid type in `pid_types`
+@identifiers.command()
+@click.option('-s', '--chunk-size', default=1000)
+@with_appcontext
+def load(chunk_size):
+    """Load the identifiers of all the Literature records from the DB.
+
+    Until the index is loaded, references are matched with ES only. Once
+    loaded, it is kept up to date on every commit of a record.
     """
-    query = (
-        db.session.query(PersistentIdentifier.object_uuid).filter(
-            PersistentIdentifier.pid_type.in_(pid_types),
-            PersistentIdentifier.object_type == 'rec',
-            PersistentIdentifier.status == PIDStatus.REGISTERED,
-            # noqa: F401
-        )
-    )
-    return query
+    with click_spinner.spinner():
+        click.echo('Loading the identifiers of the records...')
+        count = IdentifiersIndex().load(chunk_size=chunk_size)
+
+    click.secho('Loaded the identifiers of {} records.'.format(count), fg='green')
 
 
 def _dump_errors_to_file(errors, log_file_path, tasks_uuids, msg='Check errors in log file'):
@@ -166,26 +174,48 @@ def _dump_errors_to_file(errors, log_file_path, tasks_uuids, msg='Check errors i
         click.secho('{}: {}'.format(msg, log_file_path))
 
 
+def _format_reindex_progress(reindexer):
+    eta = reindexer.eta
+    return '{:.1f} records/s, ETA {}'.format(
+        reindexer.throughput,
+        timedelta(seconds=int(eta)) if eta is not None else '-',
+    )
+
+
 @click.command()
 @click.option('--yes-i-know', is_flag=True)
 @click.option('-t', '--pid-type', multiple=True, required=True)
 @click.option('-s', '--batch-size', default=200)
 @click.option('-q', '--queue-name', default='indexer_task')
 @click.option('-l', '--log-path', default='/tmp/inspire/')
+@click.option('-j', '--job-id', default=None)
+@click.option('-p', '--max-pending-batches', default=50)
+@click.option('--new-index', is_flag=True)
 @with_appcontext
-def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path):
+def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path,
+                job_id, max_pending_batches, new_index):
     """Bulk reindex all records in a parallel manner.
 
     Indexes in batches all articles belonging to the given pid_types.
     Indexing errors are saved in the log_path folder.
 
+    The progress of the job is checkpointed, so an interrupted job can be
+    resumed by running the command again with its ``job_id``.
+
     Args:
         yes_i_know (bool): if True, skip confirmation screen
         pid_type (List[str]): array of PID types, allowed: lit, con, exp, jou,
             aut, job, ins
         batch_size (int): number of documents per batch sent to workers.
-        queue_name (str): name of the celery queue
+        queue_name (str): name of the celery queue, which may contain
+            ``{pid_type}`` to route each pid type to its own queue.
         log_path (str): path of the indexing logs
+        job_id (str): id of the job to resume, a new job is started if not
+            passed.
+        max_pending_batches (int): maximum number of batches sent to the
+            workers and not yet finished.
+        new_index (bool): if True, index into new indices, which replace the
+            current ones once all records are indexed.
 
     Returns:
         None
@@ -196,69 +226,41 @@ def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path):
             abort=True,
         )
 
-    click.secho('Sending record UUIDs to the indexing queue...', fg='green')
-
-    query = get_query_records_to_index(pid_type)
-
-    request_timeout = current_app.config.get('INDEXER_BULK_REQUEST_TIMEOUT')
-    all_tasks = []
-    uuid_records_per_tasks = {}
-
-    with click.progressbar(
-        query.yield_per(2000),
-        length=query.count(),
-        label='Scheduling indexing tasks'
-    ) as items:
-        batch = next_batch(items, batch_size)
-
-        while batch:
-            uuids = [str(item[0]) for item in batch]
-            indexer_task = batch_reindex.apply_async(
-                kwargs={
-                    'uuids': uuids,
-                    'request_timeout': request_timeout,
-                },
-                queue=queue_name,
-            )
-
-            uuid_records_per_tasks[indexer_task.id] = uuids
-            all_tasks.append(indexer_task)
-            batch = next_batch(items, batch_size)
+    job_id = job_id or datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    reindexer = Reindexer(
+        job_id,
+        pid_type,
+        batch_size=batch_size,
+        queue_name=queue_name,
+        request_timeout=current_app.config.get('INDEXER_BULK_REQUEST_TIMEOUT'),
+        max_pending_batches=max_pending_batches,
+        new_index=new_index,
+    )
 
-    click.secho('Created {} tasks.'.format(len(all_tasks)), fg='green')
+    click.secho(
+        'Reindex job {0}, resume it with --job-id {0} if interrupted.'.format(job_id),
+        fg='green',
+    )
+    click.secho('Sending record UUIDs to the indexing queue...', fg='green')
 
     with click.progressbar(
-        length=len(all_tasks),
-        label='Indexing records'
+        length=reindexer.total or 1,
+        label='Indexing records',
+        item_show_func=lambda _: _format_reindex_progress(reindexer),
     ) as progressbar:
-        def _finished_tasks_count():
-            return len(filter(lambda task: task.ready(), all_tasks))
-
-        while len(all_tasks) != _finished_tasks_count():
-            sleep(0.5)
-            # this is so click doesn't divide by 0:
-            progressbar.pos = _finished_tasks_count() or 1
+        def _update_progressbar(reindexer):
+            progressbar.pos = min(reindexer.processed, reindexer.total)
             progressbar.update(0)
 
-    failures = []
-    successes = 0
-    batch_errors = []
-
-    for task in all_tasks:
-        result = task.result
-        if task.failed():
-            batch_errors.append({
-                'task_id': task.id,
-                'error': result,
-            })
-        else:
-            successes += result['success']
-            failures += result['failures']
+        reindexer.run(on_progress=_update_progressbar)
+
+    failures = reindexer.failures
+    batch_errors = reindexer.batch_errors
 
     color = 'red' if failures or batch_errors else 'green'
     click.secho(
         'Reindexing finished: {} failed, {} succeeded, additionally {} batches errored.'.format(
-            len(failures), successes, len(batch_errors),
+            len(failures), reindexer.succeeded_in_run, len(batch_errors),
         ),
         fg=color,
     )
@@ -266,8 +268,8 @@ def simpleindex(yes_i_know, pid_type, batch_size, queue_name, log_path):
     failures_log_path = path.join(log_path, 'records_index_failures.log')
     errors_log_path = path.join(log_path, 'records_index_errors.log')
 
-    _dump_errors_to_file(failures, failures_log_path, uuid_records_per_tasks, msg='Failed index tasks')
-    _dump_errors_to_file(batch_errors, errors_log_path, uuid_records_per_tasks, msg='Failed batches')
+    _dump_errors_to_file(failures, failures_log_path, reindexer.uuids_per_task, msg='Failed index tasks')
+    _dump_errors_to_file(batch_errors, errors_log_path, reindexer.uuids_per_task, msg='Failed batches')
 
 
 @click.command()
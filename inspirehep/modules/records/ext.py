@@ -24,7 +24,13 @@
 
 from __future__ import absolute_import, division, print_function
 
-from .cli import check, simpleindex, handle_duplicates
+from .cli import (
+    check,
+    citations_reindex_queue,
+    handle_duplicates,
+    identifiers,
+    simpleindex,
+)
 
 
 class InspireRecords(object):
@@ -36,6 +42,8 @@ class InspireRecords(object):
         app.cli.add_command(check)
         app.cli.add_command(simpleindex)
         app.cli.add_command(handle_duplicates)
+        app.cli.add_command(identifiers)
+        app.cli.add_command(citations_reindex_queue)
         app.extensions['inspire-records'] = self
 
         # Register the receivers:
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Index of the Literature records by their unique identifiers."""
+
+from __future__ import absolute_import, division, print_function
+
+import re
+
+from flask import current_app
+from redis import StrictRedis
+
+from invenio_records.models import RecordMetadata
+
+from inspire_utils.helpers import force_list
+from inspire_utils.record import get_value
+
+
+def normalize_report_number(report_number):
+    """Normalize a report number as the ``report_number`` analyzer of ES."""
+    return re.sub(r'[^A-Za-z0-9]', '', report_number).lower()
+
+
+def normalize_lowercase(value):
+    """Normalize an identifier as the ``lowercase_normalizer`` of ES."""
+    return value.lower()
+
+
+IDENTIFIERS = [
+    # (kind, path in the record, path in the reference, normalizer)
+    ('arxiv_eprint', 'arxiv_eprints.value', 'reference.arxiv_eprint', normalize_lowercase),
+    ('doi', 'dois.value', 'reference.dois', normalize_lowercase),
+    ('isbn', 'isbns.value', 'reference.isbn', normalize_lowercase),
+    ('report_number', 'report_numbers.value', 'reference.report_numbers', normalize_report_number),
+    ('texkey', 'texkeys', 'reference.texkey', None),
+]
+"""The identifiers of ``REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG``."""
+
+RECORD_FIELDS = ['control_number', '_collections', 'deleted', 'arxiv_eprints',
+                 'dois', 'isbns', 'report_numbers', 'texkeys']
+"""The fields of a record needed to get its identifiers."""
+
+
+def _get_identifiers(obj, path_index):
+    identifiers = set()
+    for identifier in IDENTIFIERS:
+        kind, normalize = identifier[0], identifier[3]
+        for value in force_list(get_value(obj, identifier[path_index], [])):
+            if value:
+                value = normalize(value) if normalize else value
+                identifiers.add(u'{}:{}'.format(kind, value))
+    return identifiers
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+class IdentifiersIndex(object):
+    """Literature records keyed by their unique identifiers.
+
+    For each identifier, such as a DOI or an arXiv eprint, a Redis set holds
+    the record ids of the records that have it, so that a reference can be
+    matched without asking Elasticsearch. For each record, another set holds
+    its identifiers, so that only the changed ones are touched on update.
+
+    The index is loaded from the DB once with :meth:`load`, after which it
+    is kept up to date on each commit of a record.
+    """
+
+    KEY_PREFIX = 'records:identifiers'
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = StrictRedis.from_url(current_app.config['CACHE_REDIS_URL'])
+        return self._redis
+
+    def _key(self, *names):
+        return u':'.join((self.KEY_PREFIX,) + names)
+
+    @staticmethod
+    def get_record_identifiers(record):
+        """Return the identifiers of a record.
+
+        Only the Literature records that are not deleted have identifiers,
+        as only those are matched by ``REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG``.
+
+        Returns:
+            set: the identifiers, as ``kind:value``.
+        """
+        if 'Literature' not in record.get('_collections', []) or record.get('deleted'):
+            return set()
+        return _get_identifiers(record, 1)
+
+    @staticmethod
+    def get_reference_identifiers(reference):
+        """Return the identifiers of a reference.
+
+        Returns:
+            set: the identifiers, as ``kind:value``.
+        """
+        return _get_identifiers(reference, 2)
+
+    def is_loaded(self):
+        """Whether the index was loaded from the DB."""
+        return bool(self.redis.exists(self._key('loaded')))
+
+    def unload(self):
+        """Mark the index as not loaded, e.g. because an update was lost.
+
+        References are then matched with Elasticsearch until the index is
+        loaded again with :meth:`load`.
+        """
+        self.redis.delete(self._key('loaded'))
+
+    def update(self, records):
+        """Replace the identifiers of some records with their current ones.
+
+        Args:
+            records (List[Tuple[int, dict]]): the record id and the metadata
+                of each record. A record that has no identifiers, e.g.
+                because it was deleted, is removed from the index.
+        """
+        if not records:
+            return
+
+        pipeline = self.redis.pipeline()
+        for recid, _ in records:
+            pipeline.smembers(self._key('recid', str(recid)))
+        previous_identifiers = pipeline.execute()
+
+        pipeline = self.redis.pipeline()
+        for (recid, record), previous in zip(records, previous_identifiers):
+            previous = set(_decode(identifier) for identifier in previous)
+            identifiers = self.get_record_identifiers(record)
+            if identifiers == previous:
+                continue
+
+            for identifier in previous - identifiers:
+                pipeline.srem(self._key('id', identifier), recid)
+            for identifier in identifiers - previous:
+                pipeline.sadd(self._key('id', identifier), recid)
+            pipeline.delete(self._key('recid', str(recid)))
+            if identifiers:
+                pipeline.sadd(self._key('recid', str(recid)), *identifiers)
+        pipeline.execute()
+
+    def get_recids(self, references):
+        """Return the records that share an identifier with each reference.
+
+        Args:
+            references (list): the references to look up.
+
+        Returns:
+            list: the sorted record ids found for each reference.
+        """
+        identifiers_by_reference = [
+            sorted(self.get_reference_identifiers(reference)) for reference in references
+        ]
+
+        pipeline = self.redis.pipeline()
+        for identifiers in identifiers_by_reference:
+            for identifier in identifiers:
+                pipeline.smembers(self._key('id', identifier))
+        results = iter(pipeline.execute())
+
+        recids_by_reference = []
+        for identifiers in identifiers_by_reference:
+            recids = set()
+            for _ in identifiers:
+                recids.update(int(recid) for recid in next(results))
+            recids_by_reference.append(sorted(recids))
+
+        return recids_by_reference
+
+    def load(self, chunk_size=1000):
+        """Index all the Literature records of the DB.
+
+        Only the fields holding identifiers are fetched from the DB.
+
+        Args:
+            chunk_size (int): number of records indexed per Redis round trip.
+
+        Returns:
+            int: the number of records read from the DB.
+        """
+        query = RecordMetadata.query.with_entities(
+            *[RecordMetadata.json[field] for field in RECORD_FIELDS]
+        ).filter(
+            RecordMetadata.json['control_number'] != None  # noqa: E711
+        ).yield_per(chunk_size)
+
+        count, chunk = 0, []
+        for row in query:
+            record = {field: value for field, value in zip(RECORD_FIELDS, row) if value is not None}
+            chunk.append((record['control_number'], record))
+            if len(chunk) == chunk_size:
+                self.update(chunk)
+                count, chunk = count + len(chunk), []
+        self.update(chunk)
+        count += len(chunk)
+
+        self.redis.set(self._key('loaded'), 1)
+        return count
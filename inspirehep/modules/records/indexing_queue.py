@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Coalescing queue of records to reindex."""
+
+from __future__ import absolute_import, division, print_function
+
+from flask import current_app
+from redis import StrictRedis
+
+
+class CitationsReindexQueue(object):
+    """Records to reindex because the records citing them changed.
+
+    The uuids of the records are kept in a Redis set, so that a record
+    requested many times before the queue is flushed is reindexed only once.
+    The first push after a flush tells the caller to schedule the next flush,
+    which pops all the pending uuids at once.
+
+    Counters of the requested, collapsed and flushed records are kept in
+    Redis as well, see :meth:`stats`.
+    """
+
+    KEY_PREFIX = 'records:citations_reindex'
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = StrictRedis.from_url(current_app.config['CACHE_REDIS_URL'])
+        return self._redis
+
+    def _key(self, name):
+        return '{}:{}'.format(self.KEY_PREFIX, name)
+
+    def push(self, uuids, window):
+        """Add records to the queue.
+
+        Args:
+            uuids (List[str]): the uuids of the records to reindex.
+            window (int): seconds after which the queue is flushed. The flag
+                marking the flush as scheduled expires after a few windows,
+                in case the flush never happens.
+
+        Returns:
+            bool: whether the caller has to schedule a flush of the queue.
+        """
+        if not uuids:
+            return False
+
+        pipeline = self.redis.pipeline()
+        pipeline.sadd(self._key('pending'), *uuids)
+        pipeline.set(self._key('flush_scheduled'), 1, nx=True, ex=window * 10)
+        added, flush_not_scheduled = pipeline.execute()
+
+        pipeline = self.redis.pipeline()
+        pipeline.hincrby(self._key('stats'), 'requested', len(uuids))
+        pipeline.hincrby(self._key('stats'), 'collapsed', len(uuids) - added)
+        pipeline.execute()
+
+        return bool(flush_not_scheduled)
+
+    def pop(self):
+        """Remove all the records from the queue.
+
+        Returns:
+            List[str]: the uuids of the records to reindex.
+        """
+        pipeline = self.redis.pipeline()
+        pipeline.delete(self._key('flush_scheduled'))
+        pipeline.smembers(self._key('pending'))
+        pipeline.delete(self._key('pending'))
+        _, uuids, _ = pipeline.execute()
+
+        pipeline = self.redis.pipeline()
+        pipeline.hincrby(self._key('stats'), 'flushed', len(uuids))
+        pipeline.hincrby(self._key('stats'), 'flushes', 1)
+        pipeline.execute()
+
+        return sorted(uuid.decode('utf-8') if isinstance(uuid, bytes) else uuid for uuid in uuids)
+
+    def requeue(self, uuids):
+        """Put back in the queue records whose flush failed.
+
+        Unlike :meth:`push`, the records are not counted as requested again.
+        They are taken off the ``flushed`` counter, as the next flush counts
+        them again, and counted as ``requeued``.
+
+        Args:
+            uuids (List[str]): the uuids of the records to reindex.
+        """
+        if not uuids:
+            return
+
+        pipeline = self.redis.pipeline()
+        pipeline.sadd(self._key('pending'), *uuids)
+        pipeline.hincrby(self._key('stats'), 'flushed', -len(uuids))
+        pipeline.hincrby(self._key('stats'), 'requeued', len(uuids))
+        pipeline.execute()
+
+    def stats(self):
+        """Return the counters of the queue.
+
+        Returns:
+            dict: the number of ``requested`` records, of ``collapsed``
+            requests for records already in the queue, of ``flushed`` records,
+            of ``requeued`` records whose flush failed and of ``flushes``, and
+            the number of ``pending`` records.
+        """
+        counters = self.redis.hgetall(self._key('stats'))
+        stats = {
+            name: int(counters.get(name, counters.get(name.encode('utf-8'), 0)))
+            for name in ('requested', 'collapsed', 'flushed', 'requeued', 'flushes')
+        }
+        stats['pending'] = self.redis.scard(self._key('pending'))
+
+        return stats
+
+    def reset_stats(self):
+        """Reset the counters of the queue."""
+        self.redis.delete(self._key('stats'))
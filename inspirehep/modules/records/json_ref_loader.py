@@ -24,8 +24,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+from collections import defaultdict
+
 from flask import current_app, url_for
 from jsonref import JsonLoader, JsonRef
+from six import iteritems, string_types
+from six.moves.urllib.parse import urldefrag
 from werkzeug.urls import url_parse
 
 import jsonresolver
@@ -33,8 +37,16 @@ from jsonresolver.contrib.jsonref import json_loader_factory
 
 from inspire_schemas.utils import load_schema
 from inspire_utils.urls import ensure_scheme
-from inspirehep.modules.pidstore.utils import get_pid_type_from_endpoint
+from inspirehep.modules.pidstore.utils import (
+    get_pid_type_from_endpoint,
+    get_pid_type_from_schema,
+)
 from inspirehep.utils import record_getter
+from inspirehep.utils.cache import LRUCache
+
+
+_caches = []
+"""Caches of all the loader classes, to invalidate records in all of them."""
 
 
 class AbstractRecordLoader(JsonLoader):
@@ -42,21 +54,74 @@ class AbstractRecordLoader(JsonLoader):
 
     Resolves the refered resource by the given uri by first checking against
     local resources.
+
+    The local records are kept in a cache shared by all the loaders of the
+    same class, of size ``RECORDS_JSON_REF_CACHE_SIZE`` and with expiration
+    time ``RECORDS_JSON_REF_CACHE_TTL``, from which they are removed as soon
+    as they are updated in this process. The records in the cache must not
+    be modified.
     """
 
+    _cache = None
+
+    def __init__(self, store=()):
+        # ``jsonref`` caching would keep every loaded record forever.
+        super(AbstractRecordLoader, self).__init__(store=store, cache_results=False)
+
+    @classmethod
+    def get_cache(cls):
+        if cls.__dict__.get('_cache') is None:
+            cls._cache = LRUCache(
+                maxsize=current_app.config['RECORDS_JSON_REF_CACHE_SIZE'],
+                ttl=current_app.config['RECORDS_JSON_REF_CACHE_TTL'],
+            )
+            _caches.append(cls._cache)
+        return cls._cache
+
     def get_record(self, pid_type, recid):
         raise NotImplementedError()
 
-    def get_remote_json(self, uri, **kwargs):
+    def get_records(self, pids):
+        """Get many records at once.
+
+        Args:
+            pids (List[Tuple[str, str]]): the pid type and recid of the records.
+
+        Returns:
+            dict: the records found, keyed by (pid_type, recid).
+        """
+        return {
+            (pid_type, recid): self.get_record(pid_type, recid)
+            for pid_type, recid in pids
+        }
+
+    def get_cached_record(self, pid_type, recid):
+        cache = self.get_cache()
+        key = (pid_type, str(recid))
+
+        record = cache.get(key)
+        if record is None:
+            record = self.get_record(pid_type, recid)
+            if record is not None:
+                record = dict(record)
+                cache.set(key, record)
+
+        return record
+
+    def is_local_uri(self, uri):
         parsed_uri = url_parse(uri)
         # Add http:// protocol so uri.netloc is correctly parsed.
         server_name = current_app.config.get('SERVER_NAME')
         parsed_server = url_parse(ensure_scheme(server_name))
 
-        if parsed_uri.netloc and parsed_uri.netloc != parsed_server.netloc:
-            return super(AbstractRecordLoader, self).get_remote_json(uri,
-                                                                     **kwargs)
-        path_parts = parsed_uri.path.strip('/').split('/')
+        return not parsed_uri.netloc or parsed_uri.netloc == parsed_server.netloc
+
+    def parse_local_uri(self, uri):
+        """Return the (pid_type, recid) of a local record uri.
+
+        Returns ``None`` if the uri is not a record uri.
+        """
+        path_parts = url_parse(uri).path.strip('/').split('/')
         if len(path_parts) < 2:
             current_app.logger.error('Bad JSONref URI: {0}'.format(uri))
             return None
@@ -64,8 +129,51 @@ class AbstractRecordLoader(JsonLoader):
         endpoint = path_parts[-2]
         pid_type = get_pid_type_from_endpoint(endpoint)
         recid = path_parts[-1]
-        res = self.get_record(pid_type, recid)
-        return res
+        return pid_type, recid
+
+    def get_remote_json(self, uri, **kwargs):
+        if not self.is_local_uri(uri):
+            return super(AbstractRecordLoader, self).get_remote_json(uri,
+                                                                     **kwargs)
+        pid = self.parse_local_uri(uri)
+        if pid is None:
+            return None
+
+        return self.get_cached_record(*pid)
+
+    def prefetch(self, obj):
+        """Load at once all the local records referenced in ``obj``.
+
+        The records are added to the cache and to the store of this loader,
+        so that resolving the references of ``obj`` doesn't load any record.
+        """
+        cache = self.get_cache()
+        pids_by_uri = {}
+        for uri in _get_refs_uris(obj):
+            if uri in self.store or not self.is_local_uri(uri):
+                continue
+            pid = self.parse_local_uri(uri)
+            if pid is not None:
+                pids_by_uri[uri] = (pid[0], str(pid[1]))
+
+        records = {}
+        missing = set()
+        for pid in set(pids_by_uri.values()):
+            record = cache.get(pid)
+            if record is None:
+                missing.add(pid)
+            else:
+                records[pid] = record
+
+        for pid, record in iteritems(self.get_records(list(missing))):
+            if record is not None:
+                record = dict(record)
+                cache.set(pid, record)
+                records[pid] = record
+
+        for uri, pid in iteritems(pids_by_uri):
+            if pid in records:
+                self.store[uri] = records[pid]
 
 
 class ESJsonLoader(AbstractRecordLoader):
@@ -77,6 +185,18 @@ class ESJsonLoader(AbstractRecordLoader):
         except record_getter.RecordGetterError:
             return None
 
+    def get_records(self, pids):
+        recids_by_pid_type = defaultdict(list)
+        for pid_type, recid in pids:
+            recids_by_pid_type[pid_type].append(recid)
+
+        records = {}
+        for pid_type, recids in iteritems(recids_by_pid_type):
+            for record in record_getter.get_es_records(pid_type, recids):
+                records[(pid_type, str(record['control_number']))] = record
+
+        return records
+
 
 class DatabaseJsonLoader(AbstractRecordLoader):
 
@@ -86,6 +206,32 @@ class DatabaseJsonLoader(AbstractRecordLoader):
         except record_getter.RecordGetterError:
             return None
 
+    def get_records(self, pids):
+        return {
+            (get_pid_type_from_schema(record['$schema']), str(record['control_number'])): record
+            for record in record_getter.get_db_records(pids)
+        }
+
+
+def _get_refs_uris(obj):
+    if isinstance(obj, dict):
+        ref = obj.get('$ref')
+        if isinstance(ref, string_types):
+            yield urldefrag(ref)[0]
+        for value in obj.values():
+            for uri in _get_refs_uris(value):
+                yield uri
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            for uri in _get_refs_uris(value):
+                yield uri
+
+
+def invalidate_cached_record(pid_type, recid):
+    """Remove a record from the caches of all the loaders."""
+    for cache in _caches:
+        cache.pop((pid_type, str(recid)))
+
 
 es_record_loader = ESJsonLoader()
 db_record_loader = DatabaseJsonLoader()
@@ -118,7 +264,7 @@ def load_resolved_schema(name):
     )
 
 
-def replace_refs(obj, source='db'):
+def replace_refs(obj, source='db', prefetch=False):
     """Replaces record refs in obj by bypassing HTTP requests.
 
     Any reference URI that comes from the same server and references a resource
@@ -131,6 +277,10 @@ def replace_refs(obj, source='db'):
             * 'db' - resolve from Database
             * 'es' - resolve from Elasticsearch
             * 'http' - force using HTTP
+    :param prefetch:
+        If ``True``, all the records referenced in obj which are not cached
+        are loaded at once, with a query per source (and per pid type for
+        Elasticsearch), instead of one by one.
 
     :returns:
         The same obj structure with the '$ref' fields replaced with the object
@@ -145,4 +295,8 @@ def replace_refs(obj, source='db'):
         raise ValueError('source must be one of {}'.format(loaders.keys()))
 
     loader = loaders[source]
+    if prefetch and loader is not None:
+        loader = type(loader)()
+        loader.prefetch(obj)
+
     return JsonRef.replace_refs(obj, loader=loader, load_on_repr=False)
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Extra models for records."""
+
+from __future__ import absolute_import, division, print_function
+
+from collections import defaultdict
+from datetime import datetime
+
+from six import iteritems
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy_utils.types import UUIDType
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+
+from .utils import (
+    get_authors_recids_and_names,
+    get_pids_from_references,
+    is_citing_record,
+    is_literature_record,
+)
+
+
+class RecordCitations(db.Model):
+    """Citations from a citing record to the pids of the records it cites."""
+
+    __tablename__ = 'records_citations'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('citer_id', 'cited_pid_type', 'cited_pid_value'),
+        db.Index('ix_records_citations_cited', 'cited_pid_type', 'cited_pid_value'),
+    )
+
+    citer_id = db.Column(
+        UUIDType,
+        db.ForeignKey('records_metadata.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    citer_recid = db.Column(db.Integer, nullable=False)
+    cited_pid_type = db.Column(db.String(6), nullable=False)
+    cited_pid_value = db.Column(db.String(255), nullable=False)
+
+    @classmethod
+    def count(cls, pid_type, pid_value):
+        """Return the number of citing records, including duplicates."""
+        return cls.query.filter_by(
+            cited_pid_type=pid_type,
+            cited_pid_value=str(pid_value),
+        ).count()
+
+
+class RecordCitationsCount(db.Model):
+    """Cached number of distinct citing records of a pid."""
+
+    __tablename__ = 'records_citations_count'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('pid_type', 'pid_value'),
+    )
+
+    pid_type = db.Column(db.String(6), nullable=False)
+    pid_value = db.Column(db.String(255), nullable=False)
+    citation_count = db.Column(db.Integer, default=0, nullable=False)
+
+    @classmethod
+    def get(cls, pid_type, pid_value):
+        """Return the citation count of a pid, ``0`` if it was never cited."""
+        citation_count = db.session.query(cls.citation_count).filter_by(
+            pid_type=pid_type,
+            pid_value=str(pid_value),
+        ).scalar()
+
+        return citation_count or 0
+
+    @classmethod
+    def get_many(cls, pids):
+        """Return the citation counts of many pids with a single query.
+
+        Args:
+            pids (Iterable[Tuple[str, Union[str, int]]]): a list of
+                (pid_type, pid_value) tuples.
+
+        Returns:
+            dict: the citation count of each pid, keyed by (pid_type, pid_value).
+            Pids that were never cited are not included.
+        """
+        pids = [(pid_type, str(pid_value)) for (pid_type, pid_value) in pids]
+        if not pids:
+            return {}
+
+        query = db.session.query(
+            cls.pid_type,
+            cls.pid_value,
+            cls.citation_count,
+        ).filter(tuple_(cls.pid_type, cls.pid_value).in_(pids))
+
+        return {
+            (pid_type, pid_value): citation_count
+            for pid_type, pid_value, citation_count in query
+        }
+
+
+class RecordAuthors(db.Model):
+    """Authors with a record who signed a Literature record."""
+
+    __tablename__ = 'records_authors'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('author_recid', 'literature_id'),
+        db.Index('ix_records_authors_literature_id', 'literature_id'),
+    )
+
+    author_recid = db.Column(db.Integer, nullable=False)
+    literature_id = db.Column(
+        UUIDType,
+        db.ForeignKey('records_metadata.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    literature_recid = db.Column(db.Integer, nullable=False)
+    full_name = db.Column(db.Text, nullable=False)
+
+
+class AuthorStatistics(db.Model):
+    """Cached statistics of an author, computed from its ``RecordAuthors``.
+
+    A column is ``NULL`` when it is not computed yet or when it was
+    invalidated by a change to one of the Literature records of the author
+    or to their citation counts. ``updated`` is the time of the last
+    invalidation, so that a value computed before it is not stored.
+    """
+
+    __tablename__ = 'records_authors_statistics'
+
+    author_recid = db.Column(db.Integer, primary_key=True)
+    statistics = db.Column(JSONB(none_as_null=True), nullable=True)
+    coauthors = db.Column(JSONB(none_as_null=True), nullable=True)
+    updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def get(cls, author_recid, column, compute):
+        """Return a cached statistic of an author, computing it if needed.
+
+        The computed value is stored in its own transaction, which leaves
+        alone the session of the request. It is only stored if the statistics
+        of the author were not invalidated while computing it, otherwise
+        it is returned but computed again on the next call.
+
+        Args:
+            author_recid (int): the recid of the author.
+            column (str): ``'statistics'`` or ``'coauthors'``.
+            compute (Callable[[int], object]): computes the value of the
+                column for an author, when it is not cached.
+        """
+        statistics = cls.__table__
+        row = db.session.query(getattr(cls, column), cls.updated).filter_by(
+            author_recid=author_recid,
+        ).first()
+        if row is not None and row[0] is not None:
+            return row[0]
+
+        if row is None:
+            # Without a row, an invalidation while computing would go unseen.
+            with db.engine.begin() as connection:
+                connection.execute(
+                    insert(statistics).values(
+                        author_recid=author_recid,
+                        updated=datetime.utcnow(),
+                    ).on_conflict_do_nothing(index_elements=[statistics.c.author_recid])
+                )
+                invalidated = connection.execute(
+                    select([statistics.c.updated]).where(statistics.c.author_recid == author_recid)
+                ).scalar()
+        else:
+            invalidated = row[1]
+
+        value = compute(author_recid)
+
+        with db.engine.begin() as connection:
+            connection.execute(
+                statistics.update().where(and_(
+                    statistics.c.author_recid == author_recid,
+                    statistics.c.updated == invalidated,
+                )).values(**{column: value})
+            )
+
+        return value
+
+
+class RecordsReindexCheckpoint(db.Model):
+    """Progress of a reindex job on the records of one pid type.
+
+    Records are reindexed in the order of their uuid, so ``last_object_uuid``
+    is a cursor after which a reindex job interrupted at any point resumes.
+    """
+
+    __tablename__ = 'records_reindex_checkpoint'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('job_id', 'pid_type'),
+    )
+
+    job_id = db.Column(db.String(255), nullable=False)
+    pid_type = db.Column(db.String(6), nullable=False)
+    last_object_uuid = db.Column(UUIDType, nullable=True)
+    processed = db.Column(db.Integer, default=0, nullable=False)
+    succeeded = db.Column(db.Integer, default=0, nullable=False)
+    failed = db.Column(db.Integer, default=0, nullable=False)
+    target_index = db.Column(db.String(255), nullable=True)
+    finished = db.Column(db.Boolean, default=False, nullable=False)
+    created = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def get_or_create(cls, job_id, pid_type):
+        """Return the checkpoint of a job for a pid type, creating it if needed."""
+        checkpoint = cls.query.get((job_id, pid_type))
+        if checkpoint is None:
+            checkpoint = cls(
+                job_id=job_id,
+                pid_type=pid_type,
+                processed=0,
+                succeeded=0,
+                failed=0,
+                finished=False,
+            )
+            db.session.add(checkpoint)
+
+        return checkpoint
+
+
+@db.event.listens_for(RecordsReindexCheckpoint, 'before_update', propagate=True)
+def timestamp_before_update(mapper, connection, target):
+    """Update `updated` property with current time on `before_update` event."""
+    target.updated = datetime.utcnow()
+
+
+def update_citations(connection, record_id, record_json):
+    """Synchronize the citations of a record with its references.
+
+    Only the diff between the stored citations and the current references is
+    written, and the cached counts of the affected pids are incremented or
+    decremented accordingly. A citation is not counted twice when another
+    record with the same control number (a duplicate) already cites the pid.
+
+    Args:
+        connection: the connection of the flush writing the record.
+        record_id (uuid.UUID): the uuid of the citing record.
+        record_json (dict): the current content of the citing record.
+    """
+    citations = RecordCitations.__table__
+
+    citer_recid = record_json.get('control_number')
+    cited_pids = set()
+    if citer_recid is not None and is_citing_record(record_json):
+        cited_pids = get_pids_from_references(record_json.get('references', []))
+
+    stored = connection.execute(
+        select([
+            citations.c.citer_recid,
+            citations.c.cited_pid_type,
+            citations.c.cited_pid_value,
+        ]).where(citations.c.citer_id == record_id)
+    ).fetchall()
+    stored_recid = stored[0].citer_recid if stored else None
+    stored_pids = set((row.cited_pid_type, row.cited_pid_value) for row in stored)
+
+    if stored_recid != citer_recid:
+        removed, added = stored_pids, cited_pids
+    else:
+        removed, added = stored_pids - cited_pids, cited_pids - stored_pids
+
+    deltas = defaultdict(int)
+
+    if removed:
+        connection.execute(
+            citations.delete().where(and_(
+                citations.c.citer_id == record_id,
+                tuple_(citations.c.cited_pid_type, citations.c.cited_pid_value).in_(list(removed)),
+            ))
+        )
+        duplicated = _get_pids_cited_by_duplicates(connection, record_id, stored_recid, removed)
+        for pid in removed - duplicated:
+            deltas[pid] -= 1
+
+    if added:
+        duplicated = _get_pids_cited_by_duplicates(connection, record_id, citer_recid, added)
+        connection.execute(
+            citations.insert(),
+            [
+                {
+                    'citer_id': record_id,
+                    'citer_recid': citer_recid,
+                    'cited_pid_type': pid_type,
+                    'cited_pid_value': pid_value,
+                } for pid_type, pid_value in added
+            ]
+        )
+        for pid in added - duplicated:
+            deltas[pid] += 1
+
+    _update_citations_count(connection, deltas)
+
+
+def _get_pids_cited_by_duplicates(connection, record_id, citer_recid, pids):
+    citations = RecordCitations.__table__
+    query = select([
+        citations.c.cited_pid_type,
+        citations.c.cited_pid_value,
+    ]).where(and_(
+        citations.c.citer_recid == citer_recid,
+        citations.c.citer_id != record_id,
+        tuple_(citations.c.cited_pid_type, citations.c.cited_pid_value).in_(list(pids)),
+    ))
+
+    return set(tuple(row) for row in connection.execute(query))
+
+
+def _update_citations_count(connection, deltas):
+    counts = RecordCitationsCount.__table__
+    # Sorted so that concurrent writers lock the rows in the same order.
+    values = [
+        {'pid_type': pid_type, 'pid_value': pid_value, 'citation_count': delta}
+        for (pid_type, pid_value), delta in sorted(iteritems(deltas))
+        if delta
+    ]
+    if not values:
+        return
+
+    statement = insert(counts).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[counts.c.pid_type, counts.c.pid_value],
+        set_={
+            'citation_count': counts.c.citation_count + statement.excluded.citation_count,
+        },
+    )
+    connection.execute(statement)
+
+    authors = RecordAuthors.__table__
+    literature_recids = [
+        int(value['pid_value']) for value in values
+        if value['pid_type'] == 'lit' and value['pid_value'].isdigit()
+    ]
+    if literature_recids:
+        _invalidate_authors_statistics(
+            connection,
+            select([authors.c.author_recid]).where(
+                authors.c.literature_recid.in_(literature_recids)
+            ),
+        )
+
+
+def update_authors(connection, record_id, record_json):
+    """Synchronize the authors who signed a record with its ``authors``.
+
+    Only the diff between the stored authors and the current ones is
+    written. The cached statistics of all the authors of the record, before
+    and after the change, are invalidated.
+
+    Args:
+        connection: the connection of the flush writing the record.
+        record_id (uuid.UUID): the uuid of the record.
+        record_json (dict): the current content of the record.
+    """
+    authors = RecordAuthors.__table__
+
+    literature_recid = record_json.get('control_number')
+    names = {}
+    if (
+        literature_recid is not None and
+        'hep.json' in record_json.get('$schema', '') and
+        is_literature_record(record_json)
+    ):
+        names = get_authors_recids_and_names(record_json)
+
+    stored = connection.execute(
+        select([
+            authors.c.author_recid,
+            authors.c.literature_recid,
+            authors.c.full_name,
+        ]).where(authors.c.literature_id == record_id)
+    ).fetchall()
+    stored_names = dict((row.author_recid, row.full_name) for row in stored)
+
+    if stored and stored[0].literature_recid != literature_recid:
+        removed, added = set(stored_names), set(names)
+    else:
+        removed = set(stored_names) - set(names)
+        added = set(
+            author_recid for author_recid, full_name in iteritems(names)
+            if stored_names.get(author_recid) != full_name
+        )
+        removed.update(added.intersection(stored_names))
+
+    if removed:
+        connection.execute(
+            authors.delete().where(and_(
+                authors.c.literature_id == record_id,
+                authors.c.author_recid.in_(sorted(removed)),
+            ))
+        )
+
+    if added:
+        connection.execute(
+            authors.insert(),
+            [
+                {
+                    'author_recid': author_recid,
+                    'literature_id': record_id,
+                    'literature_recid': literature_recid,
+                    'full_name': names[author_recid],
+                } for author_recid in sorted(added)
+            ]
+        )
+
+    affected = set(stored_names).union(names)
+    if affected:
+        _invalidate_authors_statistics(connection, sorted(affected))
+
+
+def _invalidate_authors_statistics(connection, author_recids):
+    statistics = AuthorStatistics.__table__
+    connection.execute(
+        # Rows without values are touched as well, as their values may be
+        # being computed.
+        statistics.update().where(
+            statistics.c.author_recid.in_(author_recids),
+        ).values(statistics=None, coauthors=None, updated=datetime.utcnow())
+    )
+
+
+@db.event.listens_for(RecordMetadata, 'after_insert')
+@db.event.listens_for(RecordMetadata, 'after_update')
+def update_citations_after_write(mapper, connection, target):
+    """Update the citations and authors of a record in the same transaction that writes it."""
+    update_citations(connection, target.id, target.json or {})
+    update_authors(connection, target.id, target.json or {})
+
+
+@db.event.listens_for(RecordMetadata, 'before_delete')
+def remove_citations_before_delete(mapper, connection, target):
+    """Remove the citations and authors of a record before it is deleted from the DB."""
+    update_citations(connection, target.id, {})
+    update_authors(connection, target.id, {})
@@ -41,6 +41,13 @@ action_view_restricted_collection = ParameterizedActionNeed(
 action_update_collection = ParameterizedActionNeed(
     'update-collection', argument=None
 )
+action_export_records = ParameterizedActionNeed(
+    'export-records', argument=None
+)
+
+records_export_permission = Permission(
+    action_export_records
+)
 
 all_restricted_collections = LocalProxy(lambda: load_restricted_collections())
 
@@ -31,10 +31,13 @@ from copy import deepcopy
 from flask import current_app
 from flask_sqlalchemy import models_committed
 from elasticsearch import NotFoundError
+from redis.exceptions import RedisError
 from time_execution import time_execution
+from werkzeug.utils import import_string
 
 from invenio_records.models import RecordMetadata
 from invenio_records.signals import (
+    after_record_delete,
     after_record_update,
     before_record_insert,
     before_record_update,
@@ -51,9 +54,14 @@ from inspirehep.modules.orcid.utils import get_orcids_for_push
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema
 from inspirehep.modules.records.api import InspireRecord
 from inspirehep.modules.records.errors import MissingInspireRecordError
+from inspirehep.modules.records.identifiers import IdentifiersIndex
+from inspirehep.modules.records.json_ref_loader import invalidate_cached_record
+from inspirehep.modules.records.models import RecordCitationsCount
 from inspirehep.modules.records.serializers.schemas.json import RecordMetadataSchemaV1
 from inspirehep.modules.records.tasks import index_modified_citations_from_record
 from inspirehep.modules.records.utils import (
+    FACET_AUTHOR_NAME_FIELDS,
+    get_linked_records_in_field_of_records,
     is_author,
     is_book,
     is_data,
@@ -70,6 +78,7 @@ from inspirehep.modules.records.utils import (
     populate_bookautocomplete,
     populate_citations_count,
     populate_earliest_date,
+    populate_export_formats,
     populate_experiment_suggest,
     populate_inspire_document_type,
     populate_name_variations,
@@ -79,6 +88,8 @@ from inspirehep.modules.records.utils import (
     populate_facet_author_name,
     populate_ui_display,
 )
+from inspirehep.modules.refextract.tasks import create_journal_kb_file
+from inspirehep.utils.record_getter import invalidate_cached_uuid
 from invenio_indexer.api import RecordIndexer
 
 LOGGER = logging.getLogger(__name__)
@@ -157,6 +168,31 @@ def push_to_orcid(sender, record, *args, **kwargs):
         )
 
 
+@after_record_update.connect
+@after_record_delete.connect
+def invalidate_json_ref_cache(sender, record, *args, **kwargs):
+    """Remove the record from the cache of the JSON reference loaders."""
+    if '$schema' not in record or 'control_number' not in record:
+        return
+
+    invalidate_cached_record(
+        get_pid_type_from_schema(record['$schema']),
+        record['control_number'],
+    )
+
+
+@after_record_delete.connect
+def invalidate_uuids_cache(sender, record, *args, **kwargs):
+    """Remove the record from the cache of the uuids of the record getters."""
+    if '$schema' not in record or 'control_number' not in record:
+        return
+
+    invalidate_cached_uuid(
+        get_pid_type_from_schema(record['$schema']),
+        record['control_number'],
+    )
+
+
 @after_record_update.connect
 def enhance_record(sender, record, *args, **kwargs):
     """Enhance the record for ES"""
@@ -201,7 +237,70 @@ def index_after_commit(sender, changes):
             index_modified_citations_from_record.delay(pid_type, pid_value, db_version)
 
 
-def enhance_before_index(record):
+@models_committed.connect
+def update_identifiers_index_after_commit(sender, changes):
+    """Update the ``IdentifiersIndex`` after Literature records were committed.
+
+    Like ``index_after_commit``, this happens after the commit so that the
+    index never contains identifiers of records that were rolled back.
+
+    If Redis fails, the index is marked as not loaded, so that references
+    are matched with Elasticsearch until ``inspirehep identifiers load`` is
+    run again.
+    """
+    if not current_app.config['RECORDS_IDENTIFIERS_INDEX_ENABLED']:
+        return
+
+    records = []
+    for model_instance, change in changes:
+        if not isinstance(model_instance, RecordMetadata) or not model_instance.json:
+            continue
+        if not is_hep(model_instance.json) or 'control_number' not in model_instance.json:
+            continue
+
+        record = model_instance.json if change in ('insert', 'update') else {}
+        records.append((model_instance.json['control_number'], record))
+
+    index = IdentifiersIndex()
+    try:
+        index.update(records)
+    except RedisError:
+        LOGGER.exception(
+            'Cannot update the identifiers of records %s, unloading the identifiers index',
+            [recid for recid, _ in records])
+        try:
+            index.unload()
+        except RedisError:
+            LOGGER.exception('Cannot unload the identifiers index')
+
+
+@models_committed.connect
+def update_journal_kb_after_commit(sender, changes):
+    """Update the journal KB of refextract after journal records were committed."""
+    if not current_app.config['REFEXTRACT_JOURNAL_KB_UPDATE_ON_COMMIT']:
+        return
+
+    for model_instance, _ in changes:
+        if isinstance(model_instance, RecordMetadata) and model_instance.json and \
+                '$schema' in model_instance.json and is_journal(model_instance.json):
+            create_journal_kb_file.delay(incremental=True)
+            return
+
+
+def get_precomputed_export_serializers():
+    """Return the serializers of the ``RECORDS_PRECOMPUTED_EXPORT_FORMATS``.
+
+    Returns:
+        dict: the serializers, keyed by export format.
+    """
+    export_formats = current_app.config['RECORDS_EXPORT_FORMATS']
+    return {
+        export_format: import_string(export_formats[export_format][0])
+        for export_format in current_app.config['RECORDS_PRECOMPUTED_EXPORT_FORMATS']
+    }
+
+
+def enhance_before_index(record, citation_count=None, linked_authors=None):
     """Run all the receivers that enhance the record for ES in the right order.
 
     .. note::
@@ -210,6 +309,12 @@ def enhance_before_index(record):
        because the latter puts a JSON reference in a completion _source, which
        would be expanded to an incorrect ``_source_recid`` by the former.
 
+    Args:
+        record (InspireRecord): the record to enhance.
+        citation_count (int): if passed, the already fetched citation count
+            of the record.
+        linked_authors (dict): if passed, the already resolved author records
+            linked from the record, keyed by (pid_type, pid_value).
     """
     populate_recid_from_ref(record)
 
@@ -221,9 +326,10 @@ def enhance_before_index(record):
         populate_inspire_document_type(record)
         populate_name_variations(record)
         populate_number_of_references(record)
-        populate_citations_count(record)
-        populate_facet_author_name(record)
+        populate_citations_count(record, citation_count)
+        populate_facet_author_name(record, linked_authors)
         populate_ui_display(record, RecordMetadataSchemaV1)
+        populate_export_formats(record, get_precomputed_export_serializers())
 
         if is_book(record):
             populate_bookautocomplete(record)
@@ -242,4 +348,33 @@ def enhance_before_index(record):
         populate_title_suggest(record)
 
     elif is_data(record):
-        populate_citations_count(record)
+        populate_citations_count(record, citation_count)
+
+
+def enhance_records_before_index(records):
+    """Enhance many records for ES at once.
+
+    Same as calling ``enhance_before_index`` on each record, but the
+    citation counts and the linked author records of all the records are
+    fetched with a single query each.
+
+    Args:
+        records (List[InspireRecord]): the records to enhance.
+    """
+    pids = [
+        (get_pid_type_from_schema(record['$schema']), str(record.get('control_number')))
+        for record in records
+    ]
+    citation_counts = RecordCitationsCount.get_many(pids)
+    linked_authors = get_linked_records_in_field_of_records(
+        [record for record in records if is_hep(record)],
+        'authors.record',
+        fields=FACET_AUTHOR_NAME_FIELDS,
+    )
+
+    for pid, record in zip(pids, records):
+        enhance_before_index(
+            record,
+            citation_count=citation_counts.get(pid, 0),
+            linked_authors=linked_authors,
+        )
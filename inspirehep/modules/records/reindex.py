@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Resumable bulk reindex of records."""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from time import sleep, time
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.models import RecordMetadata
+from invenio_search import current_search, current_search_client as es
+
+from inspirehep.modules.pidstore.utils import get_endpoint_from_pid_type
+from inspirehep.modules.search.cache import SearchResponseCache
+
+from .models import RecordsReindexCheckpoint
+from .tasks import batch_reindex
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_query_records_to_index(pid_types):
+    """Return a query for retrieving all records by pid_type.
+
+    Args:
+        pid_types(List[str]): a list of pid types
+
+    Return:
+        SQLAlchemy query for non deleted record with pid type in `pid_types`
+    """
+    query = (
+        db.session.query(PersistentIdentifier.object_uuid).filter(
+            PersistentIdentifier.pid_type.in_(pid_types),
+            PersistentIdentifier.object_type == 'rec',
+            PersistentIdentifier.status == PIDStatus.REGISTERED,
+            # noqa: F401
+        )
+    )
+    return query
+
+
+def get_next_uuids_to_index(pid_type, after_uuid=None, limit=200):
+    """Return the uuids of the records of a pid type following a given one.
+
+    Records are returned in the order of their uuid, which makes the last uuid
+    of every batch a cursor to get the following batch.
+
+    Args:
+        pid_type (str): the pid type of the records.
+        after_uuid (uuid.UUID): if passed, only records with a greater uuid
+            are returned.
+        limit (int): the maximum number of uuids to return.
+
+    Returns:
+        List[str]: the uuids of the records.
+    """
+    query = get_query_records_to_index([pid_type])
+    if after_uuid is not None:
+        query = query.filter(PersistentIdentifier.object_uuid > after_uuid)
+
+    query = query.order_by(PersistentIdentifier.object_uuid).limit(limit)
+
+    return [str(uuid) for (uuid,) in query]
+
+
+def get_uuids_updated_since(pid_types, since):
+    """Return the uuids of the records of some pid types updated since a date.
+
+    Unlike ``get_query_records_to_index``, records whose pid is not registered
+    anymore (e.g. deleted records) are also returned.
+    """
+    query = db.session.query(RecordMetadata.id).join(
+        PersistentIdentifier, RecordMetadata.id == PersistentIdentifier.object_uuid
+    ).filter(
+        PersistentIdentifier.object_type == 'rec',
+        PersistentIdentifier.pid_type.in_(pid_types),
+        RecordMetadata.updated >= since,
+    ).distinct()
+
+    return [str(uuid) for (uuid,) in query]
+
+
+def get_search_class_for_pid_type(pid_type):
+    """Return the search class of the records of a pid type."""
+    endpoint = get_endpoint_from_pid_type(pid_type)
+    search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
+
+    return import_string(search_conf['search_class'])
+
+
+def create_new_index(index):
+    """Create an empty index with the same mapping as an existing one.
+
+    Args:
+        index (str): the name of the existing index, as registered in
+            ``invenio_search``.
+
+    Returns:
+        str: the name of the new index.
+    """
+    new_index = '{}-{}'.format(index, datetime.utcnow().strftime('%Y%m%d%H%M%S'))
+    with open(current_search.mappings[index]) as mapping_file:
+        mapping = json.load(mapping_file)
+
+    es.indices.create(index=new_index, body=mapping)
+
+    return new_index
+
+
+def swap_index(index, new_index):
+    """Make ``index`` an alias of ``new_index`` and delete what it pointed to.
+
+    The other aliases of the replaced index (e.g. ``records``) are moved to
+    the new index in the same atomic operation.
+
+    If ``index`` is still a concrete index, e.g. the first time it is
+    replaced, it is removed with a ``remove_index`` action of the same atomic
+    operation, so that ``index`` is never missing and cannot be created
+    again by a record indexed meanwhile.
+    """
+    if es.indices.exists_alias(name=index):
+        old_indices = list(es.indices.get_alias(name=index))
+        index_is_alias = True
+    elif es.indices.exists(index=index):
+        old_indices = [index]
+        index_is_alias = False
+    else:
+        old_indices = []
+        index_is_alias = True
+
+    other_aliases = set()
+    if old_indices:
+        for old_index_aliases in es.indices.get_alias(index=','.join(old_indices)).values():
+            other_aliases.update(old_index_aliases.get('aliases', {}))
+    other_aliases.discard(index)
+
+    actions = [
+        {'add': {'index': new_index, 'alias': alias}}
+        for alias in sorted(other_aliases | {index})
+    ]
+
+    if index_is_alias:
+        actions.extend(
+            {'remove': {'index': old_index, 'alias': index}}
+            for old_index in old_indices
+        )
+        es.indices.update_aliases(body={'actions': actions})
+        if old_indices:
+            es.indices.delete(index=','.join(old_indices))
+    else:
+        LOGGER.info('Replacing index %s with an alias to %s', index, new_index)
+        actions.append({'remove_index': {'index': index}})
+        es.indices.update_aliases(body={'actions': actions})
+
+
+class Reindexer(object):
+    """Parallel and resumable reindex of all the records of some pid types.
+
+    The records of every pid type form a partition with its own cursor, from
+    which batches of uuids are sent in turns to ``batch_reindex`` tasks, with
+    at most ``max_pending_batches`` tasks pending at any time. The
+    ``queue_name`` may contain ``{pid_type}`` to send each partition to
+    dedicated workers.
+
+    The progress of every partition is stored in a ``RecordsReindexCheckpoint``
+    of the job, and its cursor only moves past a batch once the batch and all
+    the previous batches of the partition are done. Therefore running again
+    a job with the same ``job_id`` resumes it where it was interrupted.
+
+    If ``new_index`` is set, the records are indexed into new indices, which
+    replace the current ones once all records are indexed, after reindexing
+    again the records updated in the meantime. A resumed job whose
+    checkpoints already have new indices keeps building them.
+    """
+
+    def __init__(
+        self,
+        job_id,
+        pid_types,
+        batch_size=200,
+        queue_name='indexer_task',
+        request_timeout=None,
+        max_pending_batches=50,
+        new_index=False,
+    ):
+        self.job_id = job_id
+        self.pid_types = list(pid_types)
+        self.batch_size = batch_size
+        self.queue_name = queue_name
+        self.request_timeout = request_timeout
+        self.max_pending_batches = max_pending_batches
+
+        self.checkpoints = {
+            pid_type: RecordsReindexCheckpoint.get_or_create(job_id, pid_type)
+            for pid_type in self.pid_types
+        }
+        db.session.commit()
+
+        # A job that started building new indices keeps doing so when resumed.
+        self.new_index = new_index or any(
+            checkpoint.target_index for checkpoint in self.checkpoints.values()
+        )
+
+        self.cursors = {
+            pid_type: checkpoint.last_object_uuid
+            for pid_type, checkpoint in self.checkpoints.items()
+        }
+        self.exhausted = {
+            pid_type: checkpoint.finished
+            for pid_type, checkpoint in self.checkpoints.items()
+        }
+        self.pending = {pid_type: deque() for pid_type in self.pid_types}
+
+        self.total = get_query_records_to_index(self.pid_types).count()
+        self.processed_in_run = 0
+        self.succeeded_in_run = 0
+        self.failures = []
+        self.batch_errors = []
+        self.uuids_per_task = {}
+        self.started = None
+
+    @property
+    def processed(self):
+        """Number of records processed by the job, also in previous runs."""
+        return sum(checkpoint.processed for checkpoint in self.checkpoints.values())
+
+    @property
+    def throughput(self):
+        """Records processed per second in the current run."""
+        elapsed = time() - self.started if self.started else 0
+        if not elapsed:
+            return 0.0
+
+        return self.processed_in_run / elapsed
+
+    @property
+    def eta(self):
+        """Estimated seconds left to process all records, ``None`` if unknown."""
+        throughput = self.throughput
+        if not throughput:
+            return None
+
+        return max(self.total - self.processed, 0) / throughput
+
+    @property
+    def finished(self):
+        return all(checkpoint.finished for checkpoint in self.checkpoints.values())
+
+    @property
+    def target_indices(self):
+        return {
+            get_search_class_for_pid_type(pid_type).Meta.index: checkpoint.target_index
+            for pid_type, checkpoint in self.checkpoints.items()
+            if checkpoint.target_index
+        }
+
+    def run(self, on_progress=None, interval=0.5):
+        """Reindex all the records not yet processed by the job.
+
+        Args:
+            on_progress (callable): if passed, called with the reindexer
+                after every check of the pending tasks.
+            interval (float): seconds between checks of the pending tasks.
+        """
+        self.started = time()
+
+        if self.new_index:
+            self._create_new_indices()
+
+        while self._schedule_batches() or self._pending_count():
+            self._collect_batches()
+            if on_progress:
+                on_progress(self)
+            sleep(interval)
+
+        self._collect_batches()
+        if on_progress:
+            on_progress(self)
+
+        if self.new_index:
+            self._swap_new_indices()
+
+    def _pending_count(self):
+        return sum(len(pending) for pending in self.pending.values())
+
+    def _send_batch(self, pid_type, uuids):
+        task = batch_reindex.apply_async(
+            kwargs={
+                'uuids': uuids,
+                'request_timeout': self.request_timeout,
+                'target_indices': self.target_indices,
+            },
+            queue=self.queue_name.format(pid_type=pid_type),
+        )
+        self.uuids_per_task[task.id] = uuids
+
+        return task
+
+    def _schedule_batches(self):
+        """Send batches in turns from every partition.
+
+        Returns:
+            bool: whether some partition still has records to schedule.
+        """
+        while self._pending_count() < self.max_pending_batches:
+            partitions = [pid_type for pid_type in self.pid_types if not self.exhausted[pid_type]]
+            if not partitions:
+                return False
+
+            for pid_type in partitions:
+                if self._pending_count() >= self.max_pending_batches:
+                    break
+
+                uuids = get_next_uuids_to_index(pid_type, self.cursors[pid_type], self.batch_size)
+                if not uuids:
+                    self.exhausted[pid_type] = True
+                    continue
+
+                task = self._send_batch(pid_type, uuids)
+                self.pending[pid_type].append(task)
+                self.cursors[pid_type] = uuids[-1]
+
+        return not all(self.exhausted.values())
+
+    def _collect_batches(self):
+        """Move the checkpoint of every partition past its finished batches."""
+        for pid_type, pending in self.pending.items():
+            checkpoint = self.checkpoints[pid_type]
+
+            while pending and pending[0].ready():
+                task = pending.popleft()
+                uuids = self.uuids_per_task[task.id]
+
+                if task.failed():
+                    self.batch_errors.append({
+                        'task_id': task.id,
+                        'error': task.result,
+                    })
+                    checkpoint.failed += len(uuids)
+                else:
+                    failures = task.result['failures']
+                    self.failures.extend(failures)
+                    self.succeeded_in_run += task.result['success']
+                    checkpoint.succeeded += task.result['success']
+                    checkpoint.failed += len(failures)
+
+                checkpoint.last_object_uuid = uuids[-1]
+                checkpoint.processed += len(uuids)
+                self.processed_in_run += len(uuids)
+
+            if self.exhausted[pid_type] and not pending:
+                checkpoint.finished = True
+
+        db.session.commit()
+
+    def _create_new_indices(self):
+        for pid_type, checkpoint in self.checkpoints.items():
+            if not checkpoint.target_index:
+                index = get_search_class_for_pid_type(pid_type).Meta.index
+                checkpoint.target_index = create_new_index(index)
+                LOGGER.info('Reindexing %s records into new index %s', pid_type, checkpoint.target_index)
+        db.session.commit()
+
+    def _swap_new_indices(self):
+        """Catch up with the records updated during the job and swap the indices."""
+        since = min(checkpoint.created for checkpoint in self.checkpoints.values())
+
+        for pid_type, checkpoint in self.checkpoints.items():
+            updated_uuids = get_uuids_updated_since([pid_type], since)
+            for start in range(0, len(updated_uuids), self.batch_size):
+                batch_reindex(
+                    updated_uuids[start:start + self.batch_size],
+                    request_timeout=self.request_timeout,
+                    target_indices=self.target_indices,
+                )
+            self._delete_removed_records(pid_type, checkpoint.target_index, updated_uuids)
+
+        for pid_type, checkpoint in self.checkpoints.items():
+            index = get_search_class_for_pid_type(pid_type).Meta.index
+            es.indices.refresh(index=checkpoint.target_index)
+            swap_index(index, checkpoint.target_index)
+            SearchResponseCache().invalidate(index)
+
+    def _delete_removed_records(self, pid_type, target_index, uuids):
+        """Delete from the new index the records deleted during the job."""
+        if not uuids:
+            return
+
+        registered_uuids = set(
+            str(uuid) for (uuid,) in get_query_records_to_index([pid_type]).filter(
+                PersistentIdentifier.object_uuid.in_(uuids)
+            )
+        )
+        doc_type = get_search_class_for_pid_type(pid_type).Meta.doc_types
+
+        for uuid in uuids:
+            if uuid not in registered_uuids:
+                es.delete(index=target_index, doc_type=doc_type, id=uuid, ignore=404)
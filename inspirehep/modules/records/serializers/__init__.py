@@ -29,6 +29,7 @@ from invenio_records_rest.serializers.json import JSONSerializer
 
 from .json_literature import (
     LiteratureCitationsJSONSerializer,
+    LiteratureReferencesJSONSerializer,
     LiteratureJSONUISerializer,
     FacetsJSONUISerializer
 )
@@ -73,8 +74,11 @@ json_literature_references_v1_search = search_responsify(
     json_literature_references_v1,
     'application/json',
 )
+json_literature_references_v1_paginated = LiteratureReferencesJSONSerializer(
+    LiteratureReferencesSchemaJSONUIV1
+)
 json_literature_references_v1_response = record_responsify_nocache(
-    json_literature_references_v1,
+    json_literature_references_v1_paginated,
     'application/json',
 )
 
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Caches of the serialized records."""
+
+from __future__ import absolute_import, division, print_function
+
+from flask import current_app
+
+from inspirehep.utils.cache import LRUCache
+
+
+def get_revision_key(record):
+    """Return the key identifying a revision of a record.
+
+    Args:
+        record: the record being serialized.
+
+    Returns:
+        tuple: ``(uuid, revision_id)`` if ``record`` is an ``InspireRecord``
+        loaded from the DB, ``None`` otherwise, e.g. for a search hit.
+    """
+    record_id = getattr(record, 'id', None)
+    revision_id = getattr(record, 'revision_id', None)
+    if record_id is None or revision_id is None:
+        return None
+
+    return str(record_id), revision_id
+
+
+def get_precomputed_entry(record, export_format):
+    """Return the serialization of a record precomputed when it was indexed.
+
+    Args:
+        record (dict): the ``_source`` of the record.
+        export_format (str): one of ``RECORDS_PRECOMPUTED_EXPORT_FORMATS``.
+
+    Returns:
+        str: the serialized record, or ``None`` if it was not precomputed.
+    """
+    if export_format is None:
+        return None
+
+    return record.get('_export_formats', {}).get(export_format)
+
+
+class SerializedRecordsCacheMixin(object):
+    """Cache the serialization of single records, keyed by their revision.
+
+    Each serializer keeps its own cache, of ``RECORDS_SERIALIZERS_CACHE_SIZE``
+    entries expiring after ``RECORDS_SERIALIZERS_CACHE_TTL`` seconds, so
+    that the changes of the linked records (e.g. a conference) are
+    eventually picked up.
+    """
+
+    _serialized_records = None
+
+    @property
+    def serialized_records_cache(self):
+        if self._serialized_records is None:
+            self._serialized_records = LRUCache(
+                maxsize=current_app.config['RECORDS_SERIALIZERS_CACHE_SIZE'],
+                ttl=current_app.config['RECORDS_SERIALIZERS_CACHE_TTL'],
+            )
+
+        return self._serialized_records
+
+    def serialize_cached(self, record, serialize):
+        """Return the cached serialization of ``record``, or ``serialize()`` it.
+
+        Args:
+            record: the record being serialized.
+            serialize (callable): serializes the record when it is not cached.
+
+        Returns:
+            str: the serialized record.
+        """
+        key = get_revision_key(record)
+        if key is None:
+            return serialize()
+
+        cache = self.serialized_records_cache
+        serialized = cache.get(key)
+        if serialized is None:
+            serialized = serialize()
+            cache.set(key, serialized)
+
+        return serialized
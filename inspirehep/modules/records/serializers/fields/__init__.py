@@ -24,3 +24,4 @@ from __future__ import absolute_import, division, print_function
 
 from .list_with_limit import ListWithLimit  # noqa: F401
 from .nested_without_empty_objects import NestedWithoutEmptyObjects  # noqa: F401
+from .pre_encoded_json import PreEncoded, PreEncodedJSON  # noqa: F401
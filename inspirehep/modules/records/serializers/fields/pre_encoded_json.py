@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from marshmallow import fields
+
+
+class PreEncoded(object):
+    """A value already encoded as JSON."""
+
+    __slots__ = ('encoded',)
+
+    def __init__(self, encoded):
+        self.encoded = encoded
+
+
+class PreEncodedJSON(fields.Field):
+    """Field whose value is already encoded as JSON, e.g. ``_ui_display``.
+
+    The value is dumped as a ``PreEncoded``, which is spliced as it is in the
+    output of the serializer, instead of being decoded and encoded again.
+    """
+
+    def _serialize(self, value, attr, obj):
+        if value is None:
+            return None
+        return PreEncoded(value)
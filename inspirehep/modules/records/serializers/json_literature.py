@@ -25,10 +25,14 @@
 from __future__ import absolute_import, division, print_function
 
 import json
+import re
+import uuid
 
+from flask import abort, request
 from invenio_records_rest.serializers.json import JSONSerializer
 
 from inspire_utils.date import format_date
+from inspirehep.modules.records.serializers.fields import PreEncoded
 from inspirehep.modules.records.wrappers import LiteratureRecord
 
 
@@ -61,6 +65,36 @@ def _get_ui_metadata(record):
     return display
 
 
+def _dumps_pre_encoded(obj, **kwargs):
+    """Serialize to JSON, splicing the ``PreEncoded`` values as they are.
+
+    Args:
+        obj: the object to serialize.
+        kwargs: the keyword arguments of ``json.dumps``.
+
+    Returns:
+        str: the serialized object.
+    """
+    pre_encoded = []
+    placeholder = uuid.uuid4().hex
+
+    def _default(value):
+        if isinstance(value, PreEncoded):
+            pre_encoded.append(value.encoded)
+            return u'{}:{}'.format(placeholder, len(pre_encoded) - 1)
+        raise TypeError('{!r} is not JSON serializable'.format(value))
+
+    serialized = json.dumps(obj, default=_default, **kwargs)
+    if not pre_encoded:
+        return serialized
+
+    return re.sub(
+        r'"{}:(\d+)"'.format(placeholder),
+        lambda match: pre_encoded[int(match.group(1))],
+        serialized,
+    )
+
+
 def get_citations_count(original_record):
     """ Try to get citations"""
     if hasattr(original_record, 'get_citations_count'):
@@ -96,6 +130,58 @@ class LiteratureJSONUISerializer(JSONSerializer):
                                   links_factory=links_factory, **kwargs)
         return _preprocess_result(result)
 
+    def serialize_search(self, pid_fetcher, search_result, links=None,
+                         item_links_factory=None, **kwargs):
+        """Serialize a search result.
+
+        Same as ``JSONSerializer.serialize_search``, but the values which
+        are already encoded as JSON, like the ``_ui_display`` of the hits,
+        are spliced in the response without being decoded first.
+        """
+        return _dumps_pre_encoded(dict(
+            hits=dict(
+                hits=[self.transform_search_hit(
+                    pid_fetcher(hit['_id'], hit['_source']),
+                    hit,
+                    links_factory=item_links_factory,
+                    **kwargs
+                ) for hit in search_result['hits']['hits']],
+                total=search_result['hits']['total'],
+            ),
+            links=links or {},
+            aggregations=search_result.get('aggregations', dict()),
+        ), **self._format_args())
+
+
+class LiteratureReferencesJSONSerializer(JSONSerializer):
+    """JSON serializer for the references of a record, a page at a time.
+
+    The page is given by the ``page`` and ``size`` arguments of the request,
+    and only the references on it are resolved. Without ``size``, all the
+    references are serialized.
+    """
+
+    def preprocess_record(self, pid, record, links_factory=None, **kwargs):
+        page = request.args.get('page', 1, type=int)
+        size = request.args.get('size', type=int)
+
+        if page < 1 or (size is not None and size < 1):
+            abort(400)
+
+        result = super(LiteratureReferencesJSONSerializer, self).preprocess_record(
+            pid, record, links_factory=links_factory, **kwargs
+        )
+        references = result['metadata'].get('references', [])
+        if size is not None:
+            references = references[(page - 1) * size:page * size]
+
+        result['metadata'] = {
+            'references': references,
+            'references_count': len(record.get('references', [])),
+        }
+
+        return result
+
 
 class LiteratureCitationsJSONSerializer(JSONSerializer):
 
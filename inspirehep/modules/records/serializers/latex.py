@@ -27,11 +27,31 @@ from __future__ import absolute_import, division, print_function
 from invenio_records_rest.serializers.json import MarshmallowMixin, PreprocessorMixin
 
 import jinja2
-import os
 import pkg_resources
+from itertools import islice
 
+from .cache import SerializedRecordsCacheMixin, get_precomputed_entry
 
-class LatexSerializer(MarshmallowMixin, PreprocessorMixin):
+_latex_template = None
+
+
+def get_latex_template():
+    """Return the LaTeX template, compiled only once per process."""
+    global _latex_template
+    if _latex_template is None:
+        latex_jinja_env = jinja2.Environment(
+            variable_start_string='\\VAR{',
+            variable_end_string='}',
+            loader=jinja2.FileSystemLoader(
+                pkg_resources.resource_filename('inspirehep', 'modules/records/serializers/templates')
+            ),
+        )
+        _latex_template = latex_jinja_env.get_template('latex_template.tex')
+
+    return _latex_template
+
+
+class LatexSerializer(SerializedRecordsCacheMixin, MarshmallowMixin, PreprocessorMixin):
     """Latex serializer for records."""
 
     def __init__(self, format, **kwargs):
@@ -46,25 +66,22 @@ class LatexSerializer(MarshmallowMixin, PreprocessorMixin):
         :param record: Record instance.
         :param links_factory: Factory function for record links.
         """
-        data = self.transform_record(pid, record, links_factory, **kwargs)
+        def _serialize():
+            data = self.transform_record(pid, record, links_factory, **kwargs)
+            return self.latex_template().render(data=data, format=self.format)
 
-        return self.latex_template().render(data=data, format=self.format)
+        return self.serialize_cached(record, _serialize)
 
     def preprocess_record(self, pid, record, links_factory=None, **kwargs):
         """Prepare a record and persistent identifier for serialization."""
         return record
 
     def latex_template(self):
-        latex_jinja_env = jinja2.Environment(
-            variable_start_string='\VAR{',
-            variable_end_string='}',
-            loader=jinja2.FileSystemLoader(os.path.abspath('/'))
-        )
-        template_path = pkg_resources.resource_filename('inspirehep', 'modules/records/serializers/templates/latex_template.tex')
-
-        template = latex_jinja_env.get_template(template_path)
+        return get_latex_template()
 
-        return template
+    def serialize_entry(self, record):
+        """Serialize a single record from its ``_source``."""
+        return self.latex_template().render(data=self.dump(record), format=self.format)
 
     def serialize_search(self, pid_fetcher, search_result, links=None,
                          item_links_factory=None):
@@ -78,6 +95,31 @@ class LatexSerializer(MarshmallowMixin, PreprocessorMixin):
         Returns:
             str: serialized search result(s)
         """
+        template = self.latex_template()
         records = (self.dump(hit['_source']) for hit in search_result['hits']['hits'])
-        templates = [self.latex_template().render(data=data, format=self.format) for data in records]
+        templates = [template.render(data=data, format=self.format) for data in records]
         return u'\n\n'.join(templates)
+
+    def serialize_stream(self, records, chunk_size=100, export_format=None):
+        """Serialize many records, a chunk at a time.
+
+        Args:
+            records: an iterable of records, e.g. scrolled from Elasticsearch.
+            chunk_size: number of records serialized at a time.
+            export_format: if passed, the format of the serializations
+                precomputed in the ``_export_formats`` of the records when
+                they were indexed, which are used when available.
+
+        Yields:
+            str: the serialized chunks of records.
+        """
+        records = iter(records)
+        separator = u''
+        chunk = list(islice(records, chunk_size))
+        while chunk:
+            yield separator + u'\n\n'.join(
+                get_precomputed_entry(record, export_format) or self.serialize_entry(record)
+                for record in chunk
+            )
+            separator = u'\n\n'
+            chunk = list(islice(records, chunk_size))
@@ -24,8 +24,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+from itertools import islice
+
 from inspire_dojson import record2marcxml
 
+from .cache import get_precomputed_entry
+
 MARCXML_TEMPLATE = '''\
 <?xml version="1.0" encoding="UTF-8" ?>
 <collection xmlns="http://www.loc.gov/MARC21/slim">
@@ -42,7 +46,38 @@ class MARCXMLSerializer(object):
         """Serialize a single record as MARCXML."""
         return MARCXML_TEMPLATE.format(record2marcxml(record))
 
+    def serialize_entry(self, record):
+        """Serialize a single record as a MARCXML ``record`` element."""
+        return record2marcxml(record)
+
     def serialize_search(self, pid_fetcher, search_result, links=None, item_links_factory=None):
         """Serialize a search result as MARCXML."""
         result = [record2marcxml(el['_source']) for el in search_result['hits']['hits']]
         return MARCXML_TEMPLATE.format(''.join(result))
+
+    def serialize_stream(self, records, chunk_size=100, export_format=None):
+        """Serialize many records as MARCXML, a chunk at a time.
+
+        Args:
+            records: an iterable of records, e.g. scrolled from Elasticsearch.
+            chunk_size: number of records serialized at a time.
+            export_format: if passed, the format of the serializations
+                precomputed in the ``_export_formats`` of the records when
+                they were indexed, which are used when available.
+
+        Yields:
+            str: the serialized chunks of the collection.
+        """
+        header, footer = MARCXML_TEMPLATE.split('{}')
+        yield header
+
+        records = iter(records)
+        chunk = list(islice(records, chunk_size))
+        while chunk:
+            yield ''.join(
+                get_precomputed_entry(record, export_format) or self.serialize_entry(record)
+                for record in chunk
+            )
+            chunk = list(islice(records, chunk_size))
+
+        yield footer
@@ -24,10 +24,14 @@
 
 from __future__ import absolute_import, division, print_function
 
+from itertools import islice
+
 from pybtex.database import BibliographyData
 
+from .cache import SerializedRecordsCacheMixin, get_precomputed_entry
+
 
-class PybtexSerializerBase(object):
+class PybtexSerializerBase(SerializedRecordsCacheMixin):
     """Pybtex serializer for records."""
 
     def __init__(self, schema, writer):
@@ -78,6 +82,10 @@ class PybtexSerializerBase(object):
         Returns:
             str: single serialized Bibtex record
         """
+        return self.serialize_cached(record, lambda: self.serialize_entry(record))
+
+    def serialize_entry(self, record):
+        """Serialize a single record as a Bibtex entry."""
         return self.create_bibliography([record])
 
     def serialize_search(self, pid_fetcher, search_result, links=None,
@@ -94,3 +102,27 @@ class PybtexSerializerBase(object):
         """
         records = [hit['_source'] for hit in search_result['hits']['hits']]
         return self.create_bibliography(records)
+
+    def serialize_stream(self, records, chunk_size=100, export_format=None):
+        """Serialize many records, a chunk at a time.
+
+        Args:
+            records: an iterable of records, e.g. scrolled from Elasticsearch.
+            chunk_size: number of records serialized at a time.
+            export_format: if passed, the format of the serializations
+                precomputed in the ``_export_formats`` of the records when
+                they were indexed, which are used when available.
+
+        Yields:
+            str: the serialized chunks of the bibliography.
+        """
+        records = iter(records)
+        separator = ''
+        chunk = list(islice(records, chunk_size))
+        while chunk:
+            yield separator + '\n'.join(
+                get_precomputed_entry(record, export_format) or self.serialize_entry(record)
+                for record in chunk
+            )
+            separator = '\n'
+            chunk = list(islice(records, chunk_size))
@@ -22,13 +22,16 @@
 
 from __future__ import absolute_import, division, print_function
 
-import json
 from inspire_dojson.utils import strip_empty_values
 from inspire_utils.date import format_date
 
 from marshmallow import Schema, fields, missing, post_dump
 
-from inspirehep.modules.records.serializers.fields import ListWithLimit, NestedWithoutEmptyObjects
+from inspirehep.modules.records.serializers.fields import (
+    ListWithLimit,
+    NestedWithoutEmptyObjects,
+    PreEncodedJSON,
+)
 from inspirehep.modules.records.serializers.schemas.base import JSONSchemaUIV1
 
 from .common import (  # noqa: F401
@@ -164,6 +167,7 @@ class LiteratureAuthorsSchemaJSONUIV1(JSONSchemaUIV1):
 class MetadataReferencesSchemaUIV1(Schema):
     references = NestedWithoutEmptyObjects(
         ReferenceItemSchemaV1, default=[], many=True, dump_only=True)
+    references_count = fields.Integer(dump_only=True)
 
 
 class LiteratureReferencesSchemaJSONUIV1(JSONSchemaUIV1):
@@ -173,7 +177,4 @@ class LiteratureReferencesSchemaJSONUIV1(JSONSchemaUIV1):
 
 
 class UIDisplayLiteratureRecordJsonUIV1(JSONSchemaUIV1):
-    metadata = fields.Method('get_ui_display_metadata')
-
-    def get_ui_display_metadata(self, data):
-        return json.loads(data['metadata']['_ui_display'])
+    metadata = PreEncodedJSON(attribute='metadata._ui_display')
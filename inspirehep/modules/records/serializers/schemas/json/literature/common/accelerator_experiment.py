@@ -31,6 +31,14 @@ from inspirehep.modules.records.utils import get_linked_records_in_field
 
 
 class AcceleratorExperimentSchemaV1(Schema):
+    RESOLVED_EXPERIMENT_FIELDS = [
+        'accelerator',
+        'control_number',
+        'experiment',
+        'institutions',
+        'legacy_name',
+    ]
+    """Fields of the experiment records used when dumping them."""
 
     name = fields.Method('get_name')
 
@@ -48,7 +56,8 @@ class AcceleratorExperimentSchemaV1(Schema):
     def get_control_numbers_to_resolved_experiments_map(self, data):
         data = force_list(data)
         resolved_records = get_linked_records_in_field(
-            {'accelerator_experiments': data}, 'accelerator_experiments.record'
+            {'accelerator_experiments': data}, 'accelerator_experiments.record',
+            fields=self.RESOLVED_EXPERIMENT_FIELDS,
         )
         return {
             record['control_number']: record
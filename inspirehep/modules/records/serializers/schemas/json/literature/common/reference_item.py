@@ -22,12 +22,17 @@
 
 from __future__ import absolute_import, division, print_function
 
+from copy import deepcopy
+
+from flask import current_app
 from marshmallow import Schema, pre_dump, post_dump, fields, missing
 from inspire_dojson.utils import get_recid_from_ref, strip_empty_values
 from inspire_utils.helpers import force_list
 
 from inspirehep.modules.records.serializers.fields import ListWithLimit, NestedWithoutEmptyObjects
-from inspirehep.modules.records.utils import get_linked_records_in_field
+from inspirehep.modules.records.utils import get_linked_pids_in_field
+from inspirehep.utils.cache import LRUCache
+from inspirehep.utils.record_getter import get_db_records, get_db_records_revisions
 from inspire_utils.record import get_value
 
 from .author import AuthorSchemaV1
@@ -35,8 +40,37 @@ from .collaboration import CollaborationSchemaV1
 from .collaboration_with_suffix import CollaborationWithSuffixSchemaV1
 from .publication_info_item import PublicationInfoItemSchemaV1
 
+_resolved_references_cache = None
+
+
+def get_resolved_references_cache():
+    """Return the cache of the resolved references, keyed by pid and revision.
+
+    Its size is configured by ``RECORDS_REFERENCES_CACHE_SIZE``.
+    """
+    global _resolved_references_cache
+    if _resolved_references_cache is None:
+        _resolved_references_cache = LRUCache(
+            maxsize=current_app.config['RECORDS_REFERENCES_CACHE_SIZE'],
+        )
+
+    return _resolved_references_cache
+
 
 class ReferenceItemSchemaV1(Schema):
+    RESOLVED_REFERENCE_FIELDS = [
+        'arxiv_eprints',
+        'authors',
+        'collaborations',
+        'control_number',
+        'dois',
+        'misc',
+        'publication_info',
+        'titles',
+        'urls',
+    ]
+    """Fields of the referenced records used when dumping them."""
+
     authors = ListWithLimit(
         NestedWithoutEmptyObjects(AuthorSchemaV1, dump_only=True, default=[]), limit=10)
     collaborations = fields.List(fields.Nested(
@@ -88,12 +122,37 @@ class ReferenceItemSchemaV1(Schema):
         return get_recid_from_ref(data.get('record'))
 
     def get_resolved_references_by_control_number(self, data):
+        """Resolve the records linked from the references.
+
+        The resolved records are cached by pid and revision, so only the
+        revisions of the linked records are fetched from the DB, followed
+        by the records which changed since they were cached.
+        """
         data = force_list(data)
-        resolved_records = get_linked_records_in_field(
-            {'references': data}, 'references.record')
+        pids = get_linked_pids_in_field({'references': data}, 'references.record')
+        revisions = get_db_records_revisions(pids)
+        cache = get_resolved_references_cache()
+
+        resolved_records = {}
+        for pid, revision in revisions.items():
+            resolved_record = cache.get(pid + (revision,))
+            if resolved_record is not None:
+                resolved_records[pid[1]] = resolved_record
+
+        pids_by_recid = {pid[1]: pid for pid in revisions}
+        missing_pids = [pid for pid in revisions if pid[1] not in resolved_records]
+        if missing_pids:
+            for resolved_record in get_db_records(missing_pids, fields=self.RESOLVED_REFERENCE_FIELDS):
+                recid = str(resolved_record['control_number'])
+                resolved_records[recid] = resolved_record
+                pid = pids_by_recid.get(recid)
+                if pid is not None:
+                    cache.set(pid + (revisions[pid],), resolved_record)
+
+        # The resolved records are modified while dumping them.
         return {
-            record['control_number']: record
-            for record in resolved_records
+            resolved_record['control_number']: deepcopy(resolved_record)
+            for resolved_record in resolved_records.values()
         }
 
     def get_reference_or_linked_reference_with_label(self, data, reference_record):
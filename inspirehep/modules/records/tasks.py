@@ -30,7 +30,7 @@ from elasticsearch.helpers import bulk, scan
 from flask import current_app
 from six import iteritems
 from sqlalchemy import tuple_
-from sqlalchemy.orm.exc import NoResultFound, StaleDataError
+from sqlalchemy.orm.exc import StaleDataError
 
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
@@ -38,10 +38,14 @@ from invenio_search import current_search_client as es
 
 from inspire_dojson.utils import get_recid_from_ref
 from inspirehep.modules.records.api import InspireRecord
-from inspirehep.modules.records.errors import MissingCitedRecordError
+from inspirehep.modules.records.errors import (
+    CitationsReindexError,
+    MissingCitedRecordError,
+)
+from inspirehep.modules.records.indexing_queue import CitationsReindexQueue
 from inspirehep.modules.records.utils import get_endpoint_from_record
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema
-from inspirehep.utils.record import create_index_op
+from inspirehep.utils.record import create_index_ops
 from inspirehep.utils.record_getter import get_db_record, RecordGetterError
 
 
@@ -185,18 +189,75 @@ def get_merged_records():
 
 
 @shared_task(ignore_result=False, max_retries=0)
-def batch_reindex(uuids, request_timeout=None):
-    """Task for bulk reindexing records."""
+def _create_index_ops_skipping_failures(records, skipped_uuids):
+    """Create the index operations of the records that can be enhanced.
+
+    The records are enhanced together, and only if that fails one by one,
+    to find and skip the records that fail. The uuids of these records are
+    appended to ``skipped_uuids``.
+    """
+    try:
+        return create_index_ops(records, version_type='force')
+    except Exception:
+        logger.warning('Failed to enhance a chunk of %d records, enhancing them one by one', len(records))
+
+    index_ops = []
+    for record in records:
+        try:
+            index_ops.extend(create_index_ops([record], version_type='force'))
+        except Exception:
+            logger.exception('Record %s failed to be enhanced, not indexing it', record.id)
+            skipped_uuids.append(str(record.id))
+
+    return index_ops
+
+
+def batch_reindex(uuids, request_timeout=None, target_indices=None, skip_failing_records=False):
+    """Task for bulk reindexing records.
+
+    The records are loaded and enhanced in chunks of
+    ``INDEXER_BULK_ENHANCE_CHUNK_SIZE``, with a few queries per chunk.
+
+    Args:
+        uuids (List[str]): uuids of the records to reindex.
+        request_timeout (float): timeout of the bulk request to ES, defaults
+            to ``INDEXER_BULK_REQUEST_TIMEOUT``.
+        target_indices (dict): if passed, maps the name of the index where
+            a record is normally indexed to the name of the index where it
+            should be indexed instead, e.g. a new index being built.
+        skip_failing_records (bool): if True, the records whose enhancement
+            raises are logged and not indexed, instead of failing the whole
+            batch. Their uuids are returned as ``skipped``.
+    """
+    target_indices = target_indices or {}
+    skipped_uuids = []
+
     def actions():
-        for uuid in uuids:
-            try:
-                record = InspireRecord.get_record(uuid)
+        chunk_size = current_app.config['INDEXER_BULK_ENHANCE_CHUNK_SIZE']
+        for start in range(0, len(uuids), chunk_size):
+            chunk = uuids[start:start + chunk_size]
+            records = InspireRecord.get_records(chunk)
+
+            loaded_uuids = set(str(record.id) for record in records)
+            for uuid in chunk:
+                if str(uuid) not in loaded_uuids:
+                    logger.warn('Record %s failed to load', uuid)
+
+            records_to_index = []
+            for record in records:
                 if record.get('deleted', False):
-                    logger.debug("Record already %s deleted, not indexing!", uuid)
+                    logger.debug("Record already %s deleted, not indexing!", record.id)
                     continue
-                yield create_index_op(record, version_type='force')
-            except NoResultFound as e:
-                logger.warn('Record %s failed to load: %s', uuid, e)
+                records_to_index.append(record)
+
+            if skip_failing_records:
+                index_ops = _create_index_ops_skipping_failures(records_to_index, skipped_uuids)
+            else:
+                index_ops = create_index_ops(records_to_index, version_type='force')
+
+            for index_op in index_ops:
+                index_op['_index'] = target_indices.get(index_op['_index'], index_op['_index'])
+                yield index_op
 
     if not request_timeout:
         request_timeout = current_app.config['INDEXER_BULK_REQUEST_TIMEOUT']
@@ -209,10 +270,14 @@ def batch_reindex(uuids, request_timeout=None):
         raise_on_exception=False,
     )
 
-    return {
+    result = {
         'success': success,
         'failures': [failure for failure in failures or []],
     }
+    if skip_failing_records:
+        result['skipped'] = skipped_uuids
+
+    return result
 
 
 @shared_task(ignore_result=False, bind=True, max_retries=12)
@@ -232,6 +297,12 @@ def index_modified_citations_from_record(self, pid_type, pid_value, db_version):
         db_version(Int): the correct version of the record that we expect
             to index. This prevents loading stale data from the DB.
 
+    Note:
+        If ``RECORDS_CITATIONS_REINDEX_WINDOW`` is set, the cited records are
+        not reindexed right away, but added to the ``CitationsReindexQueue``
+        and reindexed by ``flush_citations_reindex_queue`` at the end of the
+        window, together with the ones queued meanwhile by other records.
+
     Raise:
       MissingCitedRecordError in case cited records are not found
     """
@@ -275,11 +346,68 @@ def index_modified_citations_from_record(self, pid_type, pid_value, db_version):
     ]
 
     if uuids:
-        logger.info("({pid_value}) contains pids - starting batch".format(
+        window = current_app.config['RECORDS_CITATIONS_REINDEX_WINDOW']
+        if not window:
+            logger.info("({pid_value}) contains pids - starting batch".format(
+                pid_value=pid_value)
+            )
+            return batch_reindex(uuids)
+
+        logger.info("({pid_value}) contains pids - queueing them".format(
             pid_value=pid_value)
         )
-        return batch_reindex(uuids)
+        if CitationsReindexQueue().push(uuids, window):
+            flush_citations_reindex_queue.apply_async(countdown=window)
+        return None
 
     raise MissingCitedRecordError(
         'Cited records to reindex not found:\nuuids: {}'.format(uuids)
     )
+
+
+def _is_retryable_index_failure(failure):
+    status = failure.get('index', {}).get('status')
+    # Connection errors have no HTTP status, e.g. ``'N/A'``.
+    return not isinstance(status, int) or status == 429 or status >= 500
+
+
+@shared_task(ignore_result=False, bind=True, max_retries=5)
+def flush_citations_reindex_queue(self):
+    """Reindex in one bulk all the records in the ``CitationsReindexQueue``.
+
+    The records whose enhancement fails are logged and dropped, so that a
+    broken record does not prevent the others from being reindexed. If the
+    bulk request fails, or some records fail to index for a reason that may
+    be temporary (e.g. ES rejecting or timing out), these records are put
+    back in the queue and the task retries itself. When the retries are
+    exhausted, they stay in the queue and are reindexed by the next flush.
+    """
+    queue = CitationsReindexQueue()
+    uuids = queue.pop()
+    if not uuids:
+        return None
+
+    countdown = current_app.config['RECORDS_CITATIONS_REINDEX_WINDOW']
+
+    logger.info('Reindexing {} records with modified citations'.format(len(uuids)))
+    try:
+        result = batch_reindex(uuids, skip_failing_records=True)
+    except Exception as e:
+        queue.requeue(uuids)
+        raise self.retry(countdown=countdown, exc=e)
+
+    if result['skipped']:
+        logger.warning('Records with modified citations failed to be enhanced: {}'.format(result['skipped']))
+
+    failed_uuids = [
+        failure['index']['_id'] for failure in result['failures']
+        if '_id' in failure.get('index', {}) and _is_retryable_index_failure(failure)
+    ]
+    if failed_uuids:
+        queue.requeue(failed_uuids)
+        raise self.retry(
+            countdown=countdown,
+            exc=CitationsReindexError('{} records with modified citations failed to index'.format(len(failed_uuids))),
+        )
+
+    return result
@@ -24,8 +24,10 @@
 
 from __future__ import absolute_import, division, print_function
 
+from collections import OrderedDict
 from itertools import chain
 from unicodedata import normalize
+import logging
 import re
 import six
 
@@ -43,6 +45,8 @@ from inspirehep.modules.records.errors import MissingInspireRecordError
 from inspirehep.utils.record_getter import get_db_records
 from inspire_utils.record import get_values_for_schema
 
+LOGGER = logging.getLogger(__name__)
+
 
 def is_author(record):
     return 'authors.json' in record.get('$schema')
@@ -92,26 +96,91 @@ def get_pid_from_record_uri(record_uri):
     return pid_type, pid_value
 
 
+def get_pids_from_references(references):
+    """Return the pids of the records linked in a list of references.
+
+    References not linked to any record will be ignored.
+
+    Args:
+        references (List[dict]): the ``references`` of a record.
+
+    Returns:
+        Set[Tuple[str, str]]: the (pid_type, pid_value) pairs referenced.
+    """
+    pids = set(
+        get_pid_from_record_uri(reference['record']['$ref'])
+        for reference in references
+        if 'record' in reference
+    )
+    pids.discard(None)
+
+    return pids
+
+
+def is_citing_record(record):
+    """Return whether the references of a record count as citations.
+
+    Only records in the Literature collection which are neither deleted nor
+    superseded by another record count as citing records.
+    """
+    if record.get('deleted', False):
+        return False
+
+    if 'Literature' not in record.get('_collections', []):
+        return False
+
+    return not any(
+        related_record.get('relation') == 'successor'
+        for related_record in record.get('related_records', [])
+    )
+
+
+def is_literature_record(record):
+    """Return whether a record is found by searches in the Literature collection."""
+    if record.get('deleted', False):
+        return False
+
+    return 'Literature' in record.get('_collections', [])
+
+
+def get_authors_recids_and_names(record):
+    """Return the authors with a record who signed a record.
+
+    Args:
+        record (dict): a Literature record.
+
+    Returns:
+        dict: the full name of the first signature of each author, keyed by
+        the recid of the author.
+    """
+    result = {}
+    for author in reversed(record.get('authors', [])):
+        pid = get_pid_from_record_uri(get_value(author, 'record.$ref', ''))
+        if pid and pid[0] == 'aut' and pid[1].isdigit():
+            result[int(pid[1])] = author['full_name']
+
+    return result
+
+
 def get_author_display_name(name):
     """Returns the display name in format Firstnames Lastnames"""
     parsed_name = ParsedName.loads(name)
     return " ".join(parsed_name.first_list + parsed_name.last_list)
 
 
-def get_linked_records_in_field(record, field_path):
+def get_linked_records_in_field(record, field_path, fields=None):
     """Get all linked records in a given field.
 
     Args:
         record (dict): the record containing the links
         field_path (string): a dotted field path specification understandable
             by ``get_value``, containing a json reference to another record.
+        fields (Iterable[str]): if passed, only these fields of the linked
+            records are fetched, as in ``get_db_records``.
 
     Returns:
-        Iterator[dict]: an iterator on the linked record.
-
-    Warning:
-        Currently, the order in which the linked records are yielded is
-        different from the order in which they appear in the record.
+        Iterator[dict]: an iterator on the linked record, in the order in
+        which they appear in the record.
 
     Example:
         >>> record = {'references': [
@@ -121,9 +190,55 @@ def get_linked_records_in_field(record, field_path):
         >>> get_linked_record_in_field(record, 'references.record')
         [...]
     """
+    pids = get_linked_pids_in_field(record, field_path)
+    return get_db_records(pids, fields=fields)
+
+
+def get_linked_pids_in_field(record, field_path):
+    """Get the pids of all linked records in a given field.
+
+    Args:
+        record (dict): the record containing the links
+        field_path (string): a dotted field path specification understandable
+            by ``get_value``, containing a json reference to another record.
+
+    Returns:
+        List[Tuple[str, str]]: the (pid_type, pid_value) pairs of the linked
+        records, in the order in which they appear in the record.
+    """
     full_path = '.'.join([field_path, '$ref'])
-    pids = force_list([get_pid_from_record_uri(rec) for rec in get_value(record, full_path, [])])
-    return get_db_records(pids)
+    return force_list([get_pid_from_record_uri(rec) for rec in get_value(record, full_path, [])])
+
+
+def get_linked_records_in_field_of_records(records, field_path, fields=None):
+    """Get all linked records in a given field of many records at once.
+
+    Unlike calling ``get_linked_records_in_field`` on each record, it fetches
+    the linked records of all of them with a single query.
+
+    Args:
+        records (Iterable[dict]): the records containing the links
+        field_path (string): a dotted field path specification understandable
+            by ``get_value``, containing a json reference to another record.
+        fields (Iterable[str]): if passed, only these fields of the linked
+            records are fetched, as in ``get_db_records``. ``$schema`` and
+            ``control_number`` are always fetched.
+
+    Returns:
+        dict: the linked records, keyed by their (pid_type, pid_value).
+    """
+    pids = set(chain.from_iterable(
+        get_linked_pids_in_field(record, field_path) for record in records
+    ))
+    pids.discard(None)
+
+    if fields is not None:
+        fields = set(fields).union(['$schema', 'control_number'])
+
+    return {
+        (get_pid_type_from_schema(linked_record['$schema']), str(linked_record['control_number'])): linked_record
+        for linked_record in get_db_records(pids, fields=fields)
+    }
 
 
 def populate_earliest_date(record):
@@ -149,9 +264,17 @@ def populate_earliest_date(record):
             record['earliest_date'] = result
 
 
-def populate_citations_count(record):
-    """Populate citations_count in ES from"""
-    if hasattr(record, 'get_citations_count'):
+def populate_citations_count(record, citation_count=None):
+    """Populate citations_count in ES from
+
+    Args:
+        record (InspireRecord): the record to populate.
+        citation_count (int): if passed, it will be used instead of getting
+            the count of the record from the DB.
+    """
+    if citation_count is not None:
+        record['citation_count'] = citation_count
+    elif hasattr(record, 'get_citations_count'):
         # Make sure that record has method get_citations_count
         # Session is in commited state here, and I cannot open new one...
         citation_count = record.get_citations_count()
@@ -406,6 +529,10 @@ def populate_authors_full_name_unicode_normalized(record):
         })
 
 
+FACET_AUTHOR_NAME_FIELDS = ['ids', 'name']
+"""Fields of the linked author records used to build ``facet_author_name``."""
+
+
 def get_author_with_record_facet_author_name(author):
     author_ids = author.get('ids', [])
     author_bai = get_values_for_schema(author_ids, 'INSPIRE BAI')
@@ -417,9 +544,25 @@ def get_author_with_record_facet_author_name(author):
         return u'{}_{}'.format(bai, get_author_display_name(author['name']['value']))
 
 
-def populate_facet_author_name(record):
-    """Populate the ``facet_author_name`` field of Literature records."""
-    authors_with_record = get_linked_records_in_field(record, 'authors.record')
+def populate_facet_author_name(record, linked_authors=None):
+    """Populate the ``facet_author_name`` field of Literature records.
+
+    Args:
+        record (dict): the record to populate.
+        linked_authors (dict): if passed, the already resolved author records
+            keyed by (pid_type, pid_value), as returned by
+            ``get_linked_records_in_field_of_records``, instead of getting them
+            from the DB.
+    """
+    if linked_authors is None:
+        authors_with_record = get_linked_records_in_field(
+            record, 'authors.record', fields=FACET_AUTHOR_NAME_FIELDS)
+    else:
+        pids = get_linked_pids_in_field(record, 'authors.record')
+        authors_with_record = [
+            linked_authors[pid] for pid in OrderedDict.fromkeys(pids)
+            if pid in linked_authors
+        ]
     authors_without_record = [author for author in record.get('authors', []) if 'record' not in author]
     result = []
 
@@ -461,3 +604,36 @@ def populate_ui_display(record, serializer):
 
     """
     record['_ui_display'] = serializer().dumps(record).data
+
+
+def populate_export_formats(record, serializers):
+    """Serialize the record in the export formats and store them in
+    `_export_formats`.
+
+    The formats in which the record cannot be serialized are stored in
+    `_export_formats_errors` instead, so that such records can be found
+    in the index before anybody tries to export them.
+
+    Args:
+        record (InspireRecord): record to serialize
+        serializers (dict): serializers, keyed by export format, which can
+            ``serialize_entry`` a record.
+    Returns:
+        None: Data will be added to record dictionary (metadata)
+
+    """
+    export_formats = {}
+    export_formats_errors = []
+    for export_format, serializer in six.iteritems(serializers):
+        try:
+            export_formats[export_format] = serializer.serialize_entry(record)
+        except Exception:
+            LOGGER.exception(
+                'Cannot serialize record %s as %s',
+                record.get('control_number'), export_format)
+            export_formats_errors.append(export_format)
+
+    if export_formats:
+        record['_export_formats'] = export_formats
+    if export_formats_errors:
+        record['_export_formats_errors'] = sorted(export_formats_errors)
@@ -25,15 +25,23 @@
 from __future__ import absolute_import, division, print_function
 
 from functools import partial
+from itertools import islice
 
-from flask import Blueprint, request, abort
+from flask import Blueprint, abort, current_app, request, stream_with_context
 from invenio_rest.views import ContentNegotiatedMethodView
 from invenio_records_rest.views import pass_record
+from werkzeug.utils import import_string
 
 from inspirehep.modules.search import LiteratureSearch
-from inspirehep.modules.search.search_factory import inspire_facets_factory
+from inspirehep.modules.search.search_factory import (
+    EXPORT_SOURCE_EXCLUDES,
+    inspire_export_search_factory,
+    inspire_facets_factory,
+)
+from .permissions import records_export_permission
 from .serializers import json_literature_citations_v1_response, \
     json_literature_search_aggregations_ui_v1
+from .serializers.cache import get_precomputed_entry
 
 blueprint = Blueprint(
     'inspirehep_records',
@@ -130,3 +138,88 @@ blueprint.add_url_rule(
     '/facets',
     view_func=facets_view
 )
+
+
+def _with_full_sources_if_not_precomputed(hits, export_format, chunk_size):
+    """Replace the hits without a precomputed serialization by their records.
+
+    The hits only have the precomputed serialization, so the records of
+    those without it are fetched, with a single request per chunk.
+
+    Args:
+        hits: an iterable of ``(uuid, _source)`` of the hits.
+        export_format (str): the format of the precomputed serializations.
+        chunk_size (int): number of hits looked at a time.
+
+    Yields:
+        dict: the ``_source`` of every hit, or of its record.
+    """
+    hits = iter(hits)
+    chunk = list(islice(hits, chunk_size))
+    while chunk:
+        missing_uuids = [
+            uuid for uuid, source in chunk
+            if not get_precomputed_entry(source, export_format)
+        ]
+        records = {}
+        if missing_uuids:
+            records = {
+                record['control_number']: record
+                for record in LiteratureSearch().mget(missing_uuids, _source_exclude=EXPORT_SOURCE_EXCLUDES)
+            }
+
+        for _, source in chunk:
+            yield records.get(source.get('control_number'), source)
+        chunk = list(islice(hits, chunk_size))
+
+
+def literature_export():
+    """Export all the Literature records matching a query.
+
+    The records are scrolled from Elasticsearch and serialized in the
+    ``format`` of the request, one of ``RECORDS_EXPORT_FORMATS``, and the
+    response is streamed a chunk of ``RECORDS_EXPORT_CHUNK_SIZE`` records
+    at a time. The serializations precomputed at index time, if any, are
+    fetched alone and used as they are, and only the records without them
+    are fetched whole.
+
+    Queries matching more than ``RECORDS_EXPORT_MAX_RESULTS`` records, or
+    ``RECORDS_EXPORT_CURATOR_MAX_RESULTS`` for the users allowed to
+    ``export-records``, are rejected.
+    """
+    export_format = request.values.get('format', 'bibtex')
+    if export_format not in current_app.config['RECORDS_EXPORT_FORMATS']:
+        abort(400)
+
+    serializer, mimetype, extension = current_app.config['RECORDS_EXPORT_FORMATS'][export_format]
+    serializer = import_string(serializer)
+    chunk_size = current_app.config['RECORDS_EXPORT_CHUNK_SIZE']
+
+    search = inspire_export_search_factory(LiteratureSearch(), export_format)
+    if records_export_permission.can():
+        max_results = current_app.config['RECORDS_EXPORT_CURATOR_MAX_RESULTS']
+    else:
+        max_results = current_app.config['RECORDS_EXPORT_MAX_RESULTS']
+    if search.count() > max_results:
+        abort(400, 'Cannot export more than {} records, narrow down the query.'.format(max_results))
+
+    search = search.params(size=chunk_size, preserve_order='sort' in request.values)
+    hits = ((hit.meta.id, hit.to_dict()) for hit in search.scan())
+    if export_format in current_app.config['RECORDS_PRECOMPUTED_EXPORT_FORMATS']:
+        records = _with_full_sources_if_not_precomputed(hits, export_format, chunk_size)
+    else:
+        records = (source for _, source in hits)
+
+    response = current_app.response_class(
+        stream_with_context(serializer.serialize_stream(records, chunk_size, export_format)),
+        mimetype=mimetype,
+    )
+    response.headers['Content-Disposition'] = \
+        'attachment; filename=literature.{}'.format(extension)
+    return response
+
+
+blueprint.add_url_rule(
+    '/export',
+    view_func=literature_export
+)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Cache of the references extracted by refextract."""
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import logging
+import tempfile
+
+import refextract
+import requests
+from flask import current_app
+from redis import StrictRedis
+from redis.exceptions import RedisError
+from six import text_type
+
+from inspirehep.utils.references import get_journal_kb, hash_file
+from inspirehep.utils.url import make_user_agent_string
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_kbs_version(override_kbs_files):
+    """Return a version of the knowledge bases passed to refextract.
+
+    Args:
+        override_kbs_files (dict): the paths of the knowledge bases, as
+            yielded by ``local_refextract_kbs_path``.
+
+    Returns:
+        str: the hash of the contents of the knowledge bases.
+    """
+    journal_kb = get_journal_kb()
+
+    digest = hashlib.sha1()
+    for name, path in sorted((override_kbs_files or {}).items()):
+        # The local copy of the journal KB is already hashed.
+        kb_hash = journal_kb.version if path == journal_kb.path else hash_file(path)
+        digest.update(name.encode('utf-8'))
+        digest.update(kb_hash.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class RefextractCache(object):
+    """References extracted from documents, keyed by content.
+
+    The key of an extraction is made of the hash of the document, the
+    version of the knowledge bases and the options passed to refextract, so
+    that the same PDF attached to a restarted workflow or sent again by a
+    curator is extracted only once, until the journal KB changes.
+
+    The entries are kept in Redis for ``REFEXTRACT_CACHE_TTL`` seconds. At
+    most ``REFEXTRACT_CACHE_SIZE`` of them are kept, the oldest ones are
+    evicted first.
+    """
+
+    KEY_PREFIX = 'refextract:results'
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = StrictRedis.from_url(current_app.config['CACHE_REDIS_URL'])
+        return self._redis
+
+    def _key(self, name):
+        return '{}:{}'.format(self.KEY_PREFIX, name)
+
+    @staticmethod
+    def get_key(function, content_hash, override_kbs_files, **kwargs):
+        """Return the key of an extraction.
+
+        Args:
+            function (str): the name of the refextract function.
+            content_hash (str): the hash of the document.
+            override_kbs_files (dict): the knowledge bases used.
+            kwargs: the other options passed to refextract.
+
+        Returns:
+            str: the key of the extraction.
+        """
+        options = json.dumps(kwargs, sort_keys=True)
+        return hashlib.sha1(u'|'.join([
+            function,
+            content_hash,
+            get_kbs_version(override_kbs_files),
+            options,
+        ]).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached references of an extraction, or None."""
+        value = self.redis.get(self._key(key))
+        if value is None:
+            return None
+        return json.loads(value.decode('utf-8') if isinstance(value, bytes) else value)
+
+    def set(self, key, references):
+        """Cache the references of an extraction, evicting the oldest ones."""
+        added = self.redis.set(
+            self._key(key),
+            json.dumps(references),
+            ex=current_app.config['REFEXTRACT_CACHE_TTL'],
+            nx=True,
+        )
+        if not added:
+            return
+
+        pipeline = self.redis.pipeline()
+        pipeline.lpush(self._key('keys'), key)
+        pipeline.llen(self._key('keys'))
+        _, size = pipeline.execute()
+
+        excess = size - current_app.config['REFEXTRACT_CACHE_SIZE']
+        if excess <= 0:
+            return
+
+        pipeline = self.redis.pipeline()
+        for _ in range(excess):
+            pipeline.rpop(self._key('keys'))
+        evicted = [evicted_key for evicted_key in pipeline.execute() if evicted_key]
+        if evicted:
+            self.redis.delete(*[self._key(
+                evicted_key.decode('utf-8') if isinstance(evicted_key, bytes) else evicted_key
+            ) for evicted_key in evicted])
+
+
+def _extract_cached(function, document, content_hash, override_kbs_files, **kwargs):
+    extract = getattr(refextract, function)
+    if not current_app.config['REFEXTRACT_CACHE_SIZE']:
+        return extract(document, override_kbs_files=override_kbs_files, **kwargs)
+
+    cache = RefextractCache()
+    key = cache.get_key(function, content_hash, override_kbs_files, **kwargs)
+    try:
+        references = cache.get(key)
+    except RedisError:
+        LOGGER.exception('Cannot read the cached references of %s', key)
+        references = None
+
+    if references is not None:
+        LOGGER.info('Using the cached references of %s', key)
+        return references
+
+    references = extract(document, override_kbs_files=override_kbs_files, **kwargs)
+    try:
+        cache.set(key, references)
+    except RedisError:
+        LOGGER.exception('Cannot cache the references of %s', key)
+
+    return references
+
+
+def extract_references_from_file(path, override_kbs_files=None, **kwargs):
+    """Cached version of ``refextract.extract_references_from_file``."""
+    return _extract_cached(
+        'extract_references_from_file', path, hash_file(path), override_kbs_files, **kwargs)
+
+
+def extract_references_from_string(source, override_kbs_files=None, **kwargs):
+    """Cached version of ``refextract.extract_references_from_string``."""
+    content = source.encode('utf-8') if isinstance(source, text_type) else source
+    content_hash = hashlib.sha1(content).hexdigest()
+    return _extract_cached(
+        'extract_references_from_string', source, content_hash, override_kbs_files, **kwargs)
+
+
+def extract_references_from_url(url, override_kbs_files=None, **kwargs):
+    """Cached version of ``refextract.extract_references_from_url``.
+
+    The document is downloaded first, so that it is cached by its content
+    rather than by its URL.
+    """
+    response = requests.get(
+        url,
+        headers={'User-Agent': make_user_agent_string('refextract')},
+        stream=True,
+    )
+    response.raise_for_status()
+
+    with tempfile.NamedTemporaryFile(prefix='inspire') as local_file:
+        for chunk in response.iter_content(chunk_size=1 << 16):
+            local_file.write(chunk)
+        local_file.flush()
+
+        return extract_references_from_file(local_file.name, override_kbs_files, **kwargs)
@@ -224,3 +224,8 @@ REFERENCE_MATCHER_DATA_CONFIG = {
 }
 """Configuration for matching data records. Please note that the
 index and doc_type are different for data records."""
+
+
+REFERENCE_MATCHER_MSEARCH_CHUNK_SIZE = 500
+"""Maximum number of matcher queries sent together in a single ``msearch``
+by ``match_references``."""
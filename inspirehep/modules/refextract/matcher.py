@@ -22,13 +22,26 @@
 
 from __future__ import absolute_import, division, print_function
 
+import logging
+
+from flask import current_app
+from redis.exceptions import RedisError
+from werkzeug.utils import import_string
+
+from invenio_search import current_search_client as es
+
 from inspire_dojson.utils import get_record_ref, get_recid_from_ref
 from inspire_matcher import match
+from inspire_matcher.core import compile
 from inspire_utils.dedupers import dedupe_list
+from inspire_utils.helpers import force_list
 from inspire_utils.record import get_value
 
+from inspirehep.modules.records.identifiers import IdentifiersIndex
 from inspirehep.modules.refextract import config
 
+LOGGER = logging.getLogger(__name__)
+
 
 def _add_match_to_reference(reference, matched_recid, es_index):
     """Modifies a reference to include its record id."""
@@ -57,8 +70,10 @@ def match_reference_with_config(reference, config, previous_matched_recid=None):
     except KeyError:
         pass
 
-    matched_recids = [matched_record['_source']['control_number'] for matched_record in match(reference, config)]
-    matched_recids = dedupe_list(matched_recids)
+    matched_recids = _match_with_identifiers_index([reference], [config])[0]
+    if matched_recids is None:
+        matched_recids = [matched_record['_source']['control_number'] for matched_record in match(reference, config)]
+        matched_recids = dedupe_list(matched_recids)
 
     same_as_previous = any(matched_recid == previous_matched_recid for matched_recid in matched_recids)
     if len(matched_recids) == 1:
@@ -76,6 +91,59 @@ def match_reference_with_config(reference, config, previous_matched_recid=None):
     return reference
 
 
+def _match_with_identifiers_index(references, matcher_configs):
+    """Match references by their unique identifiers with the ``IdentifiersIndex``.
+
+    Only the references to match with ``REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG``
+    are looked up, and only if the index is enabled and loaded.
+
+    Returns:
+        list: the record ids matched by each reference, or None if it has to
+        be matched with Elasticsearch instead.
+    """
+    results = [None] * len(references)
+    if not current_app.config['RECORDS_IDENTIFIERS_INDEX_ENABLED']:
+        return results
+
+    positions = [
+        position for position, matcher_config in enumerate(matcher_configs)
+        if matcher_config is config.REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG
+    ]
+    if not positions:
+        return results
+
+    try:
+        index = IdentifiersIndex()
+        if not index.is_loaded():
+            return results
+        recids = index.get_recids([references[position] for position in positions])
+    except RedisError:
+        LOGGER.exception('Cannot match references with the identifiers index')
+        return results
+
+    # A reference without local matches might still match in ES, e.g. a
+    # record not yet in the index.
+    for position, matched_recids in zip(positions, recids):
+        if matched_recids:
+            results[position] = matched_recids
+
+    return results
+
+
+def _get_configs(reference):
+    """Return the inspire-matcher configurations of a reference, in the
+    order in which they are tried."""
+    journal_title = get_value(reference, 'reference.publication_info.journal_title')
+    config_publication_info = config.REFERENCE_MATCHER_JHEP_AND_JCAP_PUBLICATION_INFO_CONFIG if \
+        journal_title in ['JCAP', 'JHEP'] else config.REFERENCE_MATCHER_DEFAULT_PUBLICATION_INFO_CONFIG
+
+    return [
+        config.REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG,
+        config_publication_info,
+        config.REFERENCE_MATCHER_DATA_CONFIG,
+    ]
+
+
 def match_reference(reference, previous_matched_recid=None):
     """Match a reference using inspire-matcher.
 
@@ -90,16 +158,7 @@ def match_reference(reference, previous_matched_recid=None):
     if reference.get('curated_relation'):
         return reference
 
-    config_unique_identifiers = config.REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG
-    config_default_publication_info = config.REFERENCE_MATCHER_DEFAULT_PUBLICATION_INFO_CONFIG
-    config_jcap_and_jhep_publication_info = config.REFERENCE_MATCHER_JHEP_AND_JCAP_PUBLICATION_INFO_CONFIG
-    config_data = config.REFERENCE_MATCHER_DATA_CONFIG
-
-    journal_title = get_value(reference, 'reference.publication_info.journal_title')
-    config_publication_info = config_jcap_and_jhep_publication_info if \
-        journal_title in ['JCAP', 'JHEP'] else config_default_publication_info
-
-    configs = [config_unique_identifiers, config_publication_info, config_data]
+    configs = _get_configs(reference)
 
     matches = (match_reference_with_config(reference, config, previous_matched_recid) for config in configs)
     matches = (matched_record for matched_record in matches if 'record' in matched_record)
@@ -108,20 +167,170 @@ def match_reference(reference, previous_matched_recid=None):
     return reference
 
 
+def _cast_year(reference, cast):
+    # XXX: avoid this type casting.
+    try:
+        reference['reference']['publication_info']['year'] = cast(
+            reference['reference']['publication_info']['year'])
+    except KeyError:
+        pass
+
+
+def _get_validator(validator):
+    if validator is None:
+        return lambda record, result: True
+    if callable(validator):
+        return validator
+    return import_string(validator)
+
+
+def _compile_queries(reference, matcher_config):
+    """Compile the queries of an inspire-matcher configuration for a reference.
+
+    Returns:
+        list: the ``(header, body, validators)`` of the searches to run, as
+        ``inspire_matcher.match`` would run them.
+    """
+    header = {'index': matcher_config['index'], 'type': matcher_config['doc_type']}
+    collections = matcher_config.get('collections')
+    match_deleted = matcher_config.get('match_deleted', False)
+
+    searches = []
+    for step in matcher_config['algorithm']:
+        validators = [_get_validator(validator) for validator in force_list(step.get('validator'))]
+        validators = validators or [_get_validator(None)]
+        for query in step['queries']:
+            body = compile(query, reference, collections=collections, match_deleted=match_deleted)
+            if not body:
+                continue
+
+            body['size'] = matcher_config.get('size', 10)
+            if matcher_config.get('source'):
+                body['_source'] = matcher_config['source']
+            searches.append((header, body, validators))
+
+    return searches
+
+
+def _msearch(searches):
+    """Run many searches with as few ``msearch`` requests as possible.
+
+    Args:
+        searches (list): the ``(header, body)`` of each search.
+
+    Returns:
+        list: the hits of each search, in the same order.
+    """
+    chunk_size = config.REFERENCE_MATCHER_MSEARCH_CHUNK_SIZE
+
+    results = []
+    for start in range(0, len(searches), chunk_size):
+        body = []
+        for header, query in searches[start:start + chunk_size]:
+            body.extend([header, query])
+
+        for response in es.msearch(body=body)['responses']:
+            if 'error' in response:
+                LOGGER.error('Cannot match reference: %s', response['error'])
+                results.append([])
+            else:
+                results.append(response['hits']['hits'])
+
+    return results
+
+
+def _get_matched_recids(references, matcher_configs):
+    """Get the record ids matched by each reference with its configuration.
+
+    The queries of all the references are sent together, except for the
+    references matched by the ``IdentifiersIndex``.
+
+    Args:
+        references (list): the references to match.
+        matcher_configs (list): the inspire-matcher configuration of each
+            reference.
+
+    Returns:
+        list: the deduplicated record ids matched by each reference.
+    """
+    local_matched_recids = _match_with_identifiers_index(references, matcher_configs)
+
+    searches, owners = [], []
+    for reference, matcher_config, local_recids in zip(references, matcher_configs, local_matched_recids):
+        if local_recids is not None:
+            continue
+        for header, body, validators in _compile_queries(reference, matcher_config):
+            searches.append((header, body))
+            owners.append((reference, validators))
+
+    matched_recids = {id(reference): [] for reference in references}
+    for (reference, validators), hits in zip(owners, _msearch(searches)):
+        for hit in hits:
+            if all(validator(reference, hit) for validator in validators):
+                matched_recids[id(reference)].append(hit['_source']['control_number'])
+
+    return [
+        local_recids if local_recids is not None else dedupe_list(matched_recids[id(reference)])
+        for reference, local_recids in zip(references, local_matched_recids)
+    ]
+
+
 def match_references(references):
     """Match references to their respective records in INSPIRE.
 
+    This gives the same result as calling ``match_reference`` on each
+    reference in turn, but with a few round trips to Elasticsearch. First,
+    each configuration is tried in turn on all the references that it might
+    match, with one ``msearch``. Then the matches are chosen in order,
+    breaking the ties with the record id of the previous matched reference.
+
     Args:
         references (list): the list of references.
 
     Returns:
         list: the matched references.
     """
-    matched_references, previous_matched_recid = [], None
-    for ref in references:
-        ref = match_reference(ref, previous_matched_recid)
-        matched_references.append(ref)
-        if 'record' in ref:
-            previous_matched_recid = get_recid_from_ref(ref['record'])
-
-    return matched_references
+    references = list(references)
+    to_match = [reference for reference in references if not reference.get('curated_relation')]
+
+    configs, matched_recids = {}, {}
+    for reference in to_match:
+        _cast_year(reference, str)
+        configs[id(reference)] = _get_configs(reference)
+        # A reference that is already linked stops at the first configuration.
+        if 'record' in reference:
+            configs[id(reference)] = configs[id(reference)][:1]
+        matched_recids[id(reference)] = []
+
+    pending = to_match
+    while pending:
+        stage = len(matched_recids[id(pending[0])])
+        stage_matched_recids = _get_matched_recids(
+            pending, [configs[id(reference)][stage] for reference in pending])
+        for reference, recids in zip(pending, stage_matched_recids):
+            matched_recids[id(reference)].append(recids)
+
+        # When there is a single match, the next configurations are never
+        # tried, otherwise they might be, depending on the previous match.
+        pending = [
+            reference for reference in pending
+            if len(matched_recids[id(reference)][-1]) != 1 and
+            len(matched_recids[id(reference)]) < len(configs[id(reference)])
+        ]
+
+    previous_matched_recid = None
+    for reference in references:
+        if id(reference) in matched_recids:
+            for matcher_config, recids in zip(configs[id(reference)], matched_recids[id(reference)]):
+                if len(recids) == 1:
+                    _add_match_to_reference(reference, recids[0], matcher_config['index'])
+                    break
+                elif previous_matched_recid in recids:
+                    _add_match_to_reference(reference, previous_matched_recid, matcher_config['index'])
+                    break
+            _cast_year(reference, int)
+
+        if 'record' in reference:
+            previous_matched_recid = get_recid_from_ref(reference['record'])
+
+    return references
@@ -24,18 +24,71 @@
 
 from __future__ import absolute_import, division, print_function
 
+import json
+from datetime import datetime, timedelta
+from io import BytesIO
+
 from celery import shared_task
+from celery.utils.log import get_task_logger
 from flask import current_app
+from fs.errors import FSError
+from fs.opener import fsopen
 from invenio_db import db
 
-from inspirehep.modules.refextract.utils import KbWriter
+from inspirehep.modules.refextract.utils import KbWriter, write_file
+
+LOGGER = get_task_logger(__name__)
+
+
+JOURNAL_KB_UPDATED_OVERLAP = timedelta(minutes=5)
+"""Journals updated this long before the previous build are read again by
+an incremental build, in case their transaction was not yet committed."""
+
+
+JOURNALS_QUERY = """
+    SELECT
+        r.id,
+        r.json -> '_collections' AS collections,
+        r.json -> 'short_title' AS short_title,
+        r.json -> 'journal_title' -> 'title' AS journal_title,
+        r.json -> 'title_variants' AS title_variants
+    FROM
+        records_metadata AS r
+    WHERE
+        {condition}
+"""
+
+
+def get_journal_kb_state_path(kb_path):
+    """Return the path of the state of the journal KB at ``kb_path``."""
+    return kb_path + '.state.json'
+
+
+def _read_journal_kb_state(kb_path):
+    try:
+        with fsopen(get_journal_kb_state_path(kb_path), mode='rb') as state_file:
+            state = json.loads(state_file.read().decode('utf-8'))
+        state['updated'] = datetime.strptime(state['updated'], '%Y-%m-%dT%H:%M:%S.%f')
+    except (FSError, IOError, KeyError, ValueError):
+        LOGGER.warning('Cannot read the state of the journal KB %s', kb_path)
+        return None
+
+    return state
+
+
+def _write_journal_kb_state(kb_path, state):
+    content = json.dumps({
+        'updated': state['updated'].strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        'journals': state['journals'],
+    }, sort_keys=True)
+    write_file(get_journal_kb_state_path(kb_path), BytesIO(content.encode('utf-8')))
 
 
 @shared_task()
-def create_journal_kb_file():
+def create_journal_kb_file(incremental=False):
     """Populate refextracts's journal KB from the database.
 
-    Uses two raw DB queries that use syntax specific to PostgreSQL to generate
+    Uses a raw DB query that uses syntax specific to PostgreSQL to generate
     a file in the format that refextract expects, that is a list of lines like::
 
         SOURCE---DESTINATION
@@ -45,42 +98,62 @@ def create_journal_kb_file():
     Note that refextract expects ``SOURCE`` to be normalized, which means removing
     all non alphanumeric characters, collapsing all contiguous whitespace to one
     space and uppercasing the resulting string.
+
+    The titles of the journals are saved next to the KB, together with the
+    time of the build, so that an ``incremental`` build only reads the
+    records updated since the previous one. The KB is then written again
+    from the saved titles, so it is the same as after a full build.
+
+    Args:
+        incremental (bool): whether to only read the records updated since
+            the previous build. A full build is done if there is none.
     """
     refextract_journal_kb_path = current_app.config['REFEXTRACT_JOURNAL_KB_PATH']
+    started = datetime.utcnow()
 
-    titles_query = db.session.execute("""
-        SELECT
-            r.json -> 'short_title' AS short_title,
-            r.json -> 'journal_title' -> 'title' AS journal_title
-        FROM
-            records_metadata AS r
-        WHERE
-            (r.json -> '_collections')::jsonb ? 'Journals'
-    """)
-
-    title_variants_query = db.session.execute("""
-        SELECT
-            r.json -> 'short_title' AS short_title,
-            jsonb_array_elements((r.json -> 'title_variants')::jsonb) AS title_variant
-        FROM
-            records_metadata AS r
-        WHERE
-            (r.json -> '_collections')::jsonb ? 'Journals'
-    """)
+    state = _read_journal_kb_state(refextract_journal_kb_path) if incremental else None
+    if state:
+        LOGGER.info('Updating the journal KB with the records updated since %s', state['updated'])
+        journals_query = db.session.execute(JOURNALS_QUERY.format(
+            condition='r.updated >= :since',
+        ), {'since': state['updated'] - JOURNAL_KB_UPDATED_OVERLAP})
+    else:
+        state = {'journals': {}}
+        journals_query = db.session.execute(JOURNALS_QUERY.format(
+            condition="(r.json -> '_collections')::jsonb ? 'Journals'",
+        ))
 
+    journals = state['journals']
+    for row in journals_query:
+        # A record that is no longer a journal has to leave the KB.
+        if 'Journals' not in (row['collections'] or []):
+            journals.pop(str(row['id']), None)
+            continue
+
+        journals[str(row['id'])] = {
+            'short_title': row['short_title'],
+            'journal_title': row['journal_title'],
+            'title_variants': row['title_variants'] or [],
+        }
+
+    # As in the KB built before, the title variants come after all the titles.
     with KbWriter(kb_path=refextract_journal_kb_path) as kb_fd:
-        for row in titles_query:
+        for _, journal in sorted(journals.items()):
             kb_fd.add_entry(
-                value=row['short_title'],
-                kb_key=row['short_title'],
+                value=journal['short_title'],
+                kb_key=journal['short_title'],
             )
             kb_fd.add_entry(
-                value=row['journal_title'],
-                kb_key=row['short_title'],
+                value=journal['journal_title'],
+                kb_key=journal['short_title'],
             )
 
-        for row in title_variants_query:
-            kb_fd.add_entry(
-                value=row['title_variant'],
-                kb_key=row['short_title'],
-            )
+        for _, journal in sorted(journals.items()):
+            for title_variant in journal['title_variants']:
+                kb_fd.add_entry(
+                    value=title_variant,
+                    kb_key=journal['short_title'],
+                )
+
+    state['updated'] = started
+    _write_journal_kb_state(refextract_journal_kb_path, state)
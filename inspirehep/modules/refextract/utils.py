@@ -22,10 +22,11 @@
 """Refextract utils."""
 from __future__ import absolute_import, division, print_function
 
+import os
 import re
 
 import codecs
-from tempfile import TemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryFile
 from fs.opener import fsopen
 from inspirehep.utils.url import copy_file
 
@@ -33,6 +34,32 @@ from inspirehep.utils.url import copy_file
 RE_PUNCTUATION = re.compile(r"[\.,;'\(\)-]", re.UNICODE)
 
 
+def write_file(path, src_file):
+    """Write the contents of an open file to ``path``.
+
+    Local files are replaced atomically, so that readers never see a half
+    written file: the contents are written to a temporary file in the same
+    directory, which is then renamed. Other URIs are written in place.
+    """
+    if '://' in path:
+        with fsopen(path, mode='wb') as dst_file:
+            copy_file(src_file, dst_file)
+        return
+
+    directory, name = os.path.split(os.path.abspath(path))
+    with NamedTemporaryFile(prefix=name, dir=directory, delete=False) as dst_file:
+        try:
+            copy_file(src_file, dst_file)
+            dst_file.flush()
+            os.fsync(dst_file.fileno())
+        except Exception:
+            os.remove(dst_file.name)
+            raise
+    # Temporary files are only readable by their owner.
+    os.chmod(dst_file.name, 0o644)
+    os.rename(dst_file.name, path)
+
+
 class KbWriter(object):
     def __init__(self, kb_path):
         self.kb_path = kb_path
@@ -56,8 +83,7 @@ class KbWriter(object):
     def _close(self):
         try:
             self.local_file.seek(0)
-            with fsopen(self.kb_path, mode='wb') as kb_file:
-                copy_file(self.local_file, kb_file)
+            write_file(self.kb_path, self.local_file)
         finally:
             self.local_file.close()
 
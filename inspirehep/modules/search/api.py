@@ -82,7 +82,7 @@ class SearchMixin(object):
                 body={'ids': uuids},
                 **kwargs
             )
-            results = [document['_source'] for document in documents['docs']]
+            results = [document['_source'] for document in documents['docs'] if document.get('found')]
         except RequestError:
             pass
 
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Cache of the responses of Elasticsearch to search requests."""
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+
+from flask import current_app
+from redis import StrictRedis
+
+
+class SearchResponseCache(object):
+    """Responses of Elasticsearch to search and facets requests.
+
+    The responses are kept in Redis for ``SEARCH_RESPONSE_CACHE_TTL`` seconds,
+    keyed by everything in a request which changes the response: the kind of
+    request, the index, the normalized query, the other arguments (filters,
+    sort, page and size) and the ``Accept`` header.
+
+    The key also contains the generation of the index, which is incremented
+    by :meth:`invalidate`, e.g. when an index is rebuilt and swapped, so that
+    all the responses cached before are not found anymore.
+
+    Counters of the hits and misses are kept in Redis as well, see
+    :meth:`stats`.
+    """
+
+    KEY_PREFIX = 'search:responses'
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = StrictRedis.from_url(current_app.config['CACHE_REDIS_URL'])
+        return self._redis
+
+    def _key(self, *names):
+        return ':'.join((self.KEY_PREFIX,) + names)
+
+    def get_generation(self, index):
+        return int(self.redis.get(self._key('generation', index)) or 0)
+
+    def make_key(self, kind, index, args, accept=None):
+        """Return the cache key of a request.
+
+        Args:
+            kind (str): the kind of request, e.g. ``'search'`` or ``'facets'``.
+            index (str): the index searched.
+            args (werkzeug.datastructures.MultiDict): the arguments of the request.
+            accept (str): the ``Accept`` header of the request.
+
+        Returns:
+            str: the key.
+        """
+        query_string = u' '.join(args.get('q', u'').split())
+        other_args = sorted(
+            (name, value) for name, value in args.items(multi=True)
+            if name != 'q'
+        )
+        request = json.dumps([query_string, other_args, accept], sort_keys=True)
+        digest = hashlib.sha1(request.encode('utf-8')).hexdigest()
+
+        return self._key(kind, index, str(self.get_generation(index)), digest)
+
+    def get(self, key):
+        """Return the cached response for a key, or ``None`` if missing."""
+        response = self.redis.get(key)
+        self.redis.hincrby(self._key('stats'), 'misses' if response is None else 'hits', 1)
+        if response is None:
+            return None
+
+        if isinstance(response, bytes):
+            response = response.decode('utf-8')
+        return json.loads(response)
+
+    def set(self, key, response, ttl):
+        """Cache a response.
+
+        Args:
+            key (str): the key, as returned by :meth:`make_key`.
+            response (dict): the raw response of Elasticsearch.
+            ttl (int): seconds after which the response expires.
+        """
+        self.redis.set(key, json.dumps(response), ex=ttl)
+
+    def invalidate(self, index):
+        """Forget all the cached responses of an index."""
+        self.redis.incr(self._key('generation', index))
+
+    def stats(self):
+        """Return the counters of the cache.
+
+        Returns:
+            dict: the number of ``hits`` and ``misses`` and the ``hit_rate``.
+        """
+        counters = self.redis.hgetall(self._key('stats'))
+        stats = {
+            name: int(counters.get(name, counters.get(name.encode('utf-8'), 0)))
+            for name in ('hits', 'misses')
+        }
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+
+        return stats
+
+    def reset_stats(self):
+        self.redis.delete(self._key('stats'))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Manage the search response cache."""
+
+from __future__ import absolute_import, division, print_function
+
+import click
+
+from flask.cli import with_appcontext
+
+from .cache import SearchResponseCache
+
+
+@click.group()
+def search_cache():
+    """Commands to inspect and invalidate the search response cache."""
+
+
+@search_cache.command()
+@click.option('--reset', is_flag=True, default=False,
+              help='Reset the counters after printing them.')
+@with_appcontext
+def stats(reset):
+    """Print the hits and misses of the cache."""
+    cache = SearchResponseCache()
+    stats = cache.stats()
+    click.echo('hits: {hits}\nmisses: {misses}\nhit rate: {hit_rate:.2%}'.format(**stats))
+
+    if reset:
+        cache.reset_stats()
+
+
+@search_cache.command()
+@click.option('--index', default='records-hep', show_default=True,
+              help='Index whose cached responses are forgotten.')
+@with_appcontext
+def invalidate(index):
+    """Forget all the cached responses of an index."""
+    SearchResponseCache().invalidate(index)
+    click.secho('Invalidated the cached responses of {}'.format(index), fg='green')
@@ -24,6 +24,7 @@
 
 from __future__ import absolute_import, division, print_function
 
+from .cli import search_cache
 from .views import blueprint
 
 
@@ -34,4 +35,5 @@ class InspireSearch(object):
 
     def init_app(self, app):
         app.register_blueprint(blueprint)
+        app.cli.add_command(search_cache)
         app.extensions['inspire-search'] = self
@@ -24,15 +24,107 @@
 
 from __future__ import absolute_import, division, print_function
 
+import io
+import logging
+from collections import Counter
+from copy import deepcopy
+
 from elasticsearch_dsl import Q
+from flask import current_app
+from time_execution import write_metric
 
 import inspire_query_parser
 
+from inspirehep.utils.cache import LRUCache
+
+LOGGER = logging.getLogger(__name__)
+
+_parsed_queries = None
+
+
+def get_parsed_queries_cache():
+    """Return the cache of the queries parsed by ``parse_query``.
+
+    It has size ``SEARCH_QUERY_PARSER_CACHE_SIZE``. When it is created, it is
+    warmed up with the ``SEARCH_QUERY_PARSER_CACHE_WARMUP_SIZE`` most
+    frequent queries in ``SEARCH_QUERY_PARSER_CACHE_WARMUP_FILE``, if set.
+    """
+    global _parsed_queries
+    if _parsed_queries is None:
+        _parsed_queries = LRUCache(
+            maxsize=current_app.config['SEARCH_QUERY_PARSER_CACHE_SIZE'])
+
+        warmup_file = current_app.config['SEARCH_QUERY_PARSER_CACHE_WARMUP_FILE']
+        if warmup_file:
+            with io.open(warmup_file, encoding='utf-8') as queries:
+                warm_parsed_queries_cache(
+                    queries, current_app.config['SEARCH_QUERY_PARSER_CACHE_WARMUP_SIZE'])
+
+    return _parsed_queries
+
+
+def warm_parsed_queries_cache(queries, size=None):
+    """Parse the most frequent queries of a log and put them in the cache.
+
+    Args:
+        queries (Iterable[str]): a query per item, e.g. the lines of a log
+            of the queries sent by the users. Queries which cannot be parsed
+            are skipped.
+        size (int): maximum number of queries parsed, by default as many as
+            fit in the cache.
+
+    Returns:
+        int: the number of queries added to the cache.
+    """
+    cache = get_parsed_queries_cache()
+    counter = Counter(query.strip() for query in queries)
+    counter.pop('', None)
+
+    # From the least frequent, so that the most frequent are evicted last.
+    most_common = counter.most_common(cache.maxsize if size is None else min(size, cache.maxsize))
+    added = 0
+    for query_string, _ in reversed(most_common):
+        try:
+            cache.set(query_string, inspire_query_parser.parse_query(query_string))
+            added += 1
+        except Exception:
+            LOGGER.warning('Cannot parse query %r to warm up the cache', query_string)
+
+    return added
+
+
+def parse_query(query_string):
+    """Parse a query with ``inspire_query_parser``, caching the result.
+
+    The search and facets requests of the same page send the same query, so
+    it is parsed only once. The hit rate of the cache is written as a metric
+    every ``SEARCH_QUERY_PARSER_CACHE_METRIC_INTERVAL`` queries.
+
+    Returns:
+        dict: the Elasticsearch query, which the caller can modify.
+    """
+    cache = get_parsed_queries_cache()
+
+    query = cache.get(query_string)
+    if query is None:
+        query = inspire_query_parser.parse_query(query_string)
+        cache.set(query_string, query)
+
+    lookups = cache.hits + cache.misses
+    if lookups % current_app.config['SEARCH_QUERY_PARSER_CACHE_METRIC_INTERVAL'] == 0:
+        write_metric(
+            name='inspirehep.modules.search.query_factory.parse_query',
+            value=cache.hit_rate,
+            lookups=lookups,
+        )
+
+    return deepcopy(query)
+
 
 def inspire_query_factory():
     """Create an Elastic Search DSL query instance using the generated Elastic Search query by the parser."""
 
     def inspire_query(query_string, search):
-        return Q(inspire_query_parser.parse_query(query_string))
+        return Q(parse_query(query_string))
 
     return inspire_query
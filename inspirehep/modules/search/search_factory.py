@@ -32,11 +32,16 @@ from invenio_records_rest.errors import InvalidQueryRESTError
 from invenio_records_rest.facets import _aggregations, _query_filter, \
     _post_filter
 from invenio_records_rest.sorter import default_sorter_factory
+from redis.exceptions import RedisError
 from werkzeug.datastructures import MultiDict
 
 from inspirehep.modules.search import LiteratureSearch
+from inspirehep.modules.search.cache import SearchResponseCache
 from inspirehep.modules.search.utils import get_facet_configuration
 
+EXPORT_SOURCE_EXCLUDES = ['_ui_display', '_export_formats']
+"""Fields of the records not needed to serialize them in an export."""
+
 
 def select_source(search):
     """If search_idex is records-hep it filters the output to get only
@@ -123,18 +128,52 @@ def inspire_filter_factory(search, urlkwargs, search_index):
     return search, urlkwargs
 
 
-def inspire_search_factory(self, search):
-    """Parse query using Inspire-Query-Parser.
+def get_search_cache_key(search, kind):
+    """Return the key of the cached response of a search request.
 
-    :param self: REST view.
-    :param search: Elastic search DSL search instance.
-    :returns: Tuple with search instance and URL arguments.
+    Only the responses of Literature searches are cached, if
+    ``SEARCH_RESPONSE_CACHE_TTL`` is set and Redis is available.
+
+    Args:
+        search: Elastic search DSL search instance.
+        kind (str): the kind of request, e.g. ``'search'`` or ``'facets'``.
+
+    Returns:
+        str: the key, or ``None`` if the response must not be cached.
     """
-    query_string = request.values.get('q', '')
-    urlkwargs = MultiDict()
+    if not current_app.config['SEARCH_RESPONSE_CACHE_TTL']:
+        return None
 
+    if not isinstance(search, LiteratureSearch) or request.method != 'GET':
+        return None
+
+    try:
+        return SearchResponseCache().make_key(
+            kind, search._index[0], request.args, request.headers.get('Accept'))
+    except RedisError:
+        current_app.logger.exception('Cannot read the generation of the search cache')
+        return None
+
+
+def query_from_iq_or_cache(search, cache_key):
+    """Parse the query, unless its response is cached.
+
+    Returns:
+        Tuple[Search, dict]: the search instance and the cached response,
+        or ``None`` if not cached.
+    """
     try:
-        search = search.query_from_iq(query_string)
+        response = SearchResponseCache().get(cache_key) if cache_key else None
+    except RedisError:
+        current_app.logger.exception('Cannot read the cached response of %s', cache_key)
+        response = None
+
+    if response is not None:
+        return search, response
+
+    query_string = request.values.get('q', '')
+    try:
+        return search.query_from_iq(query_string), None
     except SyntaxError:
         current_app.logger.debug(
             "Failed parsing query: {0}".format(
@@ -142,19 +181,67 @@ def inspire_search_factory(self, search):
             exc_info=True)
         raise InvalidQueryRESTError()
 
+
+def use_search_cache(search, cache_key, response):
+    """Make the search return the cached response when it is executed.
+
+    If the response is not cached yet, the search is executed right away to
+    cache it, and the response is kept by the search as well.
+    """
+    if not cache_key:
+        return search
+
+    if response is not None:
+        search._response = search._response_class(search, response)
+        return search
+
+    response = search.execute().to_dict()
+    try:
+        SearchResponseCache().set(
+            cache_key,
+            response,
+            current_app.config['SEARCH_RESPONSE_CACHE_TTL'],
+        )
+    except RedisError:
+        current_app.logger.exception('Cannot cache the response of %s', cache_key)
+
+    return search
+
+
+def inspire_search_factory(self, search):
+    """Parse query using Inspire-Query-Parser.
+
+    The response of Elasticsearch is cached as explained in
+    ``SearchResponseCache``.
+
+    :param self: REST view.
+    :param search: Elastic search DSL search instance.
+    :returns: Tuple with search instance and URL arguments.
+    """
+    query_string = request.values.get('q', '')
+    urlkwargs = MultiDict()
+
+    cache_key = get_search_cache_key(search, 'search')
+    search, response = query_from_iq_or_cache(search, cache_key)
+
     search_index = search._index[0]
     search, urlkwargs = inspire_filter_factory(search, urlkwargs, search_index)
     search, sortkwargs = default_sorter_factory(search, search_index)
     search = select_source(search)
 
     urlkwargs.add('q', query_string)
-    current_app.logger.debug(json.dumps(search.to_dict(), indent=4))
+    if response is None:
+        current_app.logger.debug(json.dumps(search.to_dict(), indent=4))
 
-    return search, urlkwargs
+    return use_search_cache(search, cache_key, response), urlkwargs
 
 
 def inspire_facets_factory(self, search):
     """Parse query using Inspire-Query-Parser and prepare facets for it
+
+    The response of Elasticsearch is cached as explained in
+    ``SearchResponseCache``.
+
     Args:
         self: REST view.
         search: Elastic search DSL search instance.
@@ -163,20 +250,49 @@ def inspire_facets_factory(self, search):
 
     """
     query_string = request.values.get('q', '')
-    try:
-        search = search.query_from_iq(query_string)
-    except SyntaxError:
-        current_app.logger.debug(
-            "Failed parsing query: {0}".format(
-                request.values.get('q', '')),
-            exc_info=True)
-        raise InvalidQueryRESTError()
+
+    cache_key = get_search_cache_key(search, 'facets')
+    search, response = query_from_iq_or_cache(search, cache_key)
 
     search_index = search._index[0]
     search, urlkwargs = default_inspire_facets_factory(search, search_index)
     search = select_source(search)
 
     urlkwargs.add('q', query_string)
-    current_app.logger.debug(json.dumps(search.to_dict(), indent=4))
+    if response is None:
+        current_app.logger.debug(json.dumps(search.to_dict(), indent=4))
 
-    return search, urlkwargs
+    return use_search_cache(search, cache_key, response), urlkwargs
+
+
+def inspire_export_search_factory(search, export_format=None):
+    """Parse query using Inspire-Query-Parser for an export of all the results.
+
+    The filters of the request are applied as in ``inspire_search_factory``,
+    and the response is never cached. The results are sorted only if a sort
+    is requested, as sorting a scroll is expensive, in which case the scan
+    has to ``preserve_order``.
+
+    If ``export_format`` is one of ``RECORDS_PRECOMPUTED_EXPORT_FORMATS``,
+    only the ``control_number`` and the precomputed serialization of the
+    records are returned, and the records without it have to be fetched
+    again. Otherwise the whole records are returned, except for
+    ``_ui_display`` and ``_export_formats``.
+
+    Args:
+        search: Elastic search DSL search instance.
+        export_format: the format of the export.
+
+    Returns: Elastic search DSL search instance, to be scanned.
+    """
+    search, _ = query_from_iq_or_cache(search, None)
+
+    search_index = search._index[0]
+    search, _ = inspire_filter_factory(search, MultiDict(), search_index)
+    if 'sort' in request.values:
+        search, _ = default_sorter_factory(search, search_index)
+
+    if export_format in current_app.config['RECORDS_PRECOMPUTED_EXPORT_FORMATS']:
+        return search.source(includes=['control_number', '_export_formats.{}'.format(export_format)])
+
+    return search.source(excludes=EXPORT_SOURCE_EXCLUDES)
@@ -30,6 +30,7 @@ import six
 from flask import Blueprint, current_app, jsonify, request, render_template
 
 from inspirehep.modules.search import LiteratureSearch
+from inspirehep.utils.cache import LRUCache
 
 
 blueprint = Blueprint(
@@ -73,12 +74,28 @@ def search():
                            **ctx)
 
 
-@blueprint.route('/search/suggest', methods=['GET'])
-def suggest():
-    """Power typeahead.js search bar suggestions."""
-    field = request.values.get('field')
-    query = request.values.get('query')
+_suggestions_cache = None
+
+
+def get_suggestions_cache():
+    """Return the in-process cache of the suggestions, keyed by field and query.
 
+    Its size is configured by ``SEARCH_SUGGEST_CACHE_SIZE``, and its entries
+    expire after ``SEARCH_SUGGEST_CACHE_TTL`` seconds, so that the
+    suggestions are periodically refreshed from Elasticsearch.
+    """
+    global _suggestions_cache
+    if _suggestions_cache is None:
+        _suggestions_cache = LRUCache(
+            maxsize=current_app.config['SEARCH_SUGGEST_CACHE_SIZE'],
+            ttl=current_app.config['SEARCH_SUGGEST_CACHE_TTL'],
+        )
+
+    return _suggestions_cache
+
+
+def get_suggestions(field, query):
+    """Get from Elasticsearch the suggestions of a completion field."""
     search = LiteratureSearch()
     search = search.suggest(
         'suggestions', query, completion={"field": field}
@@ -106,15 +123,40 @@ def suggest():
                 }
             )
 
+        return result
+
+    return [
+        {'value': s['text']}
+        for s in suggestions['suggestions'][0]['options']
+    ]
+
+
+@blueprint.route('/search/suggest', methods=['GET'])
+def suggest():
+    """Power typeahead.js search bar suggestions.
+
+    The suggestions of the ``SEARCH_SUGGEST_CACHE_FIELDS`` are served from
+    an in-process cache, as most keystrokes are common prefixes, and only
+    the other prefixes are sent to Elasticsearch.
+    """
+    field = request.values.get('field')
+    query = request.values.get('query')
+
+    if not query or field not in current_app.config['SEARCH_SUGGEST_CACHE_FIELDS']:
         return jsonify({
-            'results': result
+            'results': get_suggestions(field, query)
         })
 
+    # The completion suggesters lowercase the query.
+    key = (field, query.lower())
+    cache = get_suggestions_cache()
+    results = cache.get(key)
+    if results is None:
+        results = get_suggestions(field, query)
+        cache.set(key, results)
+
     return jsonify({
-        'results': [
-            {'value': s['text']}
-            for s in suggestions['suggestions'][0]['options']
-        ]
+        'results': results
     })
 
 
@@ -325,7 +325,7 @@ def populate_journal_coverage(obj, eng):
         None
 
     """
-    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db')
+    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db', prefetch=True)
     if not journals:
         return
 
@@ -580,7 +580,7 @@ def set_refereed_and_fix_document_type(obj, eng):
         None
 
     """
-    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db')
+    journals = replace_refs(get_value(obj.data, 'publication_info.journal_record'), 'db', prefetch=True)
     if not journals:
         return
 
@@ -32,12 +32,12 @@ from inspire_schemas.utils import (
 )
 from inspire_utils.helpers import maybe_int
 from inspire_utils.logging import getStackTraceLogger
-from refextract import (
-    extract_journal_reference,
+from refextract import extract_journal_reference
+
+from inspirehep.modules.refextract.cache import (
     extract_references_from_file,
     extract_references_from_string,
 )
-
 from inspirehep.modules.workflows.utils import (
     ignore_timeout_error,
     timeout_with_config,
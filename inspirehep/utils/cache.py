@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""In-process caches."""
+
+from __future__ import absolute_import, division, print_function
+
+from collections import OrderedDict
+from threading import RLock
+from time import time
+
+
+class LRUCache(object):
+    """Thread-safe cache of bounded size, with an optional expiration time.
+
+    When full, the least recently used entry is evicted to make room for a
+    new one.
+
+    Args:
+        maxsize (int): maximum number of entries. If ``0``, nothing is cached.
+        ttl (float): if set, seconds after which an entry expires.
+
+    Examples:
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache.set('a', 1)
+        >>> cache.get('a')
+        1
+        >>> cache.get('b', 'missing')
+        'missing'
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def _get_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires = entry
+        if expires is not None and expires < time():
+            del self._entries[key]
+            return None
+
+        return entry
+
+    def get(self, key, default=None):
+        """Return the value of ``key``, or ``default`` if missing or expired."""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            # Mark the entry as the most recently used one.
+            del self._entries[key]
+            self._entries[key] = entry
+
+            return entry[0]
+
+    def set(self, key, value):
+        if not self.maxsize:
+            return
+
+        expires = time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove ``key``, returning its value or ``default`` if missing."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """Fraction of the lookups which found the key, ``None`` if no lookups."""
+        lookups = self.hits + self.misses
+        if not lookups:
+            return None
+
+        return self.hits / lookups
@@ -27,9 +27,27 @@ from invenio_indexer.api import current_record_to_index, RecordIndexer
 
 def create_index_op(record, version_type='external_gte'):
     from inspirehep.modules.records.receivers import enhance_before_index
-    index, doc_type = current_record_to_index(record)
     enhance_before_index(record)
 
+    return _build_index_op(record, version_type)
+
+
+def create_index_ops(records, version_type='external_gte'):
+    """Create the ES bulk index operations of many records at once.
+
+    The records are enhanced together with ``enhance_records_before_index``,
+    so that their linked data is fetched with a few queries for the whole
+    batch instead of a few queries per record.
+    """
+    from inspirehep.modules.records.receivers import enhance_records_before_index
+    enhance_records_before_index(records)
+
+    return [_build_index_op(record, version_type) for record in records]
+
+
+def _build_index_op(record, version_type):
+    index, doc_type = current_record_to_index(record)
+
     return {
         '_op_type': 'index',
         '_index': index,
@@ -32,10 +32,15 @@ from werkzeug.utils import import_string
 
 from inspire_dojson.utils import get_recid_from_ref
 from inspire_utils.record import get_value
+from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
 from invenio_records.models import RecordMetadata
 
 from inspirehep.modules.pidstore.utils import get_endpoint_from_pid_type
+from inspirehep.utils.cache import LRUCache
+
+
+_uuids_cache = None
 
 
 class RecordGetterError(Exception):
@@ -66,42 +71,124 @@ def raise_record_getter_error_and_log(f):
     return wrapper
 
 
-@raise_record_getter_error_and_log
-def get_es_record(pid_type, recid, **kwargs):
-    pid = PersistentIdentifier.get(pid_type, recid)
+def get_uuids_cache():
+    """Return the cache of the uuids of the records, keyed by pid.
+
+    It has size ``RECORDS_PID_CACHE_SIZE`` and expiration time
+    ``RECORDS_PID_CACHE_TTL``.
+    """
+    global _uuids_cache
+    if _uuids_cache is None:
+        _uuids_cache = LRUCache(
+            maxsize=current_app.config['RECORDS_PID_CACHE_SIZE'],
+            ttl=current_app.config['RECORDS_PID_CACHE_TTL'],
+        )
+    return _uuids_cache
+
+
+def invalidate_cached_uuid(pid_type, recid):
+    """Remove the uuid of a record from the cache."""
+    if _uuids_cache is not None:
+        _uuids_cache.pop((pid_type, str(recid)))
+
+
+def get_uuids(pids):
+    """Resolve many pids to the uuids of their records.
+
+    The uuids not in the cache are fetched with a single query.
+
+    Args:
+        pids (Iterable[Tuple[str, Union[str, int]]): a list of (pid_type, pid_value) tuples.
 
+    Returns:
+        dict: the uuids of the records found, as strings, keyed by
+        (pid_type, pid_value) with the pid_value as a string.
+    """
+    cache = get_uuids_cache()
+    pids = set((pid_type, str(pid_value)) for (pid_type, pid_value) in pids)
+
+    uuids = {}
+    for pid in pids:
+        uuid = cache.get(pid)
+        if uuid is not None:
+            uuids[pid] = uuid
+
+    missing = pids.difference(uuids)
+    if missing:
+        query = PersistentIdentifier.query.with_entities(
+            PersistentIdentifier.pid_type,
+            PersistentIdentifier.pid_value,
+            PersistentIdentifier.object_uuid,
+        ).filter(
+            PersistentIdentifier.object_type == 'rec',  # So it can use the 'idx_object' index
+            tuple_(PersistentIdentifier.pid_type, PersistentIdentifier.pid_value).in_(list(missing))
+        )
+        for pid_type, pid_value, object_uuid in query:
+            uuids[pid_type, pid_value] = str(object_uuid)
+            cache.set((pid_type, pid_value), str(object_uuid))
+
+    return uuids
+
+
+def get_uuid(pid_type, recid):
+    """Resolve a pid to the uuid of its record, using the cache.
+
+    Raises:
+        PIDDoesNotExistError: if the pid does not exist.
+    """
+    cache = get_uuids_cache()
+    key = (pid_type, str(recid))
+
+    uuid = cache.get(key)
+    if uuid is None:
+        uuid = str(PersistentIdentifier.get(pid_type, recid).object_uuid)
+        cache.set(key, uuid)
+
+    return uuid
+
+
+def get_search_class(pid_type):
     endpoint = get_endpoint_from_pid_type(pid_type)
     search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
-    search_class = import_string(search_conf['search_class'])()
+    return import_string(search_conf['search_class'])()
 
-    return search_class.get_source(pid.object_uuid, **kwargs)
+
+@raise_record_getter_error_and_log
+def get_es_record(pid_type, recid, **kwargs):
+    return get_search_class(pid_type).get_source(get_uuid(pid_type, recid), **kwargs)
 
 
 def get_es_records(pid_type, recids, **kwargs):
-    """Get a list of recids from ElasticSearch."""
+    """Get a list of records from ElasticSearch.
+
+    Args:
+        pid_type (str): the pid type of the records.
+        recids (Iterable[Union[str, int]]): the pid values of the records.
+        kwargs: passed to ``mget``, e.g. ``_source`` to only get some fields.
+
+    Returns:
+        list: the records found, in the same order as ``recids``. Each record
+        is only returned once.
+    """
     recids = [str(recid) for recid in recids]
-    uuids = PersistentIdentifier.query.filter(
-        PersistentIdentifier.pid_value.in_(recids),
-        PersistentIdentifier.pid_type == pid_type
-    ).all()
-    uuids = [str(uuid.object_uuid) for uuid in uuids]
+    uuids_by_recid = get_uuids((pid_type, recid) for recid in recids)
 
-    endpoint = get_endpoint_from_pid_type(pid_type)
-    search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
-    search_class = import_string(search_conf['search_class'])()
+    uuids = []
+    for recid in recids:
+        uuid = uuids_by_recid.pop((pid_type, recid), None)
+        if uuid is not None:
+            uuids.append(uuid)
+
+    if not uuids:
+        return []
 
-    return search_class.mget(uuids, **kwargs)
+    return get_search_class(pid_type).mget(uuids, **kwargs)
 
 
 @raise_record_getter_error_and_log
 def get_es_record_by_uuid(uuid):
     pid = PersistentIdentifier.query.filter_by(object_uuid=uuid).one()
-
-    endpoint = get_endpoint_from_pid_type(pid.pid_type)
-    search_conf = current_app.config['RECORDS_REST_ENDPOINTS'][endpoint]
-    search_class = import_string(search_conf['search_class'])()
-
-    return search_class.get_source(uuid)
+    return get_search_class(pid.pid_type).get_source(uuid)
 
 
 @raise_record_getter_error_and_log
@@ -111,33 +198,103 @@ def get_db_record(pid_type, recid):
     return InspireRecord.get_record(pid.object_uuid)
 
 
-def get_db_records(pids):
+def _build_projected_record(fields, values):
+    record = {}
+    for field, value in zip(fields, values):
+        if value is None:
+            continue
+
+        keys = field.split('.')
+        parent = record
+        for key in keys[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[keys[-1]] = value
+
+    return record
+
+
+def get_db_records_revisions(pids):
+    """Get the revisions of many records from the DB, with a single query.
+
+    Args:
+        pids (Iterable[Tuple[str, Union[str, int]]): a list of (pid_type, pid_value) tuples.
+
+    Returns:
+        dict: the ``version_id`` of the records found, keyed by
+        (pid_type, pid_value) with the pid_value as a string.
+    """
+    pids = set((pid_type, str(pid_value)) for (pid_type, pid_value) in pids)
+
+    if not pids:
+        return {}
+
+    query = db.session.query(
+        PersistentIdentifier.pid_type,
+        PersistentIdentifier.pid_value,
+        RecordMetadata.version_id,
+    ).join(
+        RecordMetadata, RecordMetadata.id == PersistentIdentifier.object_uuid
+    ).filter(
+        PersistentIdentifier.object_type == 'rec',  # So it can use the 'idx_object' index
+        tuple_(PersistentIdentifier.pid_type, PersistentIdentifier.pid_value).in_(list(pids))
+    )
+
+    return {
+        (pid_type, pid_value): version_id
+        for pid_type, pid_value, version_id in query
+    }
+
+
+def get_db_records(pids, fields=None):
     """Get an iterator on record metadata from the DB.
 
+    All the records are fetched with a single query.
+
     Args:
         pids (Iterable[Tuple[str, Union[str, int]]): a list of (pid_type, pid_value) tuples.
+        fields (Iterable[str]): if passed, only these fields of the records
+            are fetched from the DB. A field can be a key of the record or a
+            dotted path through nested objects, e.g. ``'titles'`` or
+            ``'self.$ref'``. Paths through lists are not supported.
 
     Yields:
-        dict: metadata of a record found in the database.
-
-    Warning:
-        The order in which records are returned is different from the order of
-        the input.
+        dict: metadata of a record found in the database, in the same order
+        as ``pids``. Each record is only returned once.
     """
     pids = [(pid_type, str(pid_value)) for (pid_type, pid_value) in pids]
 
     if not pids:
         return
 
-    query = RecordMetadata.query.join(
-        PersistentIdentifier, RecordMetadata.id == PersistentIdentifier.object_uuid
+    if fields is None:
+        columns = [RecordMetadata.json]
+    else:
+        fields = list(fields)
+        columns = [RecordMetadata.json[tuple(field.split('.'))] for field in fields]
+
+    query = db.session.query(
+        PersistentIdentifier.pid_type,
+        PersistentIdentifier.pid_value,
+        *columns
+    ).join(
+        RecordMetadata, RecordMetadata.id == PersistentIdentifier.object_uuid
     ).filter(
         PersistentIdentifier.object_type == 'rec',  # So it can use the 'idx_object' index
-        tuple_(PersistentIdentifier.pid_type, PersistentIdentifier.pid_value).in_(pids)
+        tuple_(PersistentIdentifier.pid_type, PersistentIdentifier.pid_value).in_(list(set(pids)))
     )
 
-    for record in query.yield_per(100):
-        yield record.json
+    records = {}
+    for row in query.yield_per(100):
+        pid, values = tuple(row[:2]), row[2:]
+        if fields is None:
+            records[pid] = values[0]
+        else:
+            records[pid] = _build_projected_record(fields, values)
+
+    for pid in pids:
+        record = records.pop(pid, None)
+        if record is not None:
+            yield record
 
 
 def get_conference_record(record, default=None):
@@ -22,6 +22,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
 from contextlib import contextmanager
 
 from flask import current_app
@@ -35,6 +41,8 @@ from inspirehep.utils.jinja2 import render_template_to_string
 from inspirehep.utils.record_getter import get_es_records
 from inspirehep.utils.url import retrieve_uri
 
+_journal_kb = None
+
 
 def get_and_format_references(record):
     """Format references.
@@ -127,10 +135,99 @@ def map_refextract_to_schema(extracted_references, source=None):
     return result
 
 
+def hash_file(path, buffer_size=1 << 16):
+    """Return the SHA-1 of the contents of a file."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(buffer_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _get_local_stat(uri):
+    try:
+        stat = os.stat(uri)
+    except (OSError, TypeError):
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+class JournalKB(object):
+    """The journal KB of refextract, copied locally once per version.
+
+    ``REFEXTRACT_JOURNAL_KB_PATH`` may point to a shared space, where
+    ``create_journal_kb_file`` writes a new version of the KB from time to
+    time. The KB is copied to a local file named after the hash of its
+    contents only when it changed, which is checked by mtime for local
+    files and by hash otherwise, at most once every
+    ``REFEXTRACT_JOURNAL_KB_CHECK_INTERVAL`` seconds.
+
+    As refextract keeps the KBs it parsed keyed by their path, the KB is
+    then parsed only once per version by each process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._directory = None
+        self.uri = None
+        self.path = None
+        self.version = None
+        self._previous_path = None
+        self._stat = None
+        self._checked_at = None
+
+    def get_path(self):
+        """Return the path of the local copy of the current journal KB."""
+        uri = current_app.config.get('REFEXTRACT_JOURNAL_KB_PATH')
+        interval = current_app.config['REFEXTRACT_JOURNAL_KB_CHECK_INTERVAL']
+
+        with self._lock:
+            if self.path is None or uri != self.uri or time.time() - self._checked_at >= interval:
+                self._refresh(uri)
+            return self.path
+
+    def _refresh(self, uri):
+        stat = _get_local_stat(uri)
+        if uri != self.uri or stat is None or stat != self._stat:
+            self._copy(uri)
+
+        self.uri = uri
+        self._stat = stat
+        self._checked_at = time.time()
+
+    def _copy(self, uri):
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='inspire-journal-kb-')
+
+        with retrieve_uri(uri, outdir=self._directory) as temp_path:
+            version = hash_file(temp_path)
+            if version == self.version:
+                return
+
+            path = os.path.join(self._directory, '{}.kb'.format(version))
+            shutil.copyfile(temp_path, path)
+
+        # The previous version may still be in use by another thread.
+        if self._previous_path and self._previous_path != path:
+            try:
+                os.remove(self._previous_path)
+            except OSError:
+                pass
+        self._previous_path, self.path, self.version = self.path, path, version
+
+
+def get_journal_kb():
+    """Return the ``JournalKB`` of the current process."""
+    global _journal_kb
+    if _journal_kb is None:
+        _journal_kb = JournalKB()
+    return _journal_kb
+
+
 @contextmanager
 def local_refextract_kbs_path():
-    """Get the path to the temporary refextract kbs from the application config.
+    """Get the path to the local refextract kbs from the application config.
+
+    The path is the same until the journal KB changes, see ``JournalKB``.
     """
-    journal_kb_path = current_app.config.get('REFEXTRACT_JOURNAL_KB_PATH')
-    with retrieve_uri(journal_kb_path) as temp_journal_kb_path:
-        yield {'journals': temp_journal_kb_path}
+    yield {'journals': get_journal_kb().get_path()}
@@ -0,0 +1,48 @@
+"""
+BENCHMARK THE BIBTEX AND LATEX SERIALIZERS.
+
+Prints the latency per record of serializing a Literature record, both
+when it has to be serialized (cold) and when its current revision is
+already cached by the serializer (warm), e.g. when it is pushed again to
+ORCID. Paste it in ``inspirehep shell`` and call
+``benchmark_serializers(recid)``.
+"""
+
+from __future__ import print_function
+
+from timeit import default_timer
+
+from inspirehep.modules.records.serializers import (
+    bibtex_v1,
+    latex_v1_EU,
+    latex_v1_US,
+)
+from inspirehep.utils.record_getter import get_db_record
+
+
+def time_per_record(serialize, record, repeat):
+    start = default_timer()
+    for _ in range(repeat):
+        serialize(record)
+    return (default_timer() - start) / repeat * 1000
+
+
+def benchmark_serializers(recid, repeat=100):
+    record = get_db_record('lit', recid)
+    serializers = [
+        ('bibtex', bibtex_v1),
+        ('latex-eu', latex_v1_EU),
+        ('latex-us', latex_v1_US),
+    ]
+
+    for name, serializer in serializers:
+        def serialize_cold(record):
+            serializer.serialized_records_cache.clear()
+            serializer.serialize(recid, record)
+
+        def serialize_warm(record):
+            serializer.serialize(recid, record)
+
+        cold = time_per_record(serialize_cold, record, repeat)
+        warm = time_per_record(serialize_warm, record, repeat)
+        print('{:10} cold: {:8.3f} ms/record  warm: {:8.3f} ms/record'.format(name, cold, warm))
@@ -280,6 +280,7 @@ setup(
             'inspirehep = inspirehep:alembic',
         ],
         'invenio_db.models': [
+            'inspire_records = inspirehep.modules.records.models',
             'inspire_workflows_audit = inspirehep.modules.workflows.models',
         ],
         'invenio_jsonschemas.schemas': [
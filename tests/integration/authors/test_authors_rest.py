@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from factories.db.invenio_records import TestRecordMetadata
+
+from inspirehep.modules.authors.rest.coauthors import compute_author_coauthors
+from inspirehep.modules.authors.rest.stats import compute_author_statistics
+
+
+def _create_literature(author_recids, **kwargs):
+    authors = [
+        {
+            'full_name': 'Author {}'.format(author_recid),
+            'record': {'$ref': 'http://localhost:5000/api/authors/{}'.format(author_recid)},
+        } for author_recid in author_recids
+    ]
+    return TestRecordMetadata.create_from_kwargs(json=dict(authors=authors, **kwargs)).inspire_record
+
+
+def test_compute_author_statistics(isolated_app):
+    cited = _create_literature(
+        [1, 2],
+        keywords=[{'value': 'QCD'}, {'value': '* Automatic Keywords *'}],
+        inspire_categories=[{'term': 'Phenomenology-HEP'}],
+    )
+    _create_literature([1], document_type=['thesis'])
+    _create_literature([3], references=[{'record': {'$ref': cited._get_ref()}}])
+
+    expected = {
+        'citations': 1,
+        'fields': ['Phenomenology-HEP'],
+        'hindex': 1,
+        'i10index': 0,
+        'keywords': [{'count': 1, 'keyword': 'QCD'}],
+        'publications': 2,
+        'types': {'article': 1, 'thesis': 1},
+    }
+    result = compute_author_statistics(1)
+
+    assert expected == result
+
+
+def test_compute_author_coauthors(isolated_app):
+    _create_literature([1, 2, 3])
+    _create_literature([1, 2])
+    _create_literature([2, 3])
+
+    result = compute_author_coauthors(1)
+
+    assert [(coauthor['id'], coauthor['count']) for coauthor in result] == [(2, 2), (3, 1)]
+    assert result[0]['full_name'] == 'Author 2'
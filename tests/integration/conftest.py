@@ -79,6 +79,15 @@ def app():
         CELERY_TASK_EAGER_PROPAGATES=True,
         SECRET_KEY='secret!',
         RECORD_EDITOR_FILE_UPLOAD_FOLDER='tests/integration/editor/temp',
+        RECORDS_CITATIONS_REINDEX_WINDOW=0,
+        RECORDS_JSON_REF_CACHE_SIZE=0,
+        RECORDS_PID_CACHE_SIZE=0,
+        REFEXTRACT_CACHE_SIZE=0,
+        RECORDS_IDENTIFIERS_INDEX_ENABLED=False,
+        RECORDS_REFERENCES_CACHE_SIZE=0,
+        RECORDS_SERIALIZERS_CACHE_SIZE=0,
+        SEARCH_RESPONSE_CACHE_TTL=0,
+        SEARCH_SUGGEST_CACHE_SIZE=0,
         TESTING=True,
     )
 
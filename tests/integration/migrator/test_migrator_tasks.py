@@ -23,6 +23,7 @@
 from __future__ import absolute_import, division, print_function
 
 import uuid
+import zlib
 from mock import patch
 
 import os
@@ -36,6 +37,9 @@ from inspirehep.utils.record_getter import get_es_record, RecordGetterError
 from inspirehep.modules.migrator.models import LegacyRecordsMirror
 from inspirehep.modules.migrator.tasks import (
     _build_recid_to_uuid_map,
+    _create_records,
+    _insert_converted_records,
+    convert_mirror_records,
     migrate_from_file,
     migrate_and_insert_record,
 )
@@ -253,3 +257,61 @@ def test_migrate_from_mirror_doesnt_index_deleted_records(isolated_app):
     get_es_record('lit', 12345)
     with pytest.raises(RecordGetterError):
         get_es_record('lit', 1234)
+
+
+def _marcxml(recid):
+    return (
+        '<record>'
+        '  <controlfield tag="001">{}</controlfield>'
+        '  <datafield tag="245" ind1=" " ind2=" ">'
+        '    <subfield code="a">On the validity of INSPIRE records</subfield>'
+        '  </datafield>'
+        '  <datafield tag="980" ind1=" " ind2=" ">'
+        '    <subfield code="a">HEP</subfield>'
+        '  </datafield>'
+        '</record>'
+    ).format(recid)
+
+
+def _convert_into_mirror(recids):
+    raw_records = [_marcxml(recid) for recid in recids]
+    for raw_record in raw_records:
+        db.session.merge(LegacyRecordsMirror.from_marcxml(raw_record))
+
+    return convert_mirror_records([
+        (recid, zlib.compress(raw_record.encode('utf-8')))
+        for recid, raw_record in zip(recids, raw_records)
+    ])
+
+
+def test_insert_converted_records_inserts_new_records_in_bulk(isolated_app):
+    converted_records = _convert_into_mirror([12345, 12346])
+
+    with patch('inspirehep.modules.migrator.tasks._create_records', wraps=_create_records) as create_records, \
+            patch('inspirehep.modules.migrator.tasks.migrate_record_from_mirror') as migrate_record_from_mirror:
+        assert _insert_converted_records(converted_records, skip_files=True) == 2
+
+    assert create_records.call_count == 1
+    assert [record['control_number'] for record in create_records.call_args[0][0]] == [12345, 12346]
+    migrate_record_from_mirror.assert_not_called()
+
+    for recid in (12345, 12346):
+        pid = PersistentIdentifier.get('lit', recid)
+        assert pid.object_type == 'rec'
+        assert LegacyRecordsMirror.query.get(recid).valid is True
+        get_es_record('lit', recid)
+
+
+def test_insert_converted_records_migrates_one_by_one_failed_and_existing_records(isolated_app):
+    migrate_and_insert_record(_marcxml(12345))
+    converted_records = _convert_into_mirror([12345, 12346, 12347])
+    converted_records[1] = (12346, None)
+
+    with patch('inspirehep.modules.migrator.tasks._create_records', wraps=_create_records) as create_records, \
+            patch('inspirehep.modules.migrator.tasks.migrate_record_from_mirror',
+                  return_value=None) as migrate_record_from_mirror:
+        _insert_converted_records(converted_records, skip_files=True)
+
+    assert [record['control_number'] for record in create_records.call_args[0][0]] == [12347]
+    migrated_one_by_one = [call[0][0].recid for call in migrate_record_from_mirror.call_args_list]
+    assert sorted(migrated_one_by_one) == [12345, 12346]
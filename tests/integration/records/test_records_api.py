@@ -27,11 +27,18 @@ import os
 from tempfile import NamedTemporaryFile
 import pytest
 
+from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier, RecordIdentifier
 from jsonschema import ValidationError
 from six.moves.urllib.parse import quote
 
 from inspirehep.modules.records.api import InspireRecord
+from inspirehep.modules.records.models import (
+    AuthorStatistics,
+    RecordAuthors,
+    RecordCitations,
+    _invalidate_authors_statistics,
+)
 from inspirehep.utils.record_getter import get_db_record
 from factories.db.invenio_records import TestRecordMetadata
 
@@ -182,6 +189,123 @@ def test_not_count_citations_from_other_collections(isolated_app):
     assert record_1.get_citations_count() == 1
 
 
+def test_citations_count_is_updated_when_references_change(isolated_app):
+    record_json = {
+        'control_number': 321,
+    }
+    record_1 = TestRecordMetadata.create_from_kwargs(json=record_json).inspire_record
+
+    ref = {'control_number': 4321, 'references': [{'record': {'$ref': record_1._get_ref()}}]}
+    citing_record = TestRecordMetadata.create_from_kwargs(json=ref).record_metadata
+    assert record_1.get_citations_count() == 1
+
+    citing_record.json = dict(citing_record.json, references=[])
+    db.session.flush()
+    assert record_1.get_citations_count() == 0
+    assert RecordCitations.query.filter_by(citer_id=citing_record.id).count() == 0
+
+    citing_record.json = dict(citing_record.json, references=ref['references'])
+    db.session.flush()
+    assert record_1.get_citations_count() == 1
+
+    citing_record.json = dict(citing_record.json, deleted=True)
+    db.session.flush()
+    assert record_1.get_citations_count() == 0
+
+
+def test_citations_count_is_updated_when_citing_record_is_removed(isolated_app):
+    record_json = {
+        'control_number': 321,
+    }
+    record_1 = TestRecordMetadata.create_from_kwargs(json=record_json).inspire_record
+
+    ref = {'control_number': 4321, 'references': [{'record': {'$ref': record_1._get_ref()}}]}
+    citing_record = TestRecordMetadata.create_from_kwargs(json=ref, disable_persistent_identifier=True).record_metadata
+    assert record_1.get_citations_count() == 1
+
+    db.session.delete(citing_record)
+    db.session.flush()
+    assert record_1.get_citations_count() == 0
+
+
+def test_authors_are_updated_when_authors_change(isolated_app):
+    authors = [
+        {'full_name': 'Smith, J.', 'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+        {'full_name': 'Doe, J.'},
+        {'full_name': 'Rossi, M.', 'record': {'$ref': 'http://localhost:5000/api/authors/2'}},
+    ]
+    record = TestRecordMetadata.create_from_kwargs(json={'authors': authors}).record_metadata
+
+    def _get_authors():
+        return sorted(
+            (row.author_recid, row.full_name)
+            for row in RecordAuthors.query.filter_by(literature_id=record.id)
+        )
+
+    assert _get_authors() == [(1, 'Smith, J.'), (2, 'Rossi, M.')]
+
+    record.json = dict(record.json, authors=authors[:2])
+    db.session.flush()
+    assert _get_authors() == [(1, 'Smith, J.')]
+
+    record.json = dict(record.json, deleted=True)
+    db.session.flush()
+    assert _get_authors() == []
+
+
+@pytest.fixture
+def cleanup_author_statistics(app):
+    """Delete the statistics that ``AuthorStatistics.get`` commits outside of
+    the isolated session. Request it before ``isolated_app``, so that the
+    isolated session is rolled back first."""
+    yield
+    with db.engine.begin() as connection:
+        connection.execute(AuthorStatistics.__table__.delete())
+
+
+def test_author_statistics_are_invalidated_when_citation_counts_change(cleanup_author_statistics, isolated_app):
+    authors = [
+        {'full_name': 'Smith, J.', 'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+    ]
+    record = TestRecordMetadata.create_from_kwargs(json={'authors': authors}).inspire_record
+
+    statistics = AuthorStatistics.get(1, 'statistics', lambda author_recid: {'citations': 0})
+    assert statistics == {'citations': 0}
+    assert AuthorStatistics.query.get(1).statistics == {'citations': 0}
+
+    ref = {'references': [{'record': {'$ref': record._get_ref()}}]}
+    TestRecordMetadata.create_from_kwargs(json=ref)
+
+    assert AuthorStatistics.query.get(1).statistics is None
+
+
+def test_author_statistics_are_not_stored_if_invalidated_while_computed(cleanup_author_statistics, isolated_app):
+    def compute(author_recid):
+        with db.engine.begin() as connection:
+            _invalidate_authors_statistics(connection, [author_recid])
+        return {'citations': 0}
+
+    assert AuthorStatistics.get(1, 'statistics', compute) == {'citations': 0}
+    assert AuthorStatistics.query.get(1).statistics is None
+
+    assert AuthorStatistics.get(1, 'statistics', lambda author_recid: {'citations': 1}) == {'citations': 1}
+    db.session.expire_all()
+    assert AuthorStatistics.query.get(1).statistics == {'citations': 1}
+
+
+def test_author_statistics_get_does_not_commit_the_session(cleanup_author_statistics, isolated_app):
+    authors = [
+        {'full_name': 'Smith, J.', 'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+    ]
+    TestRecordMetadata.create_from_kwargs(json={'authors': authors})
+    db.session.add(RecordIdentifier(recid=424242))
+
+    AuthorStatistics.get(1, 'statistics', lambda author_recid: {'citations': 0})
+    db.session.rollback()
+
+    assert RecordIdentifier.query.get(424242) is None
+
+
 def test_citations_from_superseded_should_not_count_to_citation_count(isolated_app):
     record_json = {
         'control_number': 31650,
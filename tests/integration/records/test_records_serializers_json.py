@@ -159,3 +159,58 @@ def test_zero_citation_count_in_es(isolated_api_client):
         if obj_meta['control_number'] not in cn_map.keys():
             continue
         assert obj_meta['citation_count'] == cn_map[obj_meta['control_number']]
+
+
+def test_literature_references_serializer_record_paginates_the_references(isolated_api_client):
+    cited = TestRecordMetadata.create_from_kwargs(json={
+        'control_number': 1,
+        'titles': [{'title': 'Cited paper'}],
+    }).inspire_record
+    record = {
+        'control_number': 123,
+        'references': [
+            {
+                'record': {'$ref': cited._get_ref()},
+                'reference': {'label': '1'},
+            },
+            {'reference': {'label': '2', 'misc': ['Second reference']}},
+            {'reference': {'label': '3', 'misc': ['Third reference']}},
+        ],
+    }
+    TestRecordMetadata.create_from_kwargs(json=record)
+
+    response = isolated_api_client.get(
+        '/literature/123/references?page=2&size=2',
+        headers={'Accept': 'application/json'}
+    )
+
+    expected_metadata = {
+        'references': [
+            {
+                'label': '3',
+                'misc': 'Third reference',
+            },
+        ],
+        'references_count': 3,
+    }
+
+    result = json.loads(response.get_data(as_text=True))
+
+    assert response.status_code == 200
+    assert expected_metadata == result['metadata']
+
+    response = isolated_api_client.get(
+        '/literature/123/references?page=1&size=1',
+        headers={'Accept': 'application/json'}
+    )
+
+    result = json.loads(response.get_data(as_text=True))
+
+    assert response.status_code == 200
+    assert result['metadata']['references'] == [
+        {
+            'control_number': 1,
+            'label': '1',
+            'titles': [{'title': 'Cited paper'}],
+        },
+    ]
@@ -22,6 +22,24 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
+from mock import patch
+
+from invenio_accounts.models import SessionActivity
+from invenio_accounts.testutils import login_user_via_session
+from invenio_db import db
+
+
+@pytest.fixture(scope='function')
+def log_in_as_cataloger(api_client):
+    """Ensure that we're logged in as a privileged user."""
+    login_user_via_session(api_client, email='cataloger@inspirehep.net')
+
+    yield
+
+    SessionActivity.query.delete()
+    db.session.commit()
+
 
 def test_marcxml_serializer_serialize(api_client):
     response = api_client.get(
@@ -51,3 +69,51 @@ def test_marcxml_serializer_serialize_results(api_client):
 
     assert expected_701585 in result
     assert expected_1373790 in result
+
+
+def test_literature_export_streams_all_the_results_as_marcxml(api_client):
+    response = api_client.get('/literature/export?q=title collider&format=marcxml')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/marcxml+xml'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=literature.xml'
+
+    expected_701585 = b'<controlfield tag="001">701585</controlfield>'
+    expected_1373790 = b'<controlfield tag="001">1373790</controlfield>'
+    result = response.data
+
+    assert result.startswith(b'<?xml version="1.0" encoding="UTF-8" ?>')
+    assert result.endswith(b'</collection>\n')
+    assert expected_701585 in result
+    assert expected_1373790 in result
+
+
+def test_literature_export_rejects_unknown_formats(api_client):
+    response = api_client.get('/literature/export?q=title collider&format=doc')
+
+    assert response.status_code == 400
+
+
+def test_literature_export_rejects_too_many_results(api, api_client):
+    with patch.dict(api.config, {'RECORDS_EXPORT_MAX_RESULTS': 1}):
+        response = api_client.get('/literature/export?q=title collider&format=marcxml')
+
+    assert response.status_code == 400
+
+
+def test_literature_export_allows_curators_to_export_more_results(api, api_client, log_in_as_cataloger):
+    config = {
+        'RECORDS_EXPORT_MAX_RESULTS': 1,
+        'RECORDS_EXPORT_CURATOR_MAX_RESULTS': 10000,
+    }
+    with patch.dict(api.config, config):
+        response = api_client.get('/literature/export?q=title collider&format=marcxml')
+
+    assert response.status_code == 200
+
+
+def test_literature_export_rejects_too_many_results_for_curators(api, api_client, log_in_as_cataloger):
+    with patch.dict(api.config, {'RECORDS_EXPORT_CURATOR_MAX_RESULTS': 1}):
+        response = api_client.get('/literature/export?q=title collider&format=marcxml')
+
+    assert response.status_code == 400
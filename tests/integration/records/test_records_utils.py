@@ -73,6 +73,26 @@ def test_get_linked_records_in_field_handles_multiple_pid_types(isolated_app):
         ],
     }
     results = get_linked_records_in_field(record, 'references.record')
-    expected = list(sorted(instance.record_metadata.json for instance in instances))
-    result = list(sorted(results))  # FIXME: order is not preserved!
+    expected = [instance.record_metadata.json for instance in instances]
+    result = list(results)
+    assert expected == result
+
+
+def test_get_linked_records_in_field_returns_only_the_requested_fields(isolated_app):
+    instance = TestRecordMetadata.create_from_file(__name__, '29177.json')
+
+    record = {
+        'references': [
+            {'record': {'$ref': 'https://labs.inspirehep.net/api/literature/29177'}},
+        ],
+    }
+
+    results = get_linked_records_in_field(record, 'references.record', fields=['control_number', 'titles'])
+    expected = [
+        {
+            'control_number': 29177,
+            'titles': instance.record_metadata.json['titles'],
+        },
+    ]
+    result = list(results)
     assert expected == result
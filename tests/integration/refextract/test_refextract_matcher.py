@@ -22,10 +22,12 @@
 
 from __future__ import absolute_import, division, print_function
 
+from flask import current_app
 from mock import patch
 
 from inspire_schemas.api import load_schema, validate
 from inspire_utils.record import get_value
+from inspirehep.modules.records.identifiers import IdentifiersIndex
 from inspirehep.modules.refextract.matcher import (
     match_reference,
     match_references,
@@ -314,6 +316,47 @@ def test_match_reference_on_texkey(isolated_app):
     assert validate([reference], subschema) is None
 
 
+def test_match_reference_with_identifiers_index_ignores_the_case_of_dois_as_es(isolated_app):
+    cited_record_json = {
+        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+        '_collections': ['Literature'],
+        'control_number': 1,
+        'document_type': ['article'],
+        'dois': [
+            {
+                'value': '10.1103/PhysRevD.94.054021',
+            },
+        ],
+        'titles': [
+            {
+                'title': 'The Strongly-Interacting Light Higgs'
+            }
+        ],
+    }
+
+    TestRecordMetadata.create_from_kwargs(
+        json=cited_record_json, index_name='records-hep')
+
+    def _match(doi):
+        reference = match_reference({'reference': {'dois': [doi]}})
+        return get_value(reference, 'record.$ref')
+
+    dois = ['10.1103/PhysRevD.94.054021', '10.1103/physrevd.94.054021', '10.1103/PHYSREVD.94.054021']
+    matched_with_es = [_match(doi) for doi in dois]
+
+    index = IdentifiersIndex()
+    try:
+        index.load()
+        with patch.dict(current_app.config, {'RECORDS_IDENTIFIERS_INDEX_ENABLED': True}):
+            matched_with_index = [_match(doi) for doi in dois]
+    finally:
+        for key in index.redis.scan_iter('{}:*'.format(IdentifiersIndex.KEY_PREFIX)):
+            index.redis.delete(key)
+
+    assert matched_with_es == ['http://localhost:5000/api/literature/1'] * 3
+    assert matched_with_index == matched_with_es
+
+
 def test_match_reference_ignores_hidden_collections(isolated_app):
     cited_record_json = {
         '$schema': 'http://localhost:5000/schemas/records/hep.json',
@@ -78,3 +78,31 @@ def test_create_journal_kb_file_handles_malformed_title_variants(jhep_with_malfo
     journal_kb = journal_kb_fd.read().splitlines()
 
     assert '---JHEP' not in journal_kb
+
+
+def test_create_journal_kb_file_incremental(app, tmpdir):
+    journal_kb_fd = tmpdir.join('journal-titles.kb')
+
+    config = {'REFEXTRACT_JOURNAL_KB_PATH': str(journal_kb_fd)}
+
+    with patch.dict(current_app.config, config):
+        create_journal_kb_file()
+        full_journal_kb = journal_kb_fd.read().splitlines()
+
+        record = get_db_record('jou', 1213103)
+        record['title_variants'].append('Journal of Incremental Builds')
+        record = InspireRecord.create_or_update(record)
+        record.commit()
+
+        try:
+            create_journal_kb_file(incremental=True)
+            journal_kb = journal_kb_fd.read().splitlines()
+        finally:
+            record = get_db_record('jou', 1213103)
+            record['title_variants'] = record['title_variants'][:-1]
+            record = InspireRecord.create_or_update(record)
+            record.commit()
+
+    assert 'JOURNAL OF INCREMENTAL BUILDS---JHEP' in journal_kb
+    assert set(full_journal_kb) < set(journal_kb)
+    assert tmpdir.join('journal-titles.kb.state.json').check()
@@ -32,6 +32,20 @@ def test_downgrade(isolated_app):
     alembic = Alembic(isolated_app)
     alembic.upgrade()
 
+    alembic.downgrade(target='4a9f2c7d3b10')
+    assert 'ix_records_metadata_updated' not in _get_indexes('records_metadata')
+
+    alembic.downgrade(target='c1c1e9cbd3e6')
+    assert 'records_authors' not in _get_table_names()
+    assert 'records_authors_statistics' not in _get_table_names()
+
+    alembic.downgrade(target='0ab3d105df13')
+    assert 'records_reindex_checkpoint' not in _get_table_names()
+
+    alembic.downgrade(target='2dd443feeb63')
+    assert 'records_citations' not in _get_table_names()
+    assert 'records_citations_count' not in _get_table_names()
+
     # downgrade 0bc0a6ee1bc0 == downgrade to 2f5368ff6d20
 
     alembic.downgrade(target='0bc0a6ee1bc0')
@@ -180,6 +194,22 @@ def test_upgrade(app):
     assert 'ix_records_metadata_json_referenced_records' not in _get_indexes(
         'records_metadata')
 
+    alembic.upgrade(target='0ab3d105df13')
+    assert 'records_citations' in _get_table_names()
+    assert 'records_citations_count' in _get_table_names()
+    assert 'ix_records_citations_cited' in _get_indexes('records_citations')
+
+    alembic.upgrade(target='c1c1e9cbd3e6')
+    assert 'records_reindex_checkpoint' in _get_table_names()
+
+    alembic.upgrade(target='4a9f2c7d3b10')
+    assert 'records_authors' in _get_table_names()
+    assert 'records_authors_statistics' in _get_table_names()
+    assert 'ix_records_authors_literature_id' in _get_indexes('records_authors')
+
+    alembic.upgrade(target='7d4f6b2a9c31')
+    assert 'ix_records_metadata_updated' in _get_indexes('records_metadata')
+
 
 def _get_indexes(tablename):
     query = text('''
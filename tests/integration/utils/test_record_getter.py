@@ -77,3 +77,36 @@ def test_get_db_records_accept_multiple_pid_types(app):
     results = list(get_db_records(records))
 
     assert len(results) == 3
+
+
+def test_get_es_records_preserves_the_order_of_the_input(app):
+    literature = [1498175, 1090628, 4328]
+
+    results = get_es_records('lit', literature)
+
+    assert [result['control_number'] for result in results] == literature
+
+
+def test_get_es_records_accepts_source(app):
+    results = get_es_records('lit', [4328], _source=['control_number'])
+
+    assert results == [{'control_number': 4328}]
+
+
+def test_get_db_records_preserves_the_order_of_the_input(app):
+    records = [('aut', 983059), ('lit', 1498175), ('lit', 1090628)]
+
+    results = list(get_db_records(records))
+
+    assert [result['control_number'] for result in results] == [983059, 1498175, 1090628]
+
+
+def test_get_db_records_returns_only_the_requested_fields(app):
+    fields = ['control_number', 'self.$ref', 'nonexistent']
+
+    results = list(get_db_records([('lit', 4328)], fields=fields))
+
+    assert len(results) == 1
+    assert set(results[0]) == {'control_number', 'self'}
+    assert results[0]['control_number'] == 4328
+    assert results[0]['self']['$ref'].endswith('/api/literature/4328')
@@ -103,6 +103,14 @@ def workflow_app(higgs_ontology):
             # Tests may fail when turned on because of Flask bug (A setup function was called after the first request was handled. when initializing - when Alembic initialization)
             HEP_ONTOLOGY_FILE=higgs_ontology,
             PRODUCTION_MODE=True,
+            RECORDS_JSON_REF_CACHE_SIZE=0,
+            RECORDS_PID_CACHE_SIZE=0,
+            REFEXTRACT_CACHE_SIZE=0,
+            RECORDS_IDENTIFIERS_INDEX_ENABLED=False,
+            RECORDS_REFERENCES_CACHE_SIZE=0,
+            RECORDS_SERIALIZERS_CACHE_SIZE=0,
+            SEARCH_RESPONSE_CACHE_TTL=0,
+            SEARCH_SUGGEST_CACHE_SIZE=0,
             LEGACY_ROBOTUPLOAD_URL=(
                 'http://localhost:1234'
             ),
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+from mock import MagicMock, patch
+
+from inspirehep.modules.authors.rest.citations import AuthorAPICitations
+
+
+def _hit(source):
+    hit = MagicMock()
+    hit.to_dict.return_value = source
+    return hit
+
+
+@patch('inspirehep.modules.authors.rest.citations.LiteratureSearch')
+def test_dump_fetches_the_citers_of_each_chunk_with_one_query(mock_search):
+    citees = [
+        {
+            'authors': [{'recid': 1}],
+            'control_number': 10,
+            'self': {'$ref': 'http://localhost:5000/api/literature/10'},
+        },
+        {
+            'authors': [{'recid': 1}, {'recid': 2}],
+            'control_number': 11,
+            'self': {'$ref': 'http://localhost:5000/api/literature/11'},
+        },
+    ]
+    citer = {
+        'authors': [{'recid': 2}, {'full_name': 'Smith, J.'}],
+        'collections': [{'primary': 'Published'}],
+        'control_number': 20,
+        'earliest_date': '2018-01-01',
+        'references': [{'recid': 10}, {'recid': 11}, {'recid': 12}],
+        'self': {'$ref': 'http://localhost:5000/api/literature/20'},
+    }
+    mock_search.return_value.query.return_value.params.return_value.scan.return_value = [_hit(citer)]
+
+    citer_json = {'id': 20, 'record': {'$ref': 'http://localhost:5000/api/literature/20'}}
+    expected = [
+        {
+            'citee': {'id': 10, 'record': {'$ref': 'http://localhost:5000/api/literature/10'}},
+            'citers': [
+                {
+                    'citer': citer_json,
+                    'date': '2018-01-01',
+                    'published_paper': True,
+                    'self_citation': False,
+                },
+            ],
+        },
+        {
+            'citee': {'id': 11, 'record': {'$ref': 'http://localhost:5000/api/literature/11'}},
+            'citers': [
+                {
+                    'citer': citer_json,
+                    'date': '2018-01-01',
+                    'published_paper': True,
+                    'self_citation': True,
+                },
+            ],
+        },
+    ]
+    result = json.loads(''.join(AuthorAPICitations().dump(citees)))
+
+    assert expected == result
+    mock_search.return_value.query.assert_called_once_with('terms', references__recid=[10, 11])
+
+
+def test_dump_handles_authors_without_publications():
+    assert json.loads(''.join(AuthorAPICitations().dump([]))) == []
@@ -23,9 +23,22 @@
 from __future__ import absolute_import, division, print_function
 
 import os
+import zlib
+from datetime import datetime, timedelta
+
 import pkg_resources
+import pytest
+from flask import current_app
+from mock import call, patch
 
-from inspirehep.modules.migrator.tasks import read_file
+from inspirehep.modules.migrator.tasks import (
+    continuous_migration,
+    convert_mirror_records,
+    get_lag_from_marcxml,
+    read_file,
+    read_tar_member,
+    split_stream,
+)
 
 
 def test_read_file_reads_xml_file_correctly():
@@ -64,3 +77,117 @@ def test_read_file_reads_prodsync_file_correctly():
     result = list(read_file(prodsync_file))
 
     assert expected == result
+
+
+def test_read_tar_member_reads_prodsync_member_correctly():
+    xml_file = pkg_resources.resource_filename(__name__, os.path.join('fixtures', '1663924.xml'))
+    prodsync_file = pkg_resources.resource_filename(__name__, os.path.join('fixtures', 'micro-prodsync.tar'))
+
+    with open(xml_file, 'rb') as f:
+        expected = f.read()
+    result = b''.join(read_tar_member(prodsync_file, '1663924.xml.gz', chunk_size=100))
+
+    assert expected == result
+
+
+def test_split_stream_splits_records_across_chunks():
+    stream = [
+        b'<?xml version="1.0"?>\n<collection><rec',
+        b'ord><controlfield tag="001">1</controlfield></record>',
+        b'<record><controlfield tag="001">2</controlfield></re',
+        b'cord>\n<record>\n<controlfield tag="001">3</controlfield>\n</record></collection>',
+    ]
+
+    expected = [
+        b'<record><controlfield tag="001">1</controlfield></record>',
+        b'<record><controlfield tag="001">2</controlfield></record>',
+        b'<record>\n<controlfield tag="001">3</controlfield>\n</record>',
+    ]
+    result = list(split_stream(stream))
+
+    assert expected == result
+
+
+def test_convert_mirror_records():
+    xml_file = pkg_resources.resource_filename(__name__, os.path.join('fixtures', '1663924.xml'))
+
+    with open(xml_file, 'rb') as f:
+        marcxml = f.read()
+    raw_records = [
+        (1663924, zlib.compress(marcxml)),
+        (1663925, zlib.compress(b'<record><controlfield tag="001">1663925</controlfield></record>')),
+    ]
+    result = convert_mirror_records(raw_records)
+
+    assert [recid for recid, _ in result] == [1663924, 1663925]
+    assert result[0][1]['control_number'] == 1663924
+    assert result[1][1] is None
+
+
+def test_get_lag_from_marcxml():
+    last_modification = datetime.now() - timedelta(hours=1)
+    raw_record = (
+        '<record><controlfield tag="001">1663924</controlfield>'
+        '<controlfield tag="005">{}.0</controlfield></record>'
+    ).format(last_modification.strftime('%Y%m%d%H%M%S'))
+
+    result = get_lag_from_marcxml(raw_record)
+
+    assert 3599 <= result < 3700
+
+
+def test_get_lag_from_marcxml_without_005():
+    raw_record = '<record><controlfield tag="001">1663924</controlfield></record>'
+
+    assert get_lag_from_marcxml(raw_record) is None
+
+
+def _marcxml(recid):
+    return '<record><controlfield tag="001">{}</controlfield></record>'.format(recid)
+
+
+@patch('inspirehep.modules.migrator.tasks.write_metric')
+@patch('inspirehep.modules.migrator.tasks.migrate_and_insert_records')
+@patch('inspirehep.modules.migrator.tasks.Lock')
+@patch('inspirehep.modules.migrator.tasks.StrictRedis')
+def test_continuous_migration_migrates_in_batches(redis, lock, migrate_and_insert_records, write_metric):
+    r = redis.from_url.return_value
+    r.pipeline.return_value.execute.side_effect = [
+        [[zlib.compress(_marcxml(1).encode()), zlib.compress(_marcxml(2).encode())], 3],
+        [[zlib.compress(_marcxml(3).encode())], 1],
+        [[], 0],
+    ]
+    lock.return_value.acquire.return_value = True
+
+    with patch.dict(current_app.config, {'RECORDS_MIGRATION_CONTINUOUS_BATCH_SIZE': 2}):
+        continuous_migration(skip_files=True)
+
+    r.pipeline.return_value.lrange.assert_called_with('legacy_records', 0, 1)
+    assert migrate_and_insert_records.call_args_list == [
+        call([_marcxml(1).encode(), _marcxml(2).encode()], skip_files=True),
+        call([_marcxml(3).encode()], skip_files=True),
+    ]
+    assert r.ltrim.call_args_list == [
+        call('legacy_records', 2, -1),
+        call('legacy_records', 1, -1),
+    ]
+    assert [kwargs['value'] for _, kwargs in write_metric.call_args_list] == [1, 0]
+    assert [kwargs['migrated'] for _, kwargs in write_metric.call_args_list] == [2, 1]
+    lock.return_value.release.assert_called_once_with()
+
+
+@patch('inspirehep.modules.migrator.tasks.write_metric')
+@patch('inspirehep.modules.migrator.tasks.migrate_and_insert_records', side_effect=Exception('DB is down'))
+@patch('inspirehep.modules.migrator.tasks.Lock')
+@patch('inspirehep.modules.migrator.tasks.StrictRedis')
+def test_continuous_migration_keeps_the_batch_if_it_fails(redis, lock, migrate_and_insert_records, write_metric):
+    r = redis.from_url.return_value
+    r.pipeline.return_value.execute.return_value = [[zlib.compress(_marcxml(1).encode())], 1]
+    lock.return_value.acquire.return_value = True
+
+    with pytest.raises(Exception):
+        continuous_migration(skip_files=True)
+
+    r.ltrim.assert_not_called()
+    write_metric.assert_not_called()
+    lock.return_value.release.assert_called_once_with()
@@ -25,10 +25,19 @@ from inspire_schemas.api import load_schema, validate
 
 import json
 import mock
+import pytest
 
 from marshmallow import Schema, fields
 
 from inspirehep.modules.records.serializers.schemas.json.literature.common import ReferenceItemSchemaV1
+from inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item import (
+    get_resolved_references_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_resolved_references_cache():
+    get_resolved_references_cache().clear()
 
 
 def test_returns_non_empty_fields():
@@ -225,8 +234,9 @@ def test_returns_no_misc_if_title_persent():
     assert expected == json.loads(result)
 
 
-@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_linked_records_in_field')
-def test_returns_no_misc_if_titles_persent_in_the_resolved_record(record):
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records_revisions', return_value={('lit', '123'): 1})
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records')
+def test_returns_no_misc_if_titles_persent_in_the_resolved_record(record, revisions):
     record.return_value = [{
         'control_number': 123,
         'titles': [
@@ -286,8 +296,9 @@ def test_returns_only_first_misc():
     assert expected == json.loads(result)
 
 
-@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_linked_records_in_field')
-def test_returns_dois_from_the_resolved_record(record):
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records_revisions', return_value={('lit', '123'): 1})
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records')
+def test_returns_dois_from_the_resolved_record(record, revisions):
     record.return_value = [{
         'control_number': 123,
         'dois': [
@@ -319,8 +330,9 @@ def test_returns_dois_from_the_resolved_record(record):
     assert expected == json.loads(result)
 
 
-@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_linked_records_in_field')
-def test_returns_arxiv_eprints_from_the_resolved_record(record):
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records_revisions', return_value={('lit', '123'): 1})
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records')
+def test_returns_arxiv_eprints_from_the_resolved_record(record, revisions):
     record.return_value = [{
         'control_number': 123,
         'arxiv_eprints': [
@@ -351,3 +363,33 @@ def test_returns_arxiv_eprints_from_the_resolved_record(record):
     }
     result = schema.dumps(dump).data
     assert expected == json.loads(result)
+
+
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records_revisions')
+@mock.patch('inspirehep.modules.records.serializers.schemas.json.literature.common.reference_item.get_db_records')
+def test_caches_the_resolved_records_by_revision(record, revisions):
+    record.return_value = [{
+        'control_number': 123,
+        'titles': [{'title': 'Partner of Higgs Boson'}],
+    }]
+    revisions.return_value = {('lit', '123'): 1}
+
+    schema = ReferenceItemSchemaV1()
+    dump = {
+        'record': {
+            '$ref': 'http://localhost:5000/api/literature/123',
+        },
+    }
+    expected = {
+        'control_number': 123,
+        'titles': [{'title': 'Partner of Higgs Boson'}],
+    }
+
+    assert expected == json.loads(schema.dumps(dump).data)
+    assert expected == json.loads(schema.dumps(dump).data)
+    assert record.call_count == 1
+
+    revisions.return_value = {('lit', '123'): 2}
+
+    assert expected == json.loads(schema.dumps(dump).data)
+    assert record.call_count == 2
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import MagicMock
+
+from inspirehep.modules.records.identifiers import IdentifiersIndex
+
+
+def test_get_record_identifiers():
+    record = {
+        '_collections': ['Literature'],
+        'arxiv_eprints': [{'value': '1607.06746'}],
+        'dois': [{'value': '10.1007/JHEP05(2017)074'}],
+        'report_numbers': [{'value': 'CERN-TH/2016-123'}],
+        'texkeys': ['Smith:2016abc'],
+    }
+
+    expected = {
+        'arxiv_eprint:1607.06746',
+        'doi:10.1007/jhep05(2017)074',
+        'report_number:cernth2016123',
+        'texkey:Smith:2016abc',
+    }
+
+    assert IdentifiersIndex.get_record_identifiers(record) == expected
+
+
+def test_get_record_identifiers_skips_deleted_and_non_literature_records():
+    deleted = {
+        '_collections': ['Literature'],
+        'deleted': True,
+        'dois': [{'value': '10.1007/JHEP05(2017)074'}],
+    }
+    hal = {
+        '_collections': ['HAL Hidden'],
+        'dois': [{'value': '10.1007/JHEP05(2017)074'}],
+    }
+
+    assert IdentifiersIndex.get_record_identifiers(deleted) == set()
+    assert IdentifiersIndex.get_record_identifiers(hal) == set()
+
+
+def test_get_reference_identifiers_normalizes_report_numbers():
+    reference = {
+        'reference': {
+            'arxiv_eprint': '1607.06746',
+            'report_numbers': ['CERN-TH-2016-123'],
+        },
+    }
+
+    expected = {
+        'arxiv_eprint:1607.06746',
+        'report_number:cernth2016123',
+    }
+
+    assert IdentifiersIndex.get_reference_identifiers(reference) == expected
+
+
+def test_get_reference_identifiers_lowercases_arxiv_eprints_dois_and_isbns():
+    reference = {
+        'reference': {
+            'arxiv_eprint': 'hep-TH/9711200',
+            'dois': ['10.1103/PhysRevD.94.054021'],
+            'isbn': '978-3-16-148410-X',
+            'texkey': 'Maldacena:1997re',
+        },
+    }
+
+    expected = {
+        'arxiv_eprint:hep-th/9711200',
+        'doi:10.1103/physrevd.94.054021',
+        'isbn:978-3-16-148410-x',
+        'texkey:Maldacena:1997re',
+    }
+
+    assert IdentifiersIndex.get_reference_identifiers(reference) == expected
+
+
+def test_identifiers_index_update_only_touches_changed_identifiers():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.side_effect = [[{b'doi:10.1/a', b'arxiv_eprint:1607.06746'}], []]
+    index = IdentifiersIndex(redis)
+
+    record = {
+        '_collections': ['Literature'],
+        'arxiv_eprints': [{'value': '1607.06746'}],
+        'dois': [{'value': '10.1/b'}],
+    }
+    index.update([(1, record)])
+
+    pipeline.srem.assert_called_once_with('records:identifiers:id:doi:10.1/a', 1)
+    pipeline.sadd.assert_any_call('records:identifiers:id:doi:10.1/b', 1)
+
+
+def test_identifiers_index_update_removes_deleted_records():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.side_effect = [[{b'doi:10.1/a'}], []]
+    index = IdentifiersIndex(redis)
+
+    index.update([(1, {})])
+
+    pipeline.srem.assert_called_once_with('records:identifiers:id:doi:10.1/a', 1)
+    pipeline.delete.assert_called_once_with('records:identifiers:recid:1')
+    pipeline.sadd.assert_not_called()
+
+
+def test_identifiers_index_get_recids():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.return_value = [{b'1'}, {b'1', b'2'}, set()]
+    index = IdentifiersIndex(redis)
+
+    references = [
+        {'reference': {'arxiv_eprint': '1607.06746', 'dois': ['10.1/a']}},
+        {'reference': {'dois': ['10.1/b']}},
+        {'reference': {'title': {'title': 'No identifiers'}}},
+    ]
+
+    assert index.get_recids(references) == [[1, 2], [], []]
+
+
+def test_identifiers_index_unload():
+    redis = MagicMock()
+    index = IdentifiersIndex(redis)
+
+    index.unload()
+
+    redis.delete.assert_called_once_with('records:identifiers:loaded')
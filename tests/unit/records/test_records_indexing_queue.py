@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import MagicMock
+
+from inspirehep.modules.records.indexing_queue import CitationsReindexQueue
+
+
+def test_citations_reindex_queue_push_asks_to_schedule_first_flush():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.side_effect = [[2, True], [2, 0]]
+    queue = CitationsReindexQueue(redis)
+
+    assert queue.push(['uuid1', 'uuid2'], 10)
+
+    pipeline.sadd.assert_called_once_with('records:citations_reindex:pending', 'uuid1', 'uuid2')
+    pipeline.set.assert_called_once_with(
+        'records:citations_reindex:flush_scheduled', 1, nx=True, ex=100)
+
+
+def test_citations_reindex_queue_push_counts_collapsed_duplicates():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.side_effect = [[1, None], [3, 2]]
+    queue = CitationsReindexQueue(redis)
+
+    assert not queue.push(['uuid1', 'uuid2', 'uuid3'], 10)
+
+    pipeline.hincrby.assert_any_call('records:citations_reindex:stats', 'requested', 3)
+    pipeline.hincrby.assert_any_call('records:citations_reindex:stats', 'collapsed', 2)
+
+
+def test_citations_reindex_queue_push_does_nothing_without_uuids():
+    redis = MagicMock()
+    queue = CitationsReindexQueue(redis)
+
+    assert not queue.push([], 10)
+    redis.pipeline.assert_not_called()
+
+
+def test_citations_reindex_queue_pop():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.side_effect = [[1, {'uuid2', 'uuid1'}, 1], [2, 1]]
+    queue = CitationsReindexQueue(redis)
+
+    assert queue.pop() == ['uuid1', 'uuid2']
+    pipeline.hincrby.assert_any_call('records:citations_reindex:stats', 'flushed', 2)
+
+
+def test_citations_reindex_queue_requeue():
+    redis = MagicMock()
+    pipeline = redis.pipeline.return_value
+    queue = CitationsReindexQueue(redis)
+
+    queue.requeue(['uuid1', 'uuid2'])
+
+    pipeline.sadd.assert_called_once_with('records:citations_reindex:pending', 'uuid1', 'uuid2')
+    pipeline.hincrby.assert_any_call('records:citations_reindex:stats', 'flushed', -2)
+    pipeline.hincrby.assert_any_call('records:citations_reindex:stats', 'requeued', 2)
+
+
+def test_citations_reindex_queue_stats():
+    redis = MagicMock()
+    redis.hgetall.return_value = {'requested': '5', 'collapsed': '2'}
+    redis.scard.return_value = 3
+    queue = CitationsReindexQueue(redis)
+
+    expected = {
+        'requested': 5,
+        'collapsed': 2,
+        'flushed': 0,
+        'requeued': 0,
+        'flushes': 0,
+        'pending': 3,
+    }
+
+    assert queue.stats() == expected
@@ -28,7 +28,8 @@ from mock import patch
 from jsonref import JsonRef
 
 from inspirehep.modules.records.json_ref_loader import (
-    AbstractRecordLoader, DatabaseJsonLoader, ESJsonLoader, replace_refs)
+    AbstractRecordLoader, DatabaseJsonLoader, ESJsonLoader,
+    invalidate_cached_record, replace_refs)
 from inspirehep.utils.record_getter import RecordGetterError
 
 
@@ -182,3 +183,53 @@ def test_specific_loaders_return_none(get_db_rec, get_es_rec, g_p_t_f_e):
         assert expect_none == None  # noqa: E711
         assert get_db_rec.call_count == 1
         assert get_es_rec.call_count == 1
+
+
+@patch('inspirehep.modules.records.json_ref_loader.get_pid_type_from_endpoint')
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_record')
+def test_database_loader_caches_records(get_db_rec, g_p_t_f_e):
+    class CachingDatabaseJsonLoader(DatabaseJsonLoader):
+        _cache = None
+
+    g_p_t_f_e.return_value = 'jou'
+    get_db_rec.return_value = {'control_number': 1}
+
+    for _ in range(2):
+        ref = JsonRef({'$ref': _build_url('journals', '1')}, loader=CachingDatabaseJsonLoader())
+        assert ref == {'control_number': 1}
+
+    assert get_db_rec.call_count == 1
+
+    invalidate_cached_record('jou', 1)
+    ref = JsonRef({'$ref': _build_url('journals', '1')}, loader=CachingDatabaseJsonLoader())
+    assert ref == {'control_number': 1}
+
+    assert get_db_rec.call_count == 2
+
+
+@patch('inspirehep.modules.records.json_ref_loader.get_pid_type_from_endpoint')
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_record')
+@patch('inspirehep.modules.records.json_ref_loader.record_getter.get_db_records')
+def test_database_loader_prefetch(get_db_recs, get_db_rec, g_p_t_f_e):
+    class CachingDatabaseJsonLoader(DatabaseJsonLoader):
+        _cache = None
+
+    g_p_t_f_e.return_value = 'jou'
+    get_db_recs.return_value = [
+        {'$schema': 'http://localhost:5000/schemas/records/journals.json', 'control_number': 1},
+        {'$schema': 'http://localhost:5000/schemas/records/journals.json', 'control_number': 2},
+    ]
+    obj = [
+        {'$ref': _build_url('journals', '1')},
+        {'$ref': _build_url('journals', '2')},
+        {'$ref': _build_url('journals', '1')},
+    ]
+
+    loader = CachingDatabaseJsonLoader()
+    loader.prefetch(obj)
+    result = JsonRef.replace_refs(obj, loader=loader)
+
+    assert [journal['control_number'] for journal in result] == [1, 2, 1]
+    assert get_db_recs.call_count == 1
+    assert sorted(get_db_recs.call_args[0][0]) == [('jou', '1'), ('jou', '2')]
+    assert get_db_rec.call_count == 0
@@ -25,11 +25,15 @@ from __future__ import absolute_import, division, print_function
 from uuid import UUID
 import pytest
 import mock
+from flask import current_app
+from invenio_records.models import RecordMetadata
+from redis.exceptions import ConnectionError
 
 from inspire_schemas.api import load_schema, validate
 from inspirehep.modules.records.receivers import (
     assign_phonetic_block,
     assign_uuid,
+    update_identifiers_index_after_commit,
 )
 
 
@@ -256,3 +260,19 @@ def test_assign_uuid_does_not_touch_existing_uuids(mock_uuid4):
 
     assert validate(result, subschema) is None
     assert expected == result
+
+
+@mock.patch('inspirehep.modules.records.receivers.IdentifiersIndex')
+def test_update_identifiers_index_after_commit_unloads_the_index_if_redis_fails(mock_identifiers_index):
+    mock_identifiers_index.return_value.update.side_effect = ConnectionError
+    record = mock.MagicMock(spec=RecordMetadata, json={
+        '$schema': 'http://localhost:5000/records/schemas/hep.json',
+        'control_number': 1,
+    })
+
+    config = {'RECORDS_IDENTIFIERS_INDEX_ENABLED': True}
+    with mock.patch.dict(current_app.config, config):
+        update_identifiers_index_after_commit(None, [(record, 'update')])
+
+    mock_identifiers_index.return_value.update.assert_called_once_with([(1, record.json)])
+    mock_identifiers_index.return_value.unload.assert_called_once_with()
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from mock import MagicMock, patch
+
+from inspirehep.modules.records.reindex import Reindexer, swap_index
+
+
+class MockedCheckpoint(object):
+
+    def __init__(self, job_id, pid_type, last_object_uuid=None, processed=0,
+                 target_index=None, finished=False):
+        self.job_id = job_id
+        self.pid_type = pid_type
+        self.last_object_uuid = last_object_uuid
+        self.processed = processed
+        self.succeeded = processed
+        self.failed = 0
+        self.target_index = target_index
+        self.finished = finished
+
+
+class MockedTask(object):
+
+    def __init__(self, task_id, result=None, ready=True, failed=False):
+        self.id = task_id
+        self.result = result
+        self._ready = ready
+        self._failed = failed
+
+    def ready(self):
+        return self._ready
+
+    def failed(self):
+        return self._failed
+
+
+@pytest.fixture
+def reindex_mocks():
+    """Mock the DB, the celery task and the source of uuids of the ``Reindexer``.
+
+    Every pid type has 5 records, ``<pid_type>-0`` to ``<pid_type>-4``, and
+    the checkpoints of a job are those in ``mocks.stored_checkpoints``.
+    """
+    uuids = {pid_type: ['{}-{}'.format(pid_type, i) for i in range(5)] for pid_type in ('lit', 'aut')}
+
+    def get_next_uuids_to_index(pid_type, after_uuid=None, limit=200):
+        remaining = [uuid for uuid in uuids[pid_type] if after_uuid is None or uuid > after_uuid]
+        return remaining[:limit]
+
+    def get_or_create(job_id, pid_type):
+        return mocks.stored_checkpoints.setdefault(pid_type, MockedCheckpoint(job_id, pid_type))
+
+    def apply_async(kwargs, queue):
+        task = MockedTask('task-{}'.format(len(mocks.sent)), ready=False)
+        mocks.sent.append((task, kwargs, queue))
+        return task
+
+    with patch('inspirehep.modules.records.reindex.db'), \
+            patch('inspirehep.modules.records.reindex.get_query_records_to_index') as query, \
+            patch('inspirehep.modules.records.reindex.get_next_uuids_to_index',
+                  side_effect=get_next_uuids_to_index) as next_uuids, \
+            patch('inspirehep.modules.records.reindex.RecordsReindexCheckpoint') as checkpoint_model, \
+            patch('inspirehep.modules.records.reindex.batch_reindex') as batch_reindex:
+        query.return_value.count.return_value = 10
+        checkpoint_model.get_or_create.side_effect = get_or_create
+        batch_reindex.apply_async.side_effect = apply_async
+
+        mocks = MagicMock()
+        mocks.stored_checkpoints = {}
+        mocks.sent = []
+        mocks.get_next_uuids_to_index = next_uuids
+        yield mocks
+
+
+def _finish(task, success):
+    task._ready = True
+    task.result = {'success': success, 'failures': []}
+
+
+def test_reindexer_schedules_batches_of_every_partition_in_turns(reindex_mocks):
+    reindexer = Reindexer('job', ['lit', 'aut'], batch_size=2, max_pending_batches=3)
+
+    assert reindexer._schedule_batches()
+
+    sent_uuids = [kwargs['uuids'] for _, kwargs, _ in reindex_mocks.sent]
+    assert sent_uuids == [['lit-0', 'lit-1'], ['aut-0', 'aut-1'], ['lit-2', 'lit-3']]
+    assert reindexer.cursors == {'lit': 'lit-3', 'aut': 'aut-1'}
+
+
+def test_reindexer_schedule_batches_does_not_exceed_max_pending_batches(reindex_mocks):
+    reindexer = Reindexer('job', ['lit', 'aut'], batch_size=1, max_pending_batches=1)
+
+    reindexer._schedule_batches()
+
+    assert len(reindex_mocks.sent) == 1
+    assert reindexer._pending_count() == 1
+
+
+def test_reindexer_schedule_batches_marks_exhausted_partitions(reindex_mocks):
+    reindexer = Reindexer('job', ['lit', 'aut'], batch_size=5, max_pending_batches=10)
+
+    assert not reindexer._schedule_batches()
+    assert reindexer.exhausted == {'lit': True, 'aut': True}
+    assert len(reindex_mocks.sent) == 2
+
+
+def test_reindexer_collect_batches_only_moves_checkpoint_past_finished_batches_in_order(reindex_mocks):
+    reindexer = Reindexer('job', ['lit'], batch_size=2, max_pending_batches=2)
+    reindexer._schedule_batches()
+    (first, _, _), (second, _, _) = reindex_mocks.sent
+    checkpoint = reindex_mocks.stored_checkpoints['lit']
+
+    _finish(second, 2)
+    reindexer._collect_batches()
+
+    assert checkpoint.last_object_uuid is None
+    assert checkpoint.processed == 0
+
+    _finish(first, 1)
+    reindexer._collect_batches()
+
+    assert checkpoint.last_object_uuid == 'lit-3'
+    assert checkpoint.processed == 4
+    assert checkpoint.succeeded == 3
+    assert not checkpoint.finished
+
+
+def test_reindexer_collect_batches_counts_failed_batches(reindex_mocks):
+    reindexer = Reindexer('job', ['lit'], batch_size=5, max_pending_batches=1)
+    reindexer._schedule_batches()
+    task = reindex_mocks.sent[0][0]
+    task._ready, task._failed, task.result = True, True, Exception('ES is down')
+    reindexer._collect_batches()
+    reindexer._schedule_batches()
+    reindexer._collect_batches()
+
+    checkpoint = reindex_mocks.stored_checkpoints['lit']
+    assert checkpoint.failed == 5
+    assert checkpoint.last_object_uuid == 'lit-4'
+    assert checkpoint.finished
+    assert reindexer.batch_errors == [{'task_id': task.id, 'error': task.result}]
+
+
+def test_reindexer_resumes_a_job_from_its_checkpoints(reindex_mocks):
+    reindex_mocks.stored_checkpoints['lit'] = MockedCheckpoint('job', 'lit', last_object_uuid='lit-2', processed=3)
+    reindex_mocks.stored_checkpoints['aut'] = MockedCheckpoint('job', 'aut', last_object_uuid='aut-4', processed=5,
+                                                               finished=True)
+
+    reindexer = Reindexer('job', ['lit', 'aut'], batch_size=10, max_pending_batches=10)
+
+    assert reindexer.processed == 8
+    assert reindexer.exhausted == {'lit': False, 'aut': True}
+
+    reindexer._schedule_batches()
+
+    sent_uuids = [kwargs['uuids'] for _, kwargs, _ in reindex_mocks.sent]
+    assert sent_uuids == [['lit-3', 'lit-4']]
+    reindex_mocks.get_next_uuids_to_index.assert_any_call('lit', 'lit-2', 10)
+
+
+@patch('inspirehep.modules.records.reindex.get_search_class_for_pid_type')
+def test_reindexer_resumes_building_new_indices_without_new_index(search_class, reindex_mocks):
+    search_class.return_value.Meta.index = 'records-hep'
+    reindex_mocks.stored_checkpoints['lit'] = MockedCheckpoint(
+        'job', 'lit', last_object_uuid='lit-2', processed=3, target_index='records-hep-20180101000000')
+
+    reindexer = Reindexer('job', ['lit'], batch_size=10, max_pending_batches=10)
+
+    assert reindexer.new_index
+    assert reindexer.target_indices == {'records-hep': 'records-hep-20180101000000'}
+
+    with patch.object(reindexer, '_swap_new_indices') as swap_new_indices, \
+            patch.object(reindexer, '_create_new_indices'):
+        def finish_all_batches(reindexer):
+            for task, _, _ in reindex_mocks.sent:
+                _finish(task, 2)
+
+        reindexer.run(on_progress=finish_all_batches, interval=0)
+
+    swap_new_indices.assert_called_once_with()
+    assert reindex_mocks.sent[0][1]['target_indices'] == {'records-hep': 'records-hep-20180101000000'}
+
+
+@patch('inspirehep.modules.records.reindex.es')
+def test_swap_index_moves_alias_and_deletes_old_index(mock_es):
+    mock_es.indices.exists_alias.return_value = True
+    mock_es.indices.get_alias.side_effect = [
+        {'records-hep-1': {'aliases': {'records-hep': {}}}},
+        {'records-hep-1': {'aliases': {'records-hep': {}, 'records': {}}}},
+    ]
+
+    swap_index('records-hep', 'records-hep-2')
+
+    mock_es.indices.update_aliases.assert_called_once_with(body={
+        'actions': [
+            {'add': {'index': 'records-hep-2', 'alias': 'records'}},
+            {'add': {'index': 'records-hep-2', 'alias': 'records-hep'}},
+            {'remove': {'index': 'records-hep-1', 'alias': 'records-hep'}},
+        ],
+    })
+    mock_es.indices.delete.assert_called_once_with(index='records-hep-1')
+
+
+@patch('inspirehep.modules.records.reindex.es')
+def test_swap_index_replaces_concrete_index_with_alias(mock_es):
+    mock_es.indices.exists_alias.return_value = False
+    mock_es.indices.exists.return_value = True
+    mock_es.indices.get_alias.return_value = {
+        'records-hep': {'aliases': {'records': {}}},
+    }
+
+    swap_index('records-hep', 'records-hep-2')
+
+    mock_es.indices.delete.assert_not_called()
+    mock_es.indices.update_aliases.assert_called_once_with(body={
+        'actions': [
+            {'add': {'index': 'records-hep-2', 'alias': 'records'}},
+            {'add': {'index': 'records-hep-2', 'alias': 'records-hep'}},
+            {'remove_index': {'index': 'records-hep'}},
+        ],
+    })
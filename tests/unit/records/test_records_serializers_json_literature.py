@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+from mock import MagicMock
+
+from inspirehep.modules.records.serializers import json_literature_ui_v1_search
+
+
+def test_serialize_search_splices_the_ui_display_of_the_hits():
+    ui_display = '{"control_number": 1, "titles": [{"title": "\\"Quoted\\" title"}]}'
+    search_result = {
+        'hits': {
+            'hits': [
+                {
+                    '_id': 'fbc0a4ed-2ea2-4fa8-b1a5-d1e8ab7ee6ab',
+                    '_version': 1,
+                    '_source': {
+                        '$schema': 'http://localhost:5000/schemas/records/hep.json',
+                        'control_number': 1,
+                        '_ui_display': ui_display,
+                    },
+                },
+            ],
+            'total': 1,
+        },
+    }
+
+    def pid_fetcher(uuid, source):
+        return MagicMock(pid_value=source['control_number'])
+
+    result = json_literature_ui_v1_search.serialize_search(pid_fetcher, search_result)
+
+    assert ui_display in result
+
+    hit = json.loads(result)['hits']['hits'][0]
+
+    assert hit['id'] == 1
+    assert hit['metadata'] == json.loads(ui_display)
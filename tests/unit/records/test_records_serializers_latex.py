@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import MagicMock
+
+from inspirehep.modules.records.serializers.latex import LatexSerializer
+
+
+def test_serialize_stream_serializes_a_chunk_at_a_time():
+    serializer = LatexSerializer('EU', schema_class=MagicMock())
+    serializer.serialize_entry = MagicMock(side_effect=lambda record: u'%\\cite{' + record['texkey'] + u'}')
+
+    records = iter([{'texkey': u'A:2018a'}, {'texkey': u'B:2018b'}, {'texkey': u'C:2018c'}])
+    chunks = list(serializer.serialize_stream(records, chunk_size=2))
+
+    assert chunks == [u'%\\cite{A:2018a}\n\n%\\cite{B:2018b}', u'\n\n%\\cite{C:2018c}']
+
+
+def test_serialize_stream_uses_the_precomputed_entries():
+    serializer = LatexSerializer('EU', schema_class=MagicMock())
+    serializer.serialize_entry = MagicMock(side_effect=lambda record: u'%\\cite{' + record['texkey'] + u'}')
+
+    records = [
+        {'texkey': u'A:2018a', '_export_formats': {'latex-eu': u'precomputed A:2018a'}},
+        {'texkey': u'B:2018b'},
+    ]
+    chunks = list(serializer.serialize_stream(records, chunk_size=2, export_format='latex-eu'))
+
+    assert chunks == [u'precomputed A:2018a\n\n%\\cite{B:2018b}']
+    serializer.serialize_entry.assert_called_once_with({'texkey': u'B:2018b'})
+
+
+def test_serialize_stream_handles_no_records():
+    serializer = LatexSerializer('EU', schema_class=MagicMock())
+
+    assert list(serializer.serialize_stream([], chunk_size=2)) == []
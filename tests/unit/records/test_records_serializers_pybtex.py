@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import MagicMock
+
+from inspirehep.modules.records.serializers.pybtex_serializer_base import PybtexSerializerBase
+
+
+def test_serialize_stream_serializes_a_chunk_at_a_time():
+    serializer = PybtexSerializerBase(MagicMock(), MagicMock())
+    serializer.create_bibliography = MagicMock(
+        side_effect=lambda records: u''.join(record['texkey'] + u'\n' for record in records)
+    )
+
+    records = iter([{'texkey': u'A:2018a'}, {'texkey': u'B:2018b'}, {'texkey': u'C:2018c'}])
+    chunks = list(serializer.serialize_stream(records, chunk_size=2))
+
+    assert chunks == [u'A:2018a\n\nB:2018b\n', u'\nC:2018c\n']
+
+
+def test_serialize_stream_uses_the_precomputed_entries():
+    serializer = PybtexSerializerBase(MagicMock(), MagicMock())
+    serializer.create_bibliography = MagicMock(
+        side_effect=lambda records: u''.join(record['texkey'] + u'\n' for record in records)
+    )
+
+    records = [
+        {'texkey': u'A:2018a', '_export_formats': {'bibtex': u'precomputed A:2018a\n'}},
+        {'texkey': u'B:2018b'},
+    ]
+    chunks = list(serializer.serialize_stream(records, chunk_size=2, export_format='bibtex'))
+
+    assert chunks == [u'precomputed A:2018a\n\nB:2018b\n']
+    serializer.create_bibliography.assert_called_once_with([{'texkey': u'B:2018b'}])
+
+
+def test_serialize_stream_handles_no_records():
+    serializer = PybtexSerializerBase(MagicMock(), MagicMock())
+
+    assert list(serializer.serialize_stream([], chunk_size=2)) == []
+
+
+def test_serialize_caches_the_serialized_revision_of_a_record():
+    serializer = PybtexSerializerBase(MagicMock(), MagicMock())
+    serializer.create_bibliography = MagicMock(return_value=u'@article{A:2018a}')
+    record = MagicMock(id='fbc0a4ed-2ea2-4fa8-b1a5-d1e8ab7ee6ab', revision_id=1)
+
+    assert serializer.serialize(1, record) == u'@article{A:2018a}'
+    assert serializer.serialize(1, record) == u'@article{A:2018a}'
+    assert serializer.create_bibliography.call_count == 1
+
+    record.revision_id = 2
+
+    assert serializer.serialize(1, record) == u'@article{A:2018a}'
+    assert serializer.create_bibliography.call_count == 2
+
+
+def test_serialize_does_not_cache_records_without_a_revision():
+    serializer = PybtexSerializerBase(MagicMock(), MagicMock())
+    serializer.create_bibliography = MagicMock(return_value=u'@article{A:2018a}')
+    record = {'control_number': 1}
+
+    serializer.serialize(1, record)
+    serializer.serialize(1, record)
+
+    assert serializer.create_bibliography.call_count == 2
@@ -22,10 +22,16 @@
 
 from __future__ import absolute_import, division, print_function
 
+import pytest
 from flask import current_app
 from mock import patch
 
-from inspirehep.modules.records.tasks import update_links, batch_reindex
+from inspirehep.modules.records.errors import CitationsReindexError
+from inspirehep.modules.records.tasks import (
+    batch_reindex,
+    flush_citations_reindex_queue,
+    update_links,
+)
 
 
 def test_update_links():
@@ -148,13 +154,35 @@ def test_update_links_ignores_non_whitelisted_paths():
         }
 
 
-def record_generator(uuid):
-    record = {
-        '$schema': 'http://localhost:5000/schemas/record/hep.json',
-    }
-    if uuid.endswith("_deleted"):
-        record['deleted'] = True
-    return record
+class MockedRecord(dict):
+
+    def __init__(self, uuid, *args, **kwargs):
+        super(MockedRecord, self).__init__(*args, **kwargs)
+        self.id = uuid
+
+
+def records_generator(uuids):
+    records = []
+    for uuid in uuids:
+        if uuid.endswith("_missing"):
+            continue
+        record = MockedRecord(uuid, {
+            '$schema': 'http://localhost:5000/schemas/record/hep.json',
+        })
+        if uuid.endswith("_deleted"):
+            record['deleted'] = True
+        records.append(record)
+    return records
+
+
+def mocked_create_index_ops(records, **kwargs):
+    return [{'_id': record.id} for record in records]
+
+
+def mocked_create_index_ops_failing_on_broken_records(records, **kwargs):
+    if any(record.id.endswith('_broken') for record in records):
+        raise ValueError('Cannot enhance a broken record')
+    return mocked_create_index_ops(records, **kwargs)
 
 
 def mocked_bulk(es, records, **kwargs):
@@ -164,45 +192,149 @@ def mocked_bulk(es, records, **kwargs):
     return (count, 0)
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
-@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops)
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_check_reindex_records_count(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_check_reindex_records_count(mocked_bulk, create_index_ops, get_records):
     records = ['000', 'aaa', 'bbb', 'ccc']
     output = batch_reindex(uuids=records)
-    assert create_index_op.call_count == 4
+    assert get_records.call_count == 1
+    assert create_index_ops.call_count == 1
     assert output['success'] == 4
     assert output['failures'] == []
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
-@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops)
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_reindex_skips_deleted_records(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_reindex_skips_deleted_records(mocked_bulk, create_index_ops, get_records):
     records = ['000', 'aaa_deleted', 'bbb', 'ccc']
     output = batch_reindex(uuids=records)
-    assert create_index_op.call_count == 3
+    indexed_records = create_index_ops.call_args[0][0]
+    assert [record.id for record in indexed_records] == ['000', 'bbb', 'ccc']
     assert output['success'] == 3
     assert output['failures'] == []
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
-@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops)
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_reindex_only_deleted_records(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_reindex_only_deleted_records(mocked_bulk, create_index_ops, get_records):
     records = ['000_deleted', 'aaa_deleted', 'bbb_deleted', 'ccc_deleted']
     output = batch_reindex(uuids=records)
-    assert create_index_op.call_count == 0
+    assert create_index_ops.call_args[0][0] == []
     assert output['success'] == 0
     assert output['failures'] == []
 
 
-@patch('inspirehep.modules.records.tasks.InspireRecord.get_record', side_effect=record_generator)
-@patch('inspirehep.modules.records.tasks.create_index_op', side_effect=None)
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops)
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+def test_record_task_batch_logic_reindex_skips_missing_records(mocked_bulk, create_index_ops, get_records):
+    records = ['000', 'aaa_missing', 'bbb']
+    output = batch_reindex(uuids=records)
+    assert output['success'] == 2
+    assert output['failures'] == []
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops)
 @patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
-def test_record_task_batch_logic_nothing_to_reindex(get_record, create_index_op, mocked_bulk):
+def test_record_task_batch_logic_nothing_to_reindex(mocked_bulk, create_index_ops, get_records):
     records = []
     output = batch_reindex(uuids=records)
-    assert create_index_op.call_count == 0
+    assert get_records.call_count == 0
+    assert create_index_ops.call_count == 0
     assert output['success'] == 0
     assert output['failures'] == []
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops)
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+def test_record_task_batch_logic_loads_records_in_chunks(mocked_bulk, create_index_ops, get_records):
+    records = [str(i) for i in range(5)]
+    with patch.dict(current_app.config, {'INDEXER_BULK_ENHANCE_CHUNK_SIZE': 2}):
+        output = batch_reindex(uuids=records)
+    assert get_records.call_count == 3
+    assert create_index_ops.call_count == 3
+    assert output['success'] == 5
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops_failing_on_broken_records)
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+def test_record_task_batch_logic_skips_records_failing_to_enhance(mocked_bulk, create_index_ops, get_records):
+    records = ['000', 'aaa_broken', 'bbb']
+    output = batch_reindex(uuids=records, skip_failing_records=True)
+    assert output['success'] == 2
+    assert output['failures'] == []
+    assert output['skipped'] == ['aaa_broken']
+
+
+@patch('inspirehep.modules.records.tasks.InspireRecord.get_records', side_effect=records_generator)
+@patch('inspirehep.modules.records.tasks.create_index_ops', side_effect=mocked_create_index_ops_failing_on_broken_records)
+@patch('inspirehep.modules.records.tasks.bulk', side_effect=mocked_bulk)
+@patch('inspirehep.modules.records.tasks.CitationsReindexQueue')
+def test_flush_citations_reindex_queue_indexes_the_other_records_if_one_fails_to_enhance(
+    queue, mocked_bulk, create_index_ops, get_records
+):
+    queue.return_value.pop.return_value = ['000', 'aaa_broken', 'bbb']
+
+    output = flush_citations_reindex_queue()
+
+    assert output['success'] == 2
+    assert output['skipped'] == ['aaa_broken']
+    queue.return_value.requeue.assert_not_called()
+
+
+@patch('inspirehep.modules.records.tasks.batch_reindex')
+@patch('inspirehep.modules.records.tasks.CitationsReindexQueue')
+def test_flush_citations_reindex_queue(queue, batch_reindex):
+    queue.return_value.pop.return_value = ['aaa', 'bbb']
+
+    batch_reindex.return_value = {'success': 2, 'failures': [], 'skipped': []}
+
+    assert flush_citations_reindex_queue() == {'success': 2, 'failures': [], 'skipped': []}
+    batch_reindex.assert_called_once_with(['aaa', 'bbb'], skip_failing_records=True)
+    queue.return_value.requeue.assert_not_called()
+
+
+@patch('inspirehep.modules.records.tasks.batch_reindex', side_effect=Exception('ES is down'))
+@patch('inspirehep.modules.records.tasks.CitationsReindexQueue')
+def test_flush_citations_reindex_queue_requeues_records_if_bulk_fails(queue, batch_reindex):
+    queue.return_value.pop.return_value = ['aaa', 'bbb']
+
+    with pytest.raises(Exception):
+        flush_citations_reindex_queue()
+
+    queue.return_value.requeue.assert_called_once_with(['aaa', 'bbb'])
+
+
+@patch('inspirehep.modules.records.tasks.batch_reindex')
+@patch('inspirehep.modules.records.tasks.CitationsReindexQueue')
+def test_flush_citations_reindex_queue_requeues_only_retryable_failures(queue, batch_reindex):
+    queue.return_value.pop.return_value = ['aaa', 'bbb', 'ccc', 'ddd']
+    batch_reindex.return_value = {
+        'success': 1,
+        'failures': [
+            {'index': {'_id': 'aaa', 'status': 429}},
+            {'index': {'_id': 'bbb', 'status': 400}},
+            {'index': {'_id': 'ccc', 'status': 503}},
+        ],
+        'skipped': [],
+    }
+
+    with pytest.raises(CitationsReindexError):
+        flush_citations_reindex_queue()
+
+    queue.return_value.requeue.assert_called_once_with(['aaa', 'ccc'])
+
+
+@patch('inspirehep.modules.records.tasks.batch_reindex')
+@patch('inspirehep.modules.records.tasks.CitationsReindexQueue')
+def test_flush_citations_reindex_queue_does_nothing_if_queue_is_empty(queue, batch_reindex):
+    queue.return_value.pop.return_value = []
+
+    assert flush_citations_reindex_queue() is None
+    batch_reindex.assert_not_called()
@@ -22,7 +22,7 @@
 
 from __future__ import absolute_import, division, print_function
 
-from mock import patch
+from mock import MagicMock, patch
 
 from inspire_schemas.api import load_schema, validate
 from inspire_utils.name import generate_name_variations
@@ -30,8 +30,12 @@ from inspire_utils.name import generate_name_variations
 from inspirehep.modules.records.api import InspireRecord
 from invenio_records.models import RecordMetadata
 from inspirehep.modules.records.utils import (
+    get_authors_recids_and_names,
     get_endpoint_from_record,
     get_pid_from_record_uri,
+    get_pids_from_references,
+    is_citing_record,
+    is_literature_record,
     populate_abstract_source_suggest,
     populate_affiliation_suggest,
     populate_author_count,
@@ -40,6 +44,7 @@ from inspirehep.modules.records.utils import (
     populate_bookautocomplete,
     populate_earliest_date,
     populate_experiment_suggest,
+    populate_export_formats,
     populate_inspire_document_type,
     populate_recid_from_ref,
     populate_title_suggest,
@@ -933,6 +938,37 @@ def test_populate_author_count():
     assert record['author_count'] == 2
 
 
+def test_populate_export_formats():
+    bibtex = MagicMock()
+    bibtex.serialize_entry.return_value = u'@article{Smith:2018abc,\n}\n'
+    marcxml = MagicMock()
+    marcxml.serialize_entry.return_value = u'<record></record>'
+
+    record = {'control_number': 1}
+    populate_export_formats(record, {'bibtex': bibtex, 'marcxml': marcxml})
+
+    expected = {
+        'bibtex': u'@article{Smith:2018abc,\n}\n',
+        'marcxml': u'<record></record>',
+    }
+
+    assert record['_export_formats'] == expected
+    assert '_export_formats_errors' not in record
+
+
+def test_populate_export_formats_flags_the_formats_that_fail():
+    bibtex = MagicMock()
+    bibtex.serialize_entry.return_value = u'@article{Smith:2018abc,\n}\n'
+    latex = MagicMock()
+    latex.serialize_entry.side_effect = ValueError
+
+    record = {'control_number': 1}
+    populate_export_formats(record, {'bibtex': bibtex, 'latex-eu': latex})
+
+    assert record['_export_formats'] == {'bibtex': u'@article{Smith:2018abc,\n}\n'}
+    assert record['_export_formats_errors'] == ['latex-eu']
+
+
 def test_populate_authors_full_name_unicode_normalized():
     schema = load_schema('hep')
     subschema = schema['properties']['authors']
@@ -1029,6 +1065,44 @@ def test_populate_facet_author_name(mocked_get_linked_records_in_field):
     assert record['facet_author_name'] == expected_result
 
 
+def test_populate_facet_author_name_with_linked_authors():
+    linked_authors = {
+        ('aut', '111'): {
+            '$schema': 'http://localhost:5000/records/schemas/authors.json',
+            'name': {'value': 'Silk, James Brian'},
+            '_collections': ['Authors'],
+            'ids': [{'schema': 'INSPIRE BAI', 'value': 'James.Brian.1'}],
+            'control_number': 111,
+        },
+        ('aut', '333'): {
+            '$schema': 'http://localhost:5000/records/schemas/authors.json',
+            'name': {'value': 'Doe, John'},
+            '_collections': ['Authors'],
+            'control_number': 333,
+        },
+    }
+
+    record = {
+        '$schema': 'http://localhost:5000/records/schemas/hep.json',
+        'authors': [
+            {
+                'full_name': 'Silk, James Brian',
+                'record': {'$ref': 'https://labs.inspirehep.net/api/authors/111'}
+            },
+            {
+                'full_name': 'Rohan, George',
+            },
+        ],
+    }
+
+    populate_facet_author_name(record, linked_authors=linked_authors)
+
+    expected = [u'James.Brian.1_James Brian Silk', u'BAI_George Rohan']
+    result = record['facet_author_name']
+
+    assert expected == result
+
+
 def test_get_author_with_record_facet_author_name():
     author1 = {
         '$schema': 'http://localhost:5000/records/schemas/authors.json',
@@ -1056,3 +1130,77 @@ def test_get_author_with_record_facet_author_name():
     author3_facet_author_name = 'BAI_John Doe'
     result = get_author_with_record_facet_author_name(author3)
     assert result == author3_facet_author_name
+
+
+def test_get_pids_from_references():
+    references = [
+        {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+        {'reference': {'title': {'title': 'Not linked'}}},
+        {'record': {'$ref': 'http://localhost:5000/api/data/2'}},
+        {'record': {'$ref': 'http://localhost:5000/api/literature/1'}},
+    ]
+
+    expected = {('lit', '1'), ('dat', '2')}
+    result = get_pids_from_references(references)
+
+    assert expected == result
+
+
+def test_get_pids_from_references_handles_empty_references():
+    assert get_pids_from_references([]) == set()
+
+
+def test_is_citing_record():
+    record = {'_collections': ['Literature']}
+
+    assert is_citing_record(record)
+
+
+def test_is_citing_record_false_when_deleted():
+    record = {'_collections': ['Literature'], 'deleted': True}
+
+    assert not is_citing_record(record)
+
+
+def test_is_citing_record_false_when_not_in_literature():
+    record = {'_collections': ['HERMES Internal Notes']}
+
+    assert not is_citing_record(record)
+
+
+def test_is_citing_record_false_when_superseded():
+    record = {
+        '_collections': ['Literature'],
+        'related_records': [
+            {
+                'record': {'$ref': 'http://localhost:5000/api/literature/1'},
+                'relation': 'successor',
+            },
+        ],
+    }
+
+    assert not is_citing_record(record)
+
+
+def test_is_literature_record():
+    assert is_literature_record({'_collections': ['Literature']})
+
+
+def test_is_literature_record_false_when_deleted():
+    assert not is_literature_record({'_collections': ['Literature'], 'deleted': True})
+
+
+def test_get_authors_recids_and_names():
+    record = {
+        'authors': [
+            {'full_name': 'Smith, J.', 'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+            {'full_name': 'Doe, J.'},
+            {'full_name': 'Smith, John', 'record': {'$ref': 'http://localhost:5000/api/authors/1'}},
+            {'full_name': 'Rossi, M.', 'record': {'$ref': 'http://localhost:5000/api/literature/2'}},
+        ],
+    }
+
+    expected = {1: 'Smith, J.'}
+    result = get_authors_recids_and_names(record)
+
+    assert expected == result
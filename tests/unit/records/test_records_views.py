@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import patch
+
+from inspirehep.modules.records.views import _with_full_sources_if_not_precomputed
+
+
+@patch('inspirehep.modules.records.views.LiteratureSearch')
+def test_with_full_sources_if_not_precomputed_fetches_only_the_records_without_them(literature_search):
+    literature_search.return_value.mget.return_value = [
+        {'control_number': 2, 'titles': [{'title': 'Not precomputed'}]},
+    ]
+    hits = [
+        ('uuid1', {'control_number': 1, '_export_formats': {'bibtex': '@article{1}'}}),
+        ('uuid2', {'control_number': 2}),
+        ('uuid3', {'control_number': 3, '_export_formats': {'bibtex': '@article{3}'}}),
+    ]
+
+    result = list(_with_full_sources_if_not_precomputed(hits, 'bibtex', chunk_size=2))
+
+    assert result == [
+        {'control_number': 1, '_export_formats': {'bibtex': '@article{1}'}},
+        {'control_number': 2, 'titles': [{'title': 'Not precomputed'}]},
+        {'control_number': 3, '_export_formats': {'bibtex': '@article{3}'}},
+    ]
+    literature_search.return_value.mget.assert_called_once_with(
+        ['uuid2'], _source_exclude=['_ui_display', '_export_formats'])
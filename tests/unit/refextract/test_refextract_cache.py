@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import MagicMock, patch
+
+from inspirehep.modules.refextract.cache import (
+    RefextractCache,
+    extract_references_from_string,
+    get_kbs_version,
+)
+
+
+def test_get_kbs_version_changes_with_the_journal_kb(tmpdir):
+    journal_kb = tmpdir.join('journal-titles.kb')
+    journal_kb.write('JOURNAL OF HIGH ENERGY PHYSICS---JHEP\n')
+    version = get_kbs_version({'journals': str(journal_kb)})
+
+    assert get_kbs_version({'journals': str(journal_kb)}) == version
+
+    journal_kb.write('PHYSICAL REVIEW D---Phys.Rev.D\n', mode='a')
+
+    assert get_kbs_version({'journals': str(journal_kb)}) != version
+
+
+@patch('inspirehep.modules.refextract.cache.get_kbs_version', return_value='kbs')
+@patch('inspirehep.modules.refextract.cache.RefextractCache.redis')
+@patch('inspirehep.modules.refextract.cache.refextract')
+def test_extract_references_from_string_uses_the_cache(refextract, redis, get_kbs_version):
+    redis.get.return_value = b'[{"raw_ref": ["cached"]}]'
+
+    result = extract_references_from_string(u'[1] Foo', reference_format=u'{title}')
+
+    assert result == [{'raw_ref': ['cached']}]
+    refextract.extract_references_from_string.assert_not_called()
+
+
+@patch('inspirehep.modules.refextract.cache.get_kbs_version', return_value='kbs')
+@patch('inspirehep.modules.refextract.cache.RefextractCache.redis')
+@patch('inspirehep.modules.refextract.cache.refextract')
+def test_extract_references_from_string_caches_the_extraction(refextract, redis, get_kbs_version):
+    redis.get.return_value = None
+    redis.set.return_value = True
+    redis.pipeline.return_value.execute.return_value = [1, 1]
+    refextract.extract_references_from_string.return_value = [{'raw_ref': ['extracted']}]
+
+    result = extract_references_from_string(u'[1] Foo', reference_format=u'{title}')
+
+    assert result == [{'raw_ref': ['extracted']}]
+    refextract.extract_references_from_string.assert_called_once_with(
+        u'[1] Foo', override_kbs_files=None, reference_format=u'{title}')
+    assert redis.set.call_args[0][1] == '[{"raw_ref": ["extracted"]}]'
+
+
+def test_refextract_cache_evicts_the_oldest_extractions(app):
+    redis = MagicMock()
+    redis.set.return_value = True
+    redis.pipeline.return_value.execute.side_effect = [[3, 3], [b'oldest']]
+    cache = RefextractCache(redis)
+
+    with patch.dict(app.config, {'REFEXTRACT_CACHE_SIZE': 2}):
+        cache.set('newest', [])
+
+    redis.delete.assert_called_once_with('refextract:results:oldest')
+
+
+def test_refextract_cache_does_not_reinsert_cached_extractions():
+    redis = MagicMock()
+    redis.set.return_value = None
+    cache = RefextractCache(redis)
+
+    cache.set('key', [])
+
+    redis.pipeline.assert_not_called()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import patch
+
+from inspirehep.modules.refextract.matcher import match_references
+
+
+def _hits(*recids):
+    return {'hits': {'hits': [{'_source': {'control_number': recid}} for recid in recids]}}
+
+
+@patch('inspirehep.modules.refextract.matcher.IdentifiersIndex')
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_sends_the_queries_of_each_configuration_together(es, identifiers_index):
+    identifiers_index.return_value.is_loaded.return_value = False
+
+    def msearch(body):
+        # The first msearch only has the query on the arXiv eprint.
+        if es.msearch.call_count == 1:
+            return {'responses': [_hits(1)]}
+        # Two records match the publication info of the second reference.
+        return {'responses': [_hits(1, 2) for _ in body[::2]]}
+
+    es.msearch.side_effect = msearch
+
+    references = [
+        {
+            'reference': {
+                'arxiv_eprint': '1607.06746',
+            },
+        },
+        {
+            'reference': {
+                'publication_info': {
+                    'artid': '074',
+                    'journal_title': 'JHEP',
+                    'journal_volume': '05',
+                    'page_start': '074',
+                    'year': 2017,
+                },
+            },
+        },
+        {
+            'curated_relation': True,
+            'reference': {
+                'arxiv_eprint': '1607.06747',
+            },
+        },
+    ]
+
+    matched_references = match_references(references)
+
+    assert es.msearch.call_count == 2
+    assert matched_references[0]['record']['$ref'].endswith('/api/literature/1')
+    assert matched_references[1]['record']['$ref'].endswith('/api/literature/1')
+    assert matched_references[1]['reference']['publication_info']['year'] == 2017
+    assert 'record' not in matched_references[2]
+
+
+@patch('inspirehep.modules.refextract.matcher.IdentifiersIndex')
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_uses_the_identifiers_index_before_es(es, identifiers_index):
+    identifiers_index.return_value.is_loaded.return_value = True
+    identifiers_index.return_value.get_recids.return_value = [[1], []]
+    es.msearch.return_value = {'responses': [_hits(2)]}
+
+    references = [
+        {
+            'reference': {
+                'arxiv_eprint': '1607.06746',
+            },
+        },
+        {
+            'reference': {
+                'dois': ['10.1/not-in-the-index'],
+            },
+        },
+    ]
+
+    matched_references = match_references(references)
+
+    assert es.msearch.call_count == 1
+    assert len(es.msearch.call_args[1]['body']) == 2
+    assert matched_references[0]['record']['$ref'].endswith('/api/literature/1')
+    assert matched_references[1]['record']['$ref'].endswith('/api/literature/2')
@@ -22,7 +22,9 @@
 
 from __future__ import absolute_import, division, print_function
 
-from inspirehep.modules.refextract.utils import KbWriter
+from io import BytesIO
+
+from inspirehep.modules.refextract.utils import KbWriter, write_file
 
 
 def test_kb_writer_two_entries(tmpdir):
@@ -90,3 +92,13 @@ def test_kb_writer_multiple_runs(tmpdir):
     ]
 
     assert expected == kb_file.readlines()
+
+
+def test_write_file_replaces_the_file_atomically(tmpdir):
+    kb_file = tmpdir.join('atomic.kb')
+    kb_file.write('OLD---Old\n')
+
+    write_file(str(kb_file), BytesIO(b'NEW---New\n'))
+
+    assert kb_file.read() == 'NEW---New\n'
+    assert tmpdir.listdir() == [kb_file]
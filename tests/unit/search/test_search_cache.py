@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import json
+
+from flask import current_app
+from mock import MagicMock, patch
+from redis.exceptions import ConnectionError
+from werkzeug.datastructures import MultiDict
+
+from inspirehep.modules.search import LiteratureSearch
+from inspirehep.modules.search.cache import SearchResponseCache
+from inspirehep.modules.search.search_factory import (
+    get_search_cache_key,
+    query_from_iq_or_cache,
+    use_search_cache,
+)
+
+
+def test_search_response_cache_key_ignores_whitespace_and_order_of_arguments():
+    redis = MagicMock()
+    redis.get.return_value = None
+    cache = SearchResponseCache(redis)
+
+    key = cache.make_key('search', 'records-hep', MultiDict([
+        ('q', 'a  ellis '), ('sort', 'mostrecent'), ('page', '1'),
+    ]), 'application/json')
+    same_key = cache.make_key('search', 'records-hep', MultiDict([
+        ('page', '1'), ('sort', 'mostrecent'), ('q', ' a ellis'),
+    ]), 'application/json')
+
+    assert key == same_key
+    assert key.startswith('search:responses:search:records-hep:0:')
+
+
+def test_search_response_cache_key_depends_on_page_accept_and_generation():
+    redis = MagicMock()
+    redis.get.return_value = None
+    cache = SearchResponseCache(redis)
+    args = MultiDict([('q', 'a ellis'), ('page', '1')])
+
+    key = cache.make_key('search', 'records-hep', args, 'application/json')
+
+    assert key != cache.make_key('facets', 'records-hep', args, 'application/json')
+    assert key != cache.make_key('search', 'records-hep', args, 'application/vnd+inspire.record.ui+json')
+    assert key != cache.make_key(
+        'search', 'records-hep', MultiDict([('q', 'a ellis'), ('page', '2')]), 'application/json')
+
+    redis.get.return_value = b'1'
+    assert key != cache.make_key('search', 'records-hep', args, 'application/json')
+
+
+def test_search_response_cache_get_counts_hits_and_misses():
+    redis = MagicMock()
+    redis.get.side_effect = [None, json.dumps({'hits': {'total': 1}}).encode('utf-8')]
+    cache = SearchResponseCache(redis)
+
+    assert cache.get('key') is None
+    assert cache.get('key') == {'hits': {'total': 1}}
+
+    redis.hincrby.assert_any_call('search:responses:stats', 'misses', 1)
+    redis.hincrby.assert_any_call('search:responses:stats', 'hits', 1)
+
+
+def test_search_response_cache_stats():
+    redis = MagicMock()
+    redis.hgetall.return_value = {b'hits': b'3', b'misses': b'1'}
+    cache = SearchResponseCache(redis)
+
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+
+@patch('inspirehep.modules.search.cache.StrictRedis.from_url')
+def test_search_falls_back_to_elasticsearch_if_redis_fails(mock_from_url):
+    redis = MagicMock()
+    redis.get.side_effect = ConnectionError
+    redis.set.side_effect = ConnectionError
+    mock_from_url.return_value = redis
+
+    search = MagicMock(LiteratureSearch, _index=['records-hep'])
+    search.query_from_iq.return_value = search
+    search.execute.return_value.to_dict.return_value = {'hits': {'total': 1}}
+
+    config = {'SEARCH_RESPONSE_CACHE_TTL': 60}
+    with patch.dict(current_app.config, config), \
+            current_app.test_request_context('/literature?q=a ellis'):
+        assert get_search_cache_key(search, 'search') is None
+
+        search, response = query_from_iq_or_cache(search, 'key')
+        assert response is None
+        search.query_from_iq.assert_called_once_with('a ellis')
+
+        assert use_search_cache(search, 'key', response) is search
+        search.execute.assert_called_once_with()
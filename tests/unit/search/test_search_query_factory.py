@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from flask import current_app
+from mock import patch
+
+from inspirehep.modules.search.query_factory import (
+    parse_query,
+    warm_parsed_queries_cache,
+)
+from inspirehep.utils.cache import LRUCache
+
+
+@patch('inspirehep.modules.search.query_factory.inspire_query_parser.parse_query')
+@patch('inspirehep.modules.search.query_factory.get_parsed_queries_cache')
+def test_parse_query_parses_each_query_once(mock_get_cache, mock_parse_query):
+    cache = LRUCache()
+    mock_get_cache.return_value = cache
+    mock_parse_query.return_value = {'match': {'title': 'higgs'}}
+
+    first = parse_query('t higgs')
+    first['match']['title'] = 'modified'
+    second = parse_query('t higgs')
+
+    assert second == {'match': {'title': 'higgs'}}
+    mock_parse_query.assert_called_once_with('t higgs')
+    assert cache.hit_rate == 0.5
+
+
+@patch('inspirehep.modules.search.query_factory.inspire_query_parser.parse_query')
+@patch('inspirehep.modules.search.query_factory.get_parsed_queries_cache')
+def test_warm_parsed_queries_cache_keeps_the_most_frequent_queries(mock_get_cache, mock_parse_query):
+    cache = LRUCache(maxsize=2)
+    mock_get_cache.return_value = cache
+    mock_parse_query.side_effect = lambda query_string: {'query': query_string}
+
+    queries = ['a ellis\n', 't higgs\n', 'a ellis\n', '\n', 'j phys.rev\n', 't higgs\n', 'a ellis\n']
+
+    assert warm_parsed_queries_cache(queries) == 2
+    assert 'a ellis' in cache
+    assert 't higgs' in cache
+    assert 'j phys.rev' not in cache
+
+
+@patch('inspirehep.modules.search.query_factory.inspire_query_parser.parse_query')
+@patch('inspirehep.modules.search.query_factory.get_parsed_queries_cache')
+def test_warm_parsed_queries_cache_parses_at_most_size_queries(mock_get_cache, mock_parse_query):
+    cache = LRUCache(maxsize=10)
+    mock_get_cache.return_value = cache
+    mock_parse_query.side_effect = lambda query_string: {'query': query_string}
+
+    queries = ['a ellis', 't higgs', 'a ellis', 'j phys.rev']
+
+    assert warm_parsed_queries_cache(queries, size=1) == 1
+    assert 'a ellis' in cache
+    mock_parse_query.assert_called_once_with('a ellis')
+
+
+@patch('inspirehep.modules.search.query_factory.write_metric')
+@patch('inspirehep.modules.search.query_factory.inspire_query_parser.parse_query')
+@patch('inspirehep.modules.search.query_factory.get_parsed_queries_cache')
+def test_parse_query_writes_the_hit_rate_every_interval(mock_get_cache, mock_parse_query, mock_write_metric):
+    mock_get_cache.return_value = LRUCache()
+    mock_parse_query.return_value = {'match': {'title': 'higgs'}}
+
+    with patch.dict(current_app.config, {'SEARCH_QUERY_PARSER_CACHE_METRIC_INTERVAL': 4}):
+        for _ in range(5):
+            parse_query('t higgs')
+
+    mock_write_metric.assert_called_once_with(
+        name='inspirehep.modules.search.query_factory.parse_query',
+        value=0.75,
+        lookups=4,
+    )
@@ -22,8 +22,15 @@
 
 from __future__ import absolute_import, division, print_function
 
+import json
+
+from mock import patch
+
 from inspirehep.modules.search.views import (
-    default_sortoption, format_sortoptions, sorted_options
+    default_sortoption,
+    format_sortoptions,
+    get_suggestions_cache,
+    sorted_options,
 )
 
 
@@ -60,3 +67,29 @@ def test_default_sortoption():
     result = default_sortoption(sort_options)
 
     assert expected == result
+
+
+@patch('inspirehep.modules.search.views.get_suggestions')
+def test_suggest_serves_the_cached_suggestions_of_a_prefix(get_suggestions, app_client):
+    get_suggestions_cache().clear()
+    get_suggestions.return_value = [{'value': 'Physical Review D'}]
+
+    response = app_client.get('/search/suggest?field=title_suggest&query=Phys')
+    same_response = app_client.get('/search/suggest?field=title_suggest&query=phys')
+
+    expected = {'results': [{'value': 'Physical Review D'}]}
+
+    assert expected == json.loads(response.get_data(as_text=True))
+    assert expected == json.loads(same_response.get_data(as_text=True))
+    get_suggestions.assert_called_once_with('title_suggest', 'Phys')
+
+
+@patch('inspirehep.modules.search.views.get_suggestions')
+def test_suggest_does_not_cache_the_suggestions_of_other_fields(get_suggestions, app_client):
+    get_suggestions_cache().clear()
+    get_suggestions.return_value = [{'value': 'CERN'}]
+
+    app_client.get('/search/suggest?field=other_suggest&query=CE')
+    app_client.get('/search/suggest?field=other_suggest&query=CE')
+
+    assert get_suggestions.call_count == 2
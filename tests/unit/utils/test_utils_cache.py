@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import patch
+
+from inspirehep.utils.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+
+@patch('inspirehep.utils.cache.time')
+def test_lru_cache_expires_entries(mock_time):
+    mock_time.return_value = 100
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+
+    mock_time.return_value = 105
+    assert cache.get('a') == 1
+
+    mock_time.return_value = 111
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+
+def test_lru_cache_with_maxsize_0_caches_nothing():
+    cache = LRUCache(maxsize=0)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
+
+
+def test_lru_cache_pop():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+
+    assert cache.pop('a') == 1
+    assert cache.pop('a', 'missing') == 'missing'
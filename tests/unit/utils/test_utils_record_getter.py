@@ -23,8 +23,10 @@
 from __future__ import absolute_import, division, print_function
 
 import pytest
+from mock import patch
 
 from inspirehep.utils import record_getter
+from inspirehep.utils.cache import LRUCache
 
 
 def test_error_decorator():
@@ -40,3 +42,27 @@ def test_error_decorator():
 
     with pytest.raises(record_getter.RecordGetterError):
         badfn(None, None)
+
+
+@patch('inspirehep.utils.record_getter.PersistentIdentifier')
+@patch('inspirehep.utils.record_getter.get_uuids_cache')
+def test_get_uuid_uses_the_cache(mock_get_uuids_cache, mock_pid):
+    mock_get_uuids_cache.return_value = LRUCache()
+    mock_pid.get.return_value.object_uuid = 'a9d3d1ba-8b43-4b66-8da6-5c4e0d2a7e2b'
+
+    assert record_getter.get_uuid('lit', 1) == 'a9d3d1ba-8b43-4b66-8da6-5c4e0d2a7e2b'
+    assert record_getter.get_uuid('lit', '1') == 'a9d3d1ba-8b43-4b66-8da6-5c4e0d2a7e2b'
+    mock_pid.get.assert_called_once_with('lit', 1)
+
+
+def test_build_projected_record_nests_dotted_fields_and_skips_missing_ones():
+    fields = ['control_number', 'self.$ref', 'titles']
+    values = [1, 'http://localhost:5000/api/literature/1', None]
+
+    expected = {
+        'control_number': 1,
+        'self': {'$ref': 'http://localhost:5000/api/literature/1'},
+    }
+    result = record_getter._build_projected_record(fields, values)
+
+    assert expected == result
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+from mock import patch
+
+from inspirehep.utils.references import JournalKB
+
+
+def test_journal_kb_is_copied_once_per_version(app, tmpdir):
+    journal_kb_file = tmpdir.join('journal-titles.kb')
+    journal_kb_file.write('JOURNAL OF HIGH ENERGY PHYSICS---JHEP\n')
+    config = {
+        'REFEXTRACT_JOURNAL_KB_PATH': str(journal_kb_file),
+        'REFEXTRACT_JOURNAL_KB_CHECK_INTERVAL': 0,
+    }
+    journal_kb = JournalKB()
+
+    with patch.dict(app.config, config):
+        first_path = journal_kb.get_path()
+        with patch('inspirehep.utils.references.retrieve_uri') as retrieve_uri:
+            assert journal_kb.get_path() == first_path
+            retrieve_uri.assert_not_called()
+
+        journal_kb_file.write('PHYSICAL REVIEW D---Phys.Rev.D\n', mode='a')
+        second_path = journal_kb.get_path()
+
+    assert second_path != first_path
+    with open(second_path) as fd:
+        assert fd.read() == journal_kb_file.read()
+
+
+def test_journal_kb_removes_the_older_versions(app, tmpdir):
+    journal_kb_file = tmpdir.join('journal-titles.kb')
+    config = {
+        'REFEXTRACT_JOURNAL_KB_PATH': str(journal_kb_file),
+        'REFEXTRACT_JOURNAL_KB_CHECK_INTERVAL': 0,
+    }
+    journal_kb = JournalKB()
+
+    paths = []
+    with patch.dict(app.config, config):
+        for line in ['A---A\n', 'BB---BB\n', 'CCC---CCC\n']:
+            journal_kb_file.write(line)
+            paths.append(journal_kb.get_path())
+
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1])
+    assert os.path.exists(paths[2])